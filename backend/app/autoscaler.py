@@ -0,0 +1,330 @@
+"""
+Queue-depth-driven autoscaling for Celery workers and converters.
+
+A fixed ``--concurrency`` is either idle at night or far behind at peak,
+and worker slots beyond what the converters can serve only add contention.
+This controller runs as its own process (``python autoscaler.py``, the
+``autoscaler`` service in docker-compose.yml) and every
+``AUTOSCALE_INTERVAL`` seconds:
+
+1. samples the queue depth (``LLEN`` of each ``AUTOSCALE_QUEUES`` list in
+   Redis, plus tasks workers have reserved but not started) and, through
+   Celery's ``inspect``, the pool size, running tasks and accepted-task
+   counters of every worker consuming those queues
+2. turns counter deltas into arrival and completion rates (smoothed), and
+   estimates the mean service time from running tasks over completions
+   (Little's law)
+3. sizes the pools to serve the arrival rate plus drain the backlog within
+   ``AUTOSCALE_TARGET_WAIT`` seconds, capped by what the running converters
+   can take (``CONVERTERS`` x ``CONVERTER_CAPACITY``), and resizes each
+   worker with ``pool_grow``/``pool_shrink``
+4. publishes the number of converters that load would need under
+   ``autoscaler:recommendation`` in Redis (and logs it) for whatever
+   manages the converter replicas
+
+Hysteresis: scaling up is immediate, scaling down only goes to the highest
+size needed during the last ``AUTOSCALE_SCALE_DOWN_DELAY`` seconds, so short
+lulls between bursts don't shrink the pools only to grow them again.
+
+``perf/autoscale_sim.py`` replays recorded arrival traces against local
+stand-ins with this controller in the loop.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUTOSCALE_QUEUES = [
+    q.strip() for q in os.getenv("AUTOSCALE_QUEUES", "celery,large").split(",") if q
+]
+INTERVAL = float(os.getenv("AUTOSCALE_INTERVAL", 10))
+# Pool size bounds per worker
+MIN_CONCURRENCY = int(os.getenv("AUTOSCALE_MIN_CONCURRENCY", 1))
+MAX_CONCURRENCY = int(os.getenv("AUTOSCALE_MAX_CONCURRENCY", 8))
+TARGET_WAIT_S = float(os.getenv("AUTOSCALE_TARGET_WAIT", 60))
+SCALE_DOWN_DELAY_S = float(os.getenv("AUTOSCALE_SCALE_DOWN_DELAY", 300))
+# Assumed until the first completions have been seen
+DEFAULT_SERVICE_S = float(os.getenv("AUTOSCALE_DEFAULT_SERVICE_S", 20))
+# Converters running now and conversions each one serves at once; 0
+# converters (e.g. CONVERTER_BACKEND=embedded) disables the cap
+CONVERTERS = int(os.getenv("CONVERTERS", 1))
+CONVERTER_CAPACITY = int(os.getenv("CONVERTER_CAPACITY", 1))
+MAX_CONVERTERS = int(os.getenv("AUTOSCALE_MAX_CONVERTERS", 8))
+# Weight of the newest sample in the smoothed rates
+SMOOTHING = 0.3
+# Prefork pools start processes asked for by pool_grow on their next
+# maintenance pass (every 5 s, later when busy); until then ``inspect stats``
+# shows the old size. Requested sizes count as current for this long.
+RESIZE_SETTLE_S = 30.0
+RECOMMENDATION_KEY = "autoscaler:recommendation"
+
+
+@dataclass
+class Sample:
+    """What the controller sees at one point in time."""
+
+    at: float
+    # Tasks waiting, in the broker or reserved by a worker
+    depth: int
+    # Worker hostname -> pool processes, tasks accepted so far, tasks running
+    pools: Dict[str, int]
+    accepted: Dict[str, int] = field(default_factory=dict)
+    running: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class Decision:
+    """Pool sizes to apply and the converter recommendation."""
+
+    concurrency: Dict[str, int]
+    needed_slots: int
+    converters: int
+    arrival_rate: float
+    completion_rate: float
+    service_s: float
+    depth: int
+
+
+def _smooth(previous: Optional[float], value: float) -> float:
+    return value if previous is None else previous + SMOOTHING * (value - previous)
+
+
+class Autoscaler:
+    """Decides pool sizes from successive samples; performs no I/O."""
+
+    def __init__(
+        self,
+        converters: int = CONVERTERS,
+        converter_capacity: int = CONVERTER_CAPACITY,
+        min_concurrency: int = MIN_CONCURRENCY,
+        max_concurrency: int = MAX_CONCURRENCY,
+        target_wait_s: float = TARGET_WAIT_S,
+        scale_down_delay_s: float = SCALE_DOWN_DELAY_S,
+        default_service_s: float = DEFAULT_SERVICE_S,
+        max_converters: int = MAX_CONVERTERS,
+    ):
+        self.converters = converters
+        self.converter_capacity = max(1, converter_capacity)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_wait_s = target_wait_s
+        self.scale_down_delay_s = scale_down_delay_s
+        self.max_converters = max_converters
+        self.service_s = default_service_s
+        self.arrival_rate: Optional[float] = None
+        self.completion_rate: Optional[float] = None
+        self.previous: Optional[Sample] = None
+        # (time, slots needed) over the scale-down window
+        self.history: Deque[Tuple[float, int]] = deque()
+
+    def _update_rates(self, sample: Sample) -> None:
+        previous = self.previous
+        if previous is None or sample.at <= previous.at:
+            return
+        elapsed = sample.at - previous.at
+        started = 0
+        for worker, accepted in sample.accepted.items():
+            before = previous.accepted.get(worker, 0)
+            # A restarted worker's counters start again from zero
+            started += accepted - before if accepted >= before else accepted
+        running_delta = sum(sample.running.values()) - sum(previous.running.values())
+        completed = max(0, started - running_delta)
+        arrived = max(0, started + sample.depth - previous.depth)
+
+        self.arrival_rate = _smooth(self.arrival_rate, arrived / elapsed)
+        self.completion_rate = _smooth(self.completion_rate, completed / elapsed)
+        running = sum(sample.running.values())
+        if completed and running:
+            # Little's law over the interval: busy slots / completion rate
+            self.service_s = _smooth(self.service_s, running / (completed / elapsed))
+
+    def _needed_slots(self, sample: Sample) -> int:
+        """Slots for the arrival rate plus draining the backlog in time."""
+        rate = self.arrival_rate or 0.0
+        needed = rate * self.service_s
+        needed += sample.depth * self.service_s / self.target_wait_s
+        slots = math.ceil(needed - 1e-9)
+        return max(slots, 1 if sample.depth else 0)
+
+    def observe(self, sample: Sample) -> Decision:
+        self._update_rates(sample)
+        self.previous = sample
+
+        needed = self._needed_slots(sample)
+        self.history.append((sample.at, needed))
+        while self.history and self.history[0][0] < sample.at - self.scale_down_delay_s:
+            self.history.popleft()
+        # Up at once, down only to the peak of the scale-down window
+        target = max(n for _, n in self.history)
+
+        converters = math.ceil(target / self.converter_capacity)
+        converters = min(max(converters, 1), self.max_converters)
+        slots = target
+        if self.converters > 0:
+            slots = min(slots, self.converters * self.converter_capacity)
+
+        workers = sorted(sample.pools)
+        concurrency: Dict[str, int] = {}
+        for index, worker in enumerate(workers):
+            # Spread the slots as evenly as possible
+            share = slots // len(workers) + (index < slots % len(workers))
+            concurrency[worker] = min(
+                max(share, self.min_concurrency), self.max_concurrency
+            )
+        return Decision(
+            concurrency=concurrency,
+            needed_slots=needed,
+            converters=converters,
+            arrival_rate=round(self.arrival_rate or 0.0, 4),
+            completion_rate=round(self.completion_rate or 0.0, 4),
+            service_s=round(self.service_s, 3),
+            depth=sample.depth,
+        )
+
+
+def collect(
+    celery: Any, client: Any, queues: List[str], timeout: float = 2.0
+) -> Sample:
+    """Sample queue depth from Redis and worker pools through ``inspect``."""
+    pipe = client.pipeline()
+    for queue in queues:
+        pipe.llen(queue)
+    depth = sum(pipe.execute())
+
+    inspect = celery.control.inspect(timeout=timeout)
+    active_queues = inspect.active_queues() or {}
+    stats = inspect.stats() or {}
+    active = inspect.active() or {}
+    reserved = inspect.reserved() or {}
+
+    sample = Sample(at=time.monotonic(), depth=depth, pools={})
+    for worker, worker_queues in active_queues.items():
+        if worker not in stats or not {q["name"] for q in worker_queues} & set(queues):
+            continue
+        worker_stats = stats[worker]
+        sample.pools[worker] = len(worker_stats.get("pool", {}).get("processes", []))
+        sample.accepted[worker] = sum(worker_stats.get("total", {}).values())
+        sample.running[worker] = len(active.get(worker, []))
+        # Prefetched messages have left the broker list but not started
+        sample.depth += len(reserved.get(worker, []))
+    return sample
+
+
+def apply(
+    celery: Any,
+    sample: Sample,
+    decision: Decision,
+    pending: Optional[Dict[str, Tuple[int, float]]] = None,
+) -> int:
+    """
+    Resize worker pools to the decision; returns the number of changes.
+
+    ``pending`` (worker -> requested size, when), kept by the caller across
+    iterations, stops a resize that hasn't shown up in the sample yet from
+    being requested again.
+    """
+    pending = {} if pending is None else pending
+    changes = 0
+    for worker, target in decision.concurrency.items():
+        current = sample.pools.get(worker, target)
+        if worker in pending:
+            requested, at = pending[worker]
+            if requested == current or sample.at - at > RESIZE_SETTLE_S:
+                del pending[worker]
+            else:
+                current = requested
+        difference = target - current
+        if difference > 0:
+            celery.control.pool_grow(difference, destination=[worker])
+        elif difference < 0:
+            celery.control.pool_shrink(-difference, destination=[worker])
+        else:
+            continue
+        logger.info("Resizing %s pool %d -> %d", worker, current, target)
+        pending[worker] = (target, sample.at)
+        changes += 1
+    return changes
+
+
+def publish(client: Any, decision: Decision, ttl: float) -> None:
+    """Log the decision and publish the converter recommendation."""
+    payload = json.dumps(
+        {
+            "converters": decision.converters,
+            "neededSlots": decision.needed_slots,
+            "concurrency": decision.concurrency,
+            "arrivalRate": decision.arrival_rate,
+            "completionRate": decision.completion_rate,
+            "serviceSeconds": decision.service_s,
+            "depth": decision.depth,
+        },
+        sort_keys=True,
+    )
+    logger.info("Autoscaler decision %s", payload)
+    client.set(RECOMMENDATION_KEY, payload, ex=max(1, int(ttl)))
+
+
+def run(
+    celery: Any,
+    client: Any,
+    scaler: Autoscaler,
+    queues: List[str],
+    interval: float,
+    dry_run: bool = False,
+    once: bool = False,
+) -> None:
+    pending: Dict[str, Tuple[int, float]] = {}
+    while True:
+        started = time.monotonic()
+        try:
+            sample = collect(celery, client, queues)
+            decision = scaler.observe(sample)
+            publish(client, decision, ttl=interval * 6)
+            if not dry_run:
+                apply(celery, sample, decision, pending)
+        except Exception:
+            # A broker hiccup must not stop the controller
+            logger.exception("Autoscaler iteration failed")
+        if once:
+            return
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Celery worker autoscaler")
+    parser.add_argument("--interval", type=float, default=INTERVAL)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Log decisions, resize nothing"
+    )
+    parser.add_argument("--once", action="store_true", help="Run one iteration")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    import redis
+
+    from celery_app import celery
+
+    client = redis.Redis.from_url(celery.conf.broker_url)
+    run(
+        celery,
+        client,
+        Autoscaler(),
+        AUTOSCALE_QUEUES,
+        args.interval,
+        dry_run=args.dry_run,
+        once=args.once,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,10 @@
 import os
 
 from celery import Celery
+from worker_memory import MemoryPressureGuard, route_large_decks
+
+# Uploads, results and job records are kept this long
+RETENTION_DAYS = float(os.getenv("RETENTION_DAYS", 1))
 
 # Instantiate Celery
 celery = Celery(
@@ -26,8 +30,29 @@ celery.conf.update(
     # Task time limits (in seconds)
     task_soft_time_limit=int(os.getenv("TASK_SOFT_TIME_LIMIT", 300)),
     task_time_limit=int(os.getenv("TASK_TIME_LIMIT", 360)),
+    # First-slide previews get their own queue and worker, so they are not
+    # stuck behind the full conversions they are meant to run ahead of;
+    # large decks get a queue the worker can stop taking from under memory
+    # pressure (see worker_memory.py)
+    task_routes=[
+        route_large_decks,
+        {"tasks.preview_task": {"queue": "previews"}},
+    ],
+    # Reserve one task at a time and acknowledge it when done, so a child
+    # that is recycled or killed doesn't hold (or lose) queued jobs
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    # Replace worker children between tasks once they have run this many
+    # tasks or their RSS passed this many MiB, before they leak into an OOM kill
+    worker_max_tasks_per_child=int(os.getenv("WORKER_MAX_TASKS_PER_CHILD", 100)),
+    worker_max_memory_per_child=int(os.getenv("WORKER_MAX_MEMORY_MB", 1024)) * 1024,
+    # Results (and /status) expire together with the job records in jobs.py
+    # and the stored files, which cleanup_old_files removes
+    result_expires=int(RETENTION_DAYS * 86400),
 )
 
+celery.steps["consumer"].add(MemoryPressureGuard)
+
 # Schedule periodic cleanup task (runs every 6 hours)
 celery.conf.beat_schedule = {
     "cleanup-old-files": {
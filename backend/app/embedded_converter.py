@@ -0,0 +1,251 @@
+"""
+In-worker PPTX -> PDF conversion through a pool of headless LibreOffice processes.
+
+Each pooled process is a ``soffice --headless`` instance listening on its own
+UNO socket with a private user profile. A worker child starts its pool on a
+background thread when it boots, so it takes tasks straight away and the first
+conversion waits for the pool if it is still starting. Processes are
+health-checked at checkout, handed out one conversion at a time and recycled
+after ``EMBEDDED_MAX_CONVERSIONS`` conversions or when their process tree
+exceeds ``EMBEDDED_MAX_RSS_MB``.
+
+The pool lives in each Celery worker child, so with the default prefork pool
+``EMBEDDED_POOL_SIZE=1`` and ``--concurrency=<cores>`` gives one LibreOffice
+per core. Requires LibreOffice and the ``unoserver`` package with an
+importable ``uno`` module (see README).
+"""
+
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+from worker_memory import rss_bytes
+
+logger = logging.getLogger(__name__)
+
+SOFFICE = os.getenv("SOFFICE_PATH", "soffice")
+POOL_SIZE = int(os.getenv("EMBEDDED_POOL_SIZE", 1))
+MAX_CONVERSIONS = int(os.getenv("EMBEDDED_MAX_CONVERSIONS", 200))
+MAX_RSS_MB = int(os.getenv("EMBEDDED_MAX_RSS_MB", 1024))
+STARTUP_TIMEOUT = float(os.getenv("EMBEDDED_STARTUP_TIMEOUT", 60))
+CHECKOUT_TIMEOUT = float(os.getenv("EMBEDDED_CHECKOUT_TIMEOUT", 300))
+
+
+class ConverterUnavailable(RuntimeError):
+    """Raised when no healthy LibreOffice process can serve a conversion."""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _tree_rss(pid: int) -> int:
+    """RSS in bytes of ``pid`` and its descendants, read from /proc."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        total += rss_bytes(current)
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as children:
+                pending.extend(int(c) for c in children.read().split())
+        except OSError:
+            continue
+    return total
+
+
+class OfficeProcess:
+    """One headless LibreOffice instance reachable over a UNO socket."""
+
+    def __init__(self, port: Optional[int] = None):
+        self.port = port or _free_port()
+        self.proc: Optional[subprocess.Popen] = None
+        self.profile_dir: Optional[str] = None
+        self.converter = None
+        self.conversions = 0
+
+    def start(self) -> None:
+        """Launch soffice and block until it accepts UNO connections."""
+        self.profile_dir = tempfile.mkdtemp(prefix=f"lo-profile-{self.port}-")
+        self.proc = subprocess.Popen(
+            [
+                SOFFICE,
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"-env:UserInstallation=file://{self.profile_dir}",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;"
+                "StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.conversions = 0
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        last_error: Optional[Exception] = None
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise ConverterUnavailable(
+                    f"soffice on port {self.port} exited with {self.proc.returncode}"
+                )
+            try:
+                self.converter = self._connect()
+                logger.info("LibreOffice ready on port %s", self.port)
+                return
+            except Exception as e:  # UNO raises NoConnectException until ready
+                last_error = e
+                time.sleep(0.25)
+
+        self.stop()
+        raise ConverterUnavailable(
+            f"soffice on port {self.port} not ready after {STARTUP_TIMEOUT}s: "
+            f"{last_error}"
+        )
+
+    def _connect(self):
+        from unoserver.converter import UnoConverter
+
+        return UnoConverter(interface="127.0.0.1", port=str(self.port))
+
+    def is_healthy(self) -> bool:
+        """Process alive and its UNO desktop still answering."""
+        if self.proc is None or self.proc.poll() is not None or not self.converter:
+            return False
+        try:
+            self.converter.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def rss(self) -> int:
+        return _tree_rss(self.proc.pid) if self.proc else 0
+
+    def needs_recycle(self) -> bool:
+        if self.conversions >= MAX_CONVERSIONS:
+            return True
+        return self.rss() > MAX_RSS_MB * 1024 * 1024
+
+    def convert(self, inpath: str, outpath: str, convert_to: str = "pdf") -> None:
+        self.converter.convert(inpath=inpath, outpath=outpath, convert_to=convert_to)
+        self.conversions += 1
+
+    def stop(self) -> None:
+        self.converter = None
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.proc = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+
+class ConverterPool:
+    """Fixed-size pool of warm ``OfficeProcess`` instances."""
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = max(1, size)
+        self.processes: List[OfficeProcess] = []
+        self._idle: "queue.Queue[OfficeProcess]" = queue.Queue()
+
+    def start(self) -> "ConverterPool":
+        try:
+            for _ in range(self.size):
+                process = OfficeProcess()
+                self.processes.append(process)
+                process.start()
+                self._idle.put(process)
+        except Exception:
+            # Don't leave the processes that did start running; the next
+            # get_pool() starts a whole new pool
+            self.close()
+            raise
+        return self
+
+    def convert(self, inpath: str, outpath: str, convert_to: str = "pdf") -> None:
+        """Convert ``inpath`` to ``outpath`` on the next idle process."""
+        try:
+            process = self._idle.get(timeout=CHECKOUT_TIMEOUT)
+        except queue.Empty:
+            raise ConverterUnavailable("No idle LibreOffice process") from None
+
+        try:
+            if not process.is_healthy():
+                logger.warning(
+                    "LibreOffice on port %s unhealthy, restarting", process.port
+                )
+                process.restart()
+            process.convert(inpath, outpath, convert_to)
+        except Exception:
+            # A failed conversion can leave the document or process wedged
+            process.stop()
+            raise
+        finally:
+            self._recycle_if_needed(process)
+            self._idle.put(process)
+
+    def _recycle_if_needed(self, process: OfficeProcess) -> None:
+        if process.proc is not None and not process.needs_recycle():
+            return
+        logger.info(
+            "Recycling LibreOffice on port %s after %s conversions",
+            process.port,
+            process.conversions,
+        )
+        try:
+            process.restart()
+        except ConverterUnavailable:
+            # Leave it stopped; the next checkout retries the start
+            logger.exception("Failed to restart LibreOffice on port %s", process.port)
+
+    def close(self) -> None:
+        for process in self.processes:
+            process.stop()
+        self.processes = []
+
+
+_pool: Optional[ConverterPool] = None
+_pool_lock = threading.Lock()
+
+
+def start_pool(size: int = POOL_SIZE) -> ConverterPool:
+    """Start this process' pool (idempotent); waits for one already starting."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConverterPool(size).start()
+        return _pool
+
+
+def get_pool() -> ConverterPool:
+    """Return the running pool, starting it on first use."""
+    return _pool or start_pool()
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
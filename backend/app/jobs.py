@@ -0,0 +1,366 @@
+"""
+Job registry: a queryable record of every conversion job.
+
+Celery result keys only answer "what happened to job X" and expire, so jobs
+can't be listed or filtered without scanning Redis. ``/convert`` records each
+job here and Celery signals in ``tasks.py`` move it through its statuses;
+``GET /jobs`` lists them newest first with keyset pagination.
+
+``JOB_REGISTRY`` selects the implementation:
+
+- ``redis`` (default): a hash per job plus sorted-set indexes (score =
+  creation time) for all jobs, each status and each tenant, so a listing is a
+  range read on one index rather than a scan
+- ``sqlite``: one table with composite indexes in ``JOB_REGISTRY_PATH``, for
+  single-node setups (the file must be on a volume the API and the workers
+  share)
+
+Records are deleted by ``cleanup_old_files`` after ``RETENTION_DAYS``.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+JOB_REGISTRY = os.getenv("JOB_REGISTRY", "redis")
+JOB_REGISTRY_URL = os.getenv(
+    "JOB_REGISTRY_URL", os.getenv("REDIS_URL", "redis://redis:6379/0")
+)
+JOB_REGISTRY_PATH = os.getenv("JOB_REGISTRY_PATH", "/data/jobs/jobs.sqlite3")
+
+STATUSES = ("queued", "processing", "done", "error")
+# Fields kept besides id, status and timestamps
+FIELDS = ("tenant", "filename", "upload", "slides", "format", "error")
+
+Job = Dict[str, Any]
+
+_lock = threading.Lock()
+_registry: Optional["JobRegistry"] = None
+_registry_pid: Optional[int] = None
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def _public(job_id: str, status: str, created: float, updated: float, **fields) -> Job:
+    """The shape returned by ``GET /jobs``."""
+    job = {
+        "jobId": job_id,
+        "status": status,
+        "createdAt": _isoformat(created),
+        "updatedAt": _isoformat(updated),
+    }
+    job.update({k: v for k, v in fields.items() if v not in (None, "")})
+    if "slides" in job:
+        job["slides"] = int(job["slides"])
+    return job
+
+
+def encode_cursor(created: float, job_id: str) -> str:
+    return f"{created!r}:{job_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    created, _, job_id = cursor.partition(":")
+    try:
+        return float(created), job_id
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+
+
+class JobRegistry(ABC):
+    """Where job records and their indexes are kept."""
+
+    @abstractmethod
+    def create(self, job_id: str, **fields: Any) -> None:
+        """Record a new job with status ``queued``."""
+
+    @abstractmethod
+    def update(self, job_id: str, status: str, **fields: Any) -> None:
+        """Move a known job to ``status``; unknown ids are ignored."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job's record, or None."""
+
+    @abstractmethod
+    def list(
+        self,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        tenant: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Job], Optional[str]]:
+        """Jobs newest first, and the cursor of the next page (None at the end)."""
+
+    @abstractmethod
+    def delete_older_than(self, cutoff: datetime) -> int:
+        """Delete jobs created before ``cutoff``; return the count."""
+
+
+class RedisJobRegistry(JobRegistry):
+    """Job hashes with sorted-set indexes by time, status and tenant."""
+
+    PREFIX = "jobs:"
+    SCAN_BATCH = 200
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.PREFIX}job:{job_id}"
+
+    def _index(self, kind: str = "all", value: str = "") -> str:
+        return f"{self.PREFIX}{kind}:{value}" if value else f"{self.PREFIX}{kind}"
+
+    def create(self, job_id: str, **fields: Any) -> None:
+        now = time.time()
+        record = {k: v for k, v in fields.items() if k in FIELDS and v is not None}
+        record.update(status="queued", created=repr(now), updated=repr(now))
+        pipe = self.client.pipeline()
+        pipe.hset(self._job_key(job_id), mapping=record)
+        pipe.zadd(self._index(), {job_id: now})
+        pipe.zadd(self._index("status", "queued"), {job_id: now})
+        if record.get("tenant"):
+            pipe.zadd(self._index("tenant", record["tenant"]), {job_id: now})
+        pipe.execute()
+
+    def update(self, job_id: str, status: str, **fields: Any) -> None:
+        created = self.client.hget(self._job_key(job_id), "created")
+        if created is None:
+            return
+        record = {k: v for k, v in fields.items() if k in FIELDS and v is not None}
+        record.update(status=status, updated=repr(time.time()))
+        pipe = self.client.pipeline()
+        pipe.hset(self._job_key(job_id), mapping=record)
+        for other in STATUSES:
+            if other != status:
+                pipe.zrem(self._index("status", other), job_id)
+        pipe.zadd(self._index("status", status), {job_id: float(created)})
+        pipe.execute()
+
+    @staticmethod
+    def _decode(job_id: str, data: Dict[str, str]) -> Job:
+        return _public(
+            job_id,
+            data.pop("status"),
+            float(data.pop("created")),
+            float(data.pop("updated")),
+            **data,
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self.client.hgetall(self._job_key(job_id))
+        return self._decode(job_id, data) if data else None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        tenant: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Job], Optional[str]]:
+        # Read the narrowest index; a tenant filter on top of a status index
+        # is applied to the records fetched
+        if status:
+            index = self._index("status", status)
+        elif tenant:
+            index = self._index("tenant", tenant)
+        else:
+            index = self._index()
+        max_score: Any = "+inf"
+        after: Optional[Tuple[float, str]] = None
+        if cursor:
+            after = decode_cursor(cursor)
+            max_score = after[0]
+        min_score: Any = since.timestamp() if since else "-inf"
+
+        jobs: List[Job] = []
+        offset = 0
+        while True:
+            batch = self.client.zrevrangebyscore(
+                index,
+                max_score,
+                min_score,
+                start=offset,
+                num=self.SCAN_BATCH,
+                withscores=True,
+            )
+            if not batch:
+                return jobs, None
+            offset += len(batch)
+            # Equal scores come in descending id order, like the cursor
+            batch = [
+                (job_id, score)
+                for job_id, score in batch
+                if after is None or score < after[0] or job_id < after[1]
+            ]
+            pipe = self.client.pipeline(transaction=False)
+            for job_id, _ in batch:
+                pipe.hgetall(self._job_key(job_id))
+            for (job_id, score), data in zip(batch, pipe.execute()):
+                if not data or (tenant and data.get("tenant") != tenant):
+                    continue  # deleted meanwhile, or another tenant's job
+                jobs.append(self._decode(job_id, data))
+                if len(jobs) == limit:
+                    return jobs, encode_cursor(score, job_id)
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        deleted = 0
+        while True:
+            ids = self.client.zrangebyscore(
+                self._index(), "-inf", f"({cutoff.timestamp()!r}", 0, self.SCAN_BATCH
+            )
+            if not ids:
+                return deleted
+            pipe = self.client.pipeline(transaction=False)
+            for job_id in ids:
+                pipe.hget(self._job_key(job_id), "tenant")
+            tenants = pipe.execute()
+            pipe = self.client.pipeline()
+            for job_id, tenant in zip(ids, tenants):
+                pipe.delete(self._job_key(job_id))
+                pipe.zrem(self._index(), job_id)
+                for status in STATUSES:
+                    pipe.zrem(self._index("status", status), job_id)
+                if tenant:
+                    pipe.zrem(self._index("tenant", tenant), job_id)
+            pipe.execute()
+            deleted += len(ids)
+
+
+class SqliteJobRegistry(JobRegistry):
+    """One table with composite indexes, for single-node deployments."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            created REAL NOT NULL,
+            updated REAL NOT NULL,
+            tenant TEXT,
+            filename TEXT,
+            upload TEXT,
+            slides INTEGER,
+            format TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created, id);
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created, id);
+        CREATE INDEX IF NOT EXISTS jobs_tenant ON jobs (tenant, created, id);
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            # WAL lets the API read while a worker writes
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(self.SCHEMA)
+
+    def _execute(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock, self.conn:
+            return self.conn.execute(sql, params).fetchall()
+
+    def create(self, job_id: str, **fields: Any) -> None:
+        now = time.time()
+        record = {k: v for k, v in fields.items() if k in FIELDS}
+        columns = ["id", "status", "created", "updated", *record]
+        self._execute(
+            f"INSERT INTO jobs ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            (job_id, "queued", now, now, *record.values()),
+        )
+
+    def update(self, job_id: str, status: str, **fields: Any) -> None:
+        record = {k: v for k, v in fields.items() if k in FIELDS and v is not None}
+        record.update(status=status, updated=time.time())
+        assignments = ", ".join(f"{column} = ?" for column in record)
+        self._execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ?", (*record.values(), job_id)
+        )
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Job:
+        data = dict(row)
+        return _public(
+            data.pop("id"),
+            data.pop("status"),
+            data.pop("created"),
+            data.pop("updated"),
+            **data,
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._decode(rows[0]) if rows else None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        tenant: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Job], Optional[str]]:
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if tenant:
+            where.append("tenant = ?")
+            params.append(tenant)
+        if since:
+            where.append("created >= ?")
+            params.append(since.timestamp())
+        if cursor:
+            created, job_id = decode_cursor(cursor)
+            where.append("(created, id) < (?, ?)")
+            params.extend([created, job_id])
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created DESC, id DESC LIMIT ?"
+        rows = self._execute(sql, (*params, limit))
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1]["created"], rows[-1]["id"])
+        return [self._decode(row) for row in rows], next_cursor
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM jobs WHERE created < ?", (cutoff.timestamp(),)
+            )
+            return cursor.rowcount
+
+
+def get_job_registry() -> JobRegistry:
+    """Return this process' job registry, selected by ``JOB_REGISTRY``."""
+    global _registry, _registry_pid
+    pid = os.getpid()
+    with _lock:
+        # SQLite connections must not cross a fork
+        if _registry is None or _registry_pid != pid:
+            if JOB_REGISTRY == "sqlite":
+                _registry = SqliteJobRegistry(JOB_REGISTRY_PATH)
+            elif JOB_REGISTRY == "redis":
+                import redis
+
+                _registry = RedisJobRegistry(
+                    redis.Redis.from_url(JOB_REGISTRY_URL, decode_responses=True)
+                )
+            else:
+                raise ValueError(f"Unknown JOB_REGISTRY: {JOB_REGISTRY!r}")
+            _registry_pid = pid
+        return _registry
@@ -1,13 +1,39 @@
+import io
 import os
 import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Literal, Optional
 
-import boto3
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, Header, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response
 
-from tasks import convert_task
+from celery_app import celery
+from jobs import get_job_registry
+from pdf_optimize import JPEG_QUALITY, TARGET_DPI
+from preflight import PreflightError, inspect_pptx
+from rasterize import RASTER_DPI
+from storage import STORAGE_ACCEL_REDIRECT_PREFIX, get_storage
+from warmup import warm_api, warm_in_background
 
-app = FastAPI()
+# Tasks are enqueued by name, so the API never imports tasks.py (and what
+# it pulls in); the names are those Celery registers for tasks.py
+CONVERT_TASK = "tasks.convert_task"
+PREVIEW_TASK = "tasks.preview_task"
+# First-slide previews (see preview_task); off when no previews worker runs
+PREVIEW_ENABLED = os.getenv("PREVIEW_ENABLED", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients are otherwise built by the first request that needs them; the
+    # thread lets the server bind its port without waiting for them
+    warm_in_background(warm_api)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow requests from your frontend
 app.add_middleware(
@@ -17,14 +43,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# AWS S3 client
-BUCKET = os.getenv("AWS_S3_BUCKET")
-REGION = os.getenv("AWS_REGION", "us-east-1")
-s3 = boto3.client("s3", region_name=REGION)
+
+def preview_id(job_id: str) -> str:
+    """Task id of the first-slide preview rendered for ``job_id``."""
+    return f"{job_id}-preview"
+
+
+def preview_url(job_id: str) -> Optional[str]:
+    """URL of the job's first-slide preview, once it has been rendered."""
+    from celery.result import AsyncResult
+
+    result = AsyncResult(preview_id(job_id), app=celery)
+    if result.state == "SUCCESS" and isinstance(result.result, dict):
+        return result.result.get("url")
+    return None
 
 
 @app.post("/convert")
-async def convert(file: UploadFile = File(...)):
+async def convert(
+    file: UploadFile = File(...),
+    optimize: bool = Form(False),
+    target_dpi: int = Form(TARGET_DPI, ge=36, le=600),
+    jpeg_quality: int = Form(JPEG_QUALITY, ge=10, le=95),
+    linearize: bool = Form(False),
+    slim: bool = Form(False),
+    convert_to: Literal["pdf", "png", "webp"] = Form("pdf", alias="convert-to"),
+    dpi: int = Form(RASTER_DPI, ge=36, le=300),
+    x_tenant_id: Optional[str] = Header(None, max_length=64),
+):
     # only support .pptx
     if not file.filename:
         raise HTTPException(400, "No filename provided")
@@ -38,26 +84,95 @@ async def convert(file: UploadFile = File(...)):
     # Read file bytes
     data = await file.read()
 
-    # Generate unique S3 keys but preserve the original filename structure
+    # Reject corrupt, non-PowerPoint and zip-bomb uploads before they reach
+    # a worker; this only reads the ZIP directory and content types
+    try:
+        deck = inspect_pptx(io.BytesIO(data))
+    except PreflightError as e:
+        raise HTTPException(400, str(e))
+
+    # Generate unique storage keys but preserve the original filename structure
     unique_id = uuid.uuid4().hex
     pptx_key = f"{unique_id}_{base_filename}.pptx"
 
-    # Upload PPTX to S3
-    s3.put_object(Bucket=BUCKET, Key=pptx_key, Body=data)
-
-    # Enqueue Celery task, passing both the S3 key and the base filename
-    task = convert_task.delay(pptx_key, base_filename)
-    return {"jobId": task.id}
+    # Store the PPTX (S3 or the shared volume, see storage.py)
+    get_storage().put_bytes(pptx_key, data)
+
+    # Output options; optimisation downsamples images to target_dpi,
+    # linearisation ("fast web view") lets viewers show page one early and
+    # slimming downscales the deck's own pictures before conversion
+    options = {}
+    if optimize:
+        options.update(optimize=True, target_dpi=target_dpi, jpeg_quality=jpeg_quality)
+    if linearize:
+        options["linearize"] = True
+    if slim:
+        options.update(slim=True, target_dpi=target_dpi)
+    # Per-slide images instead of a PDF, rendered at dpi
+    if convert_to != "pdf":
+        options.update(convert_to=convert_to, dpi=dpi)
+
+    # Record the job before enqueueing it, so the worker's status updates
+    # always find it (see jobs.py)
+    job_id = str(uuid.uuid4())
+    get_job_registry().create(
+        job_id, tenant=x_tenant_id, filename=file.filename, upload=pptx_key
+    )
+
+    # Enqueue Celery task, passing the storage key, the base filename, the
+    # pre-flight summary of the deck and the output options
+    celery.send_task(
+        CONVERT_TASK,
+        (pptx_key, base_filename),
+        {"deck": deck.as_dict(), "options": options},
+        task_id=job_id,
+    )
+    # Quick first-slide render on the previews queue, found by /status
+    # through its derived task id
+    if PREVIEW_ENABLED:
+        celery.send_task(
+            PREVIEW_TASK, (pptx_key, base_filename), task_id=preview_id(job_id)
+        )
+    return {"jobId": job_id}
+
+
+@app.get("/jobs")
+def list_jobs(
+    status: Optional[Literal["queued", "processing", "done", "error"]] = None,
+    since: Optional[datetime] = None,
+    tenant: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """Jobs newest first; pass ``nextCursor`` back as ``cursor`` for more."""
+    if since and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    try:
+        jobs, next_cursor = get_job_registry().list(
+            status=status, since=since, tenant=tenant, cursor=cursor, limit=limit
+        )
+    except ValueError as e:  # malformed cursor
+        raise HTTPException(400, str(e))
+    return {"jobs": jobs, "nextCursor": next_cursor}
 
 
 @app.get("/status/{job_id}")
 def status(job_id: str):
     from celery.result import AsyncResult
 
-    result: AsyncResult = AsyncResult(job_id, app=convert_task.app)
-
-    if result.state == "PENDING":
-        return {"status": "processing"}
+    result: AsyncResult = AsyncResult(job_id, app=celery)
+
+    if result.state in ("PENDING", "PROGRESS"):
+        response = {"status": "processing"}
+        if result.state == "PROGRESS" and isinstance(result.info, dict):
+            # meta written by convert_task: stage, progress (0-100) and
+            # bytesDone/bytesTotal or chunk/chunks where known
+            response.update(result.info)
+        # The first slide, while the PDF is still being produced
+        preview = preview_url(job_id)
+        if preview:
+            response["previewUrl"] = preview
+        return response
     elif result.state == "SUCCESS":
         task_result = result.result or {}
         if isinstance(task_result, dict):
@@ -68,3 +183,29 @@ def status(job_id: str):
         return {"status": "error", "error": str(result.result)}
     else:
         return {"status": result.state.lower()}
+
+
+@app.get("/download/{token}")
+def download(token: str):
+    """Serve a result from filesystem storage via its signed token."""
+    storage = get_storage()
+    if not storage.serves_downloads:
+        raise HTTPException(404, "Not found")
+
+    try:
+        path, filename = storage.resolve_token(token)
+    except ValueError as e:  # InvalidToken, or a key outside the storage root
+        raise HTTPException(403, str(e))
+    if not os.path.isfile(path):
+        raise HTTPException(404, "File no longer available")
+
+    disposition = f'attachment; filename="{filename}"'
+    if STORAGE_ACCEL_REDIRECT_PREFIX:
+        # Let nginx serve the file with sendfile and Range support
+        internal = STORAGE_ACCEL_REDIRECT_PREFIX + os.path.relpath(path, storage.root)
+        return Response(
+            headers={"X-Accel-Redirect": internal, "Content-Disposition": disposition}
+        )
+    # FileResponse answers Range requests and uses zero-copy sendfile where
+    # the ASGI server supports it
+    return FileResponse(path, filename=filename)
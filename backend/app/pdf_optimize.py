@@ -0,0 +1,355 @@
+"""
+Post-conversion PDF size optimisation with pikepdf.
+
+LibreOffice embeds pictures at their original resolution, so photo-heavy
+decks produce PDFs far larger than anything a screen or printer needs.
+``optimize_pdf`` rewrites a converted PDF in place:
+
+- images displayed above ``target_dpi`` are downsampled to it and stored as
+  JPEG; the effective DPI comes from the size each image is drawn at, found
+  by following the transformation matrix through page and form content
+- identical images and embedded font files are stored once
+- content and object streams are (re)compressed on save
+- optionally, the file is linearised in the same save (see ``linearize_pdf``)
+
+It is CPU-bound and runs through ``process_pool.run_in_pool`` from
+``convert_task``. The original file is kept if the result is not smaller.
+"""
+
+import hashlib
+import io
+import math
+import os
+import time
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+TARGET_DPI = int(os.getenv("PDF_TARGET_DPI", 150))
+JPEG_QUALITY = int(os.getenv("PDF_JPEG_QUALITY", 80))
+# Skip images that would shrink by less than this; re-encoding them costs
+# quality for little gain
+MIN_SCALE_GAIN = 0.8
+FONT_FILE_KEYS = ("/FontFile", "/FontFile2", "/FontFile3")
+
+Matrix = Tuple[float, float, float, float, float, float]
+IDENTITY: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def _multiply(m: Matrix, n: Matrix) -> Matrix:
+    """``m`` followed by ``n`` (PDF row-vector convention)."""
+    return (
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    )
+
+
+def _fingerprint(obj: Any, depth: int = 0) -> Any:
+    """Hashable summary of a PDF object's content, ignoring object numbers."""
+    import pikepdf
+
+    if depth > 6:
+        return None
+    if isinstance(obj, pikepdf.Stream):
+        digest = hashlib.sha256(obj.read_raw_bytes()).hexdigest()
+        return ("stream", digest, _fingerprint(obj.stream_dict, depth + 1))
+    if isinstance(obj, pikepdf.Dictionary):
+        return tuple(
+            (key, _fingerprint(obj[key], depth + 1))
+            for key in sorted(obj.keys())
+            if key != "/Length"
+        )
+    if isinstance(obj, pikepdf.Array):
+        return tuple(_fingerprint(item, depth + 1) for item in obj)
+    return str(obj)
+
+
+def _replace_refs(obj: Any, mapping: Dict[Tuple[int, int], Any]) -> None:
+    """Point references to duplicate objects at their canonical copy."""
+    import pikepdf
+
+    if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)):
+        items: Iterable = [(key, obj[key]) for key in list(obj.keys())]
+    elif isinstance(obj, pikepdf.Array):
+        items = list(enumerate(obj))
+    else:
+        return
+    for key, value in items:
+        if not isinstance(value, pikepdf.Object):
+            continue
+        if value.is_indirect:
+            if value.objgen in mapping:
+                obj[key] = mapping[value.objgen]
+        else:
+            _replace_refs(value, mapping)
+
+
+def _deduplicate(pdf: Any) -> Tuple[int, int]:
+    """Merge identical image XObjects and font files; return both counts."""
+    import pikepdf
+
+    images: Dict[Any, Any] = {}
+    fonts: Dict[Any, Any] = {}
+    mapping: Dict[Tuple[int, int], Any] = {}
+    font_files = set()
+    for obj in pdf.objects:
+        if (
+            isinstance(obj, pikepdf.Dictionary)
+            and obj.get("/Type") == "/FontDescriptor"
+        ):
+            for key in FONT_FILE_KEYS:
+                if key in obj and obj[key].is_indirect:
+                    font_files.add(obj[key].objgen)
+
+    image_count = font_count = 0
+    for obj in pdf.objects:
+        if not isinstance(obj, pikepdf.Stream):
+            continue
+        if obj.get("/Subtype") == "/Image":
+            seen, is_font = images, False
+        elif obj.objgen in font_files:
+            seen, is_font = fonts, True
+        else:
+            continue
+        key = _fingerprint(obj)
+        if key in seen:
+            mapping[obj.objgen] = seen[key]
+            if is_font:
+                font_count += 1
+            else:
+                image_count += 1
+        else:
+            seen[key] = obj
+
+    if mapping:
+        for obj in pdf.objects:
+            _replace_refs(obj, mapping)
+    return image_count, font_count
+
+
+def _record_usage(
+    content: Any,
+    resources: Any,
+    ctm: Matrix,
+    usage: Dict[Tuple[int, int], Tuple[float, float]],
+    active_forms: set,
+) -> None:
+    """Track the largest size (in points) each image XObject is drawn at."""
+    import pikepdf
+
+    stack = []
+    xobjects = resources.get("/XObject", {}) if resources is not None else {}
+    for operands, operator in pikepdf.parse_content_stream(content):
+        op = str(operator)
+        if op == "q":
+            stack.append(ctm)
+        elif op == "Q":
+            ctm = stack.pop() if stack else ctm
+        elif op == "cm" and len(operands) == 6:
+            ctm = _multiply(tuple(float(v) for v in operands), ctm)  # type: ignore
+        elif op == "Do" and operands:
+            xobj = xobjects.get(str(operands[0]))
+            if not isinstance(xobj, pikepdf.Stream):
+                continue
+            if xobj.get("/Subtype") == "/Image":
+                width = math.hypot(ctm[0], ctm[1])
+                height = math.hypot(ctm[2], ctm[3])
+                prev_w, prev_h = usage.get(xobj.objgen, (0.0, 0.0))
+                usage[xobj.objgen] = (max(prev_w, width), max(prev_h, height))
+            elif xobj.get("/Subtype") == "/Form" and xobj.objgen not in active_forms:
+                matrix = tuple(float(v) for v in xobj.get("/Matrix", IDENTITY))
+                active_forms.add(xobj.objgen)
+                _record_usage(
+                    xobj,
+                    xobj.get("/Resources", resources),
+                    _multiply(matrix, ctm),  # type: ignore
+                    usage,
+                    active_forms,
+                )
+                active_forms.discard(xobj.objgen)
+
+
+def _is_resamplable(image: Any) -> bool:
+    """8-bit gray/RGB images without colour-key masks or decode arrays."""
+    import pikepdf
+
+    if image.get("/ImageMask", False) or "/Mask" in image or "/Decode" in image:
+        return False
+    if image.get("/BitsPerComponent") != 8:
+        return False
+    if image.get("/Filter") in ("/JPXDecode", "/JBIG2Decode"):
+        return False
+    colorspace = image.get("/ColorSpace")
+    if colorspace in ("/DeviceRGB", "/DeviceGray"):
+        return True
+    return (
+        isinstance(colorspace, pikepdf.Array)
+        and len(colorspace) == 2
+        and colorspace[0] == "/ICCBased"
+        and colorspace[1].get("/N") in (1, 3)
+    )
+
+
+def _resample(image: Any, scale: float, jpeg_quality: int) -> bool:
+    """Downsample ``image`` (and its soft mask) by ``scale`` if that saves bytes."""
+    import pikepdf
+    from PIL import Image
+
+    pil = pikepdf.PdfImage(image).as_pil_image()
+    if pil.mode not in ("RGB", "L"):
+        return False
+    size = (max(1, round(pil.width * scale)), max(1, round(pil.height * scale)))
+    buffer = io.BytesIO()
+    pil.resize(size, Image.LANCZOS).save(
+        buffer, "JPEG", quality=jpeg_quality, optimize=True
+    )
+    data = buffer.getvalue()
+    if len(data) >= len(image.read_raw_bytes()):
+        return False
+
+    image.write(data, filter=pikepdf.Name.DCTDecode)
+    if "/DecodeParms" in image:
+        del image.DecodeParms
+    image.Width, image.Height = size
+
+    smask = image.get("/SMask")
+    if isinstance(smask, pikepdf.Stream):
+        mask = pikepdf.PdfImage(smask).as_pil_image().convert("L")
+        mask = mask.resize(size, Image.LANCZOS)
+        smask.write(zlib.compress(mask.tobytes()), filter=pikepdf.Name.FlateDecode)
+        if "/DecodeParms" in smask:
+            del smask.DecodeParms
+        smask.Width, smask.Height = size
+        smask.BitsPerComponent = 8
+    return True
+
+
+def _page_resources(page: Any) -> Any:
+    """A page's /Resources, which may be inherited from the page tree."""
+    node = page.obj
+    while node is not None:
+        if "/Resources" in node:
+            return node.Resources
+        node = node.get("/Parent")
+    return None
+
+
+def _downsample(pdf: Any, target_dpi: int, jpeg_quality: int) -> int:
+    import pikepdf
+
+    usage: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    for page in pdf.pages:
+        _record_usage(page, _page_resources(page), IDENTITY, usage, set())
+
+    # Soft masks shared between images can't follow one image's new size
+    smask_users: Dict[Tuple[int, int], int] = {}
+    for objgen in usage:
+        smask = pdf.get_object(objgen).get("/SMask")
+        if isinstance(smask, pikepdf.Stream):
+            smask_users[smask.objgen] = smask_users.get(smask.objgen, 0) + 1
+
+    count = 0
+    for objgen, (width_pt, height_pt) in usage.items():
+        image = pdf.get_object(objgen)
+        if not _is_resamplable(image):
+            continue
+        smask = image.get("/SMask")
+        if isinstance(smask, pikepdf.Stream) and smask_users[smask.objgen] > 1:
+            continue
+        target_w = width_pt / 72 * target_dpi
+        target_h = height_pt / 72 * target_dpi
+        scale = max(target_w / int(image.Width), target_h / int(image.Height))
+        if scale > MIN_SCALE_GAIN:
+            continue
+        try:
+            if _resample(image, scale, jpeg_quality):
+                count += 1
+        except (pikepdf.PdfError, NotImplementedError, OSError, ValueError):
+            # Unsupported encodings are left as they are
+            continue
+    return count
+
+
+def optimize_pdf(
+    path: str,
+    target_dpi: Optional[int] = None,
+    jpeg_quality: Optional[int] = None,
+    linearize: bool = False,
+) -> Dict[str, Any]:
+    """
+    Optimise the PDF at ``path`` in place and return size statistics.
+
+    The file is only replaced if the optimised version is smaller, unless
+    ``linearize`` is set: linearisation happens in the same save, and a
+    linearised file is always kept.
+    """
+    import pikepdf
+
+    start = time.perf_counter()
+    target_dpi = target_dpi or TARGET_DPI
+    jpeg_quality = jpeg_quality or JPEG_QUALITY
+    before = os.path.getsize(path)
+    tmp_path = f"{path}.optimized"
+
+    try:
+        with pikepdf.open(path) as pdf:
+            images_deduplicated, fonts_deduplicated = _deduplicate(pdf)
+            images_downsampled = _downsample(pdf, target_dpi, jpeg_quality)
+            pdf.remove_unreferenced_resources()
+            pdf.save(
+                tmp_path,
+                compress_streams=True,
+                recompress_flate=True,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                linearize=linearize,
+            )
+        after = os.path.getsize(tmp_path)
+        if linearize or after < before:
+            os.replace(tmp_path, path)
+        else:
+            after = before
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "bytesBefore": before,
+        "bytesAfter": after,
+        "imagesDownsampled": images_downsampled,
+        "imagesDeduplicated": images_deduplicated,
+        "fontsDeduplicated": fonts_deduplicated,
+        "linearized": linearize,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def linearize_pdf(path: str) -> Dict[str, Any]:
+    """
+    Linearise ("fast web view") the PDF at ``path`` in place.
+
+    Objects needed for the first page move to the start of the file, behind
+    a hint table, so viewers fetching with Range requests can show page one
+    before the rest has arrived.
+    """
+    import pikepdf
+
+    start = time.perf_counter()
+    before = os.path.getsize(path)
+    tmp_path = f"{path}.linearized"
+    try:
+        with pikepdf.open(path) as pdf:
+            pdf.save(tmp_path, linearize=True)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "bytesBefore": before,
+        "bytesAfter": os.path.getsize(path),
+        "linearized": True,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
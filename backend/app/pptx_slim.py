@@ -0,0 +1,444 @@
+"""
+Pre-conversion PPTX slimming.
+
+LibreOffice decodes every embedded picture at full resolution and loads
+embedded media even though the PDF only shows a poster frame, so decks with
+camera photos and videos convert slowly. ``slim_pptx`` rewrites the package
+before it is sent to the converter:
+
+- JPEG/PNG pictures are downscaled to ``target_dpi`` at the size they are
+  displayed at on their slide (``a:xfrm`` extent, group scaling and cropping
+  taken into account); pictures also used as fills or from charts, notes and
+  other parts are left alone
+- embedded video and audio are dropped, keeping the picture's poster frame
+- slide layouts no slide uses are removed (each master keeps at least one)
+- optionally, only the first ``max_slides`` slides are kept (with their
+  notes and comments), which makes a small deck for quick previews
+
+Slide XML is read with ElementTree but edited with targeted regular
+expressions, so namespace prefixes referenced by ``mc:Ignorable`` survive.
+Untouched entries are streamed from the input ZIP to the output in chunks.
+It is CPU-bound and runs through ``process_pool.run_in_pool``.
+"""
+
+import io
+import os
+import posixpath
+import re
+import shutil
+import time
+import zipfile
+from typing import Dict, List, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+TARGET_DPI = int(os.getenv("PDF_TARGET_DPI", 150))
+JPEG_QUALITY = int(os.getenv("PPTX_SLIM_JPEG_QUALITY", 85))
+# Skip pictures that would shrink by less than this
+MIN_SCALE_GAIN = 0.8
+EMU_PER_INCH = 914400
+# EXIF tag holding how the stored pixels are to be rotated for display
+EXIF_ORIENTATION = 0x0112
+COPY_CHUNK = 1024 * 1024
+
+P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+REL_IMAGE = "/image"
+REL_LAYOUT = "/slideLayout"
+# Parts that belong to a single slide and go with it when it is dropped
+SLIDE_OWNED_SUFFIXES = ("/notesSlide", "/comments")
+MEDIA_REL_SUFFIXES = ("/video", "/audio", "/media")
+# p14:media extension holding an embedded media reference
+P14_MEDIA_EXT = "{DAA4B4D4-6D71-4841-9C94-3DA282D05D27}"
+
+PRESENTATION_PART = "ppt/presentation.xml"
+SLIDE_PART = re.compile(r"ppt/slides/slide\d+\.xml$")
+LAYOUT_PART = re.compile(r"ppt/slideLayouts/slideLayout\d+\.xml$")
+MASTER_PART = re.compile(r"ppt/slideMasters/slideMaster\d+\.xml$")
+
+# rId -> (type, absolute target, external)
+Rels = Dict[str, Tuple[str, str, bool]]
+
+
+def rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _source_part(rels_name: str) -> str:
+    directory, name = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(directory), name[: -len(".rels")])
+
+
+def _parse_rels(part: str, data: bytes) -> Rels:
+    rels: Rels = {}
+    for rel in ElementTree.fromstring(data).iter(f"{RELS_NS}Relationship"):
+        target = rel.get("Target", "")
+        external = rel.get("TargetMode") == "External"
+        if not external:
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(
+                    posixpath.join(posixpath.dirname(part), target)
+                )
+        rels[rel.get("Id", "")] = (rel.get("Type", ""), target, external)
+    return rels
+
+
+def _is_slide_like(part: str) -> bool:
+    return bool(
+        SLIDE_PART.match(part) or LAYOUT_PART.match(part) or MASTER_PART.match(part)
+    )
+
+
+def _remove_relationships(data: bytes, ids: Set[str]) -> bytes:
+    for rid in ids:
+        data = re.sub(
+            rb'<Relationship\b[^>]*\bId="' + re.escape(rid.encode()) + rb'"[^>]*/>',
+            b"",
+            data,
+        )
+    return data
+
+
+def _pictures(part_xml: bytes) -> Tuple[Dict[str, Tuple[float, float]], Set[str]]:
+    """
+    Largest uncropped display size (EMU) per picture rId in a slide part, and
+    the rIds also referenced some other way (fills, placeholders without
+    their own extent, ...), whose display size is unknown.
+    """
+    sizes: Dict[str, Tuple[float, float]] = {}
+    sized_refs: Dict[str, int] = {}
+
+    def walk(element: ElementTree.Element, sx: float, sy: float) -> None:
+        for child in element:
+            if child.tag == f"{P_NS}pic":
+                blip = child.find(f"{P_NS}blipFill/{A_NS}blip")
+                ext = child.find(f"{P_NS}spPr/{A_NS}xfrm/{A_NS}ext")
+                if blip is None or ext is None:
+                    continue
+                crop = child.find(f"{P_NS}blipFill/{A_NS}srcRect")
+                visible_w = visible_h = 1.0
+                if crop is not None:
+                    edges = {k: max(0, int(crop.get(k, 0))) for k in "ltrb"}
+                    visible_w = max(0.01, 1 - (edges["l"] + edges["r"]) / 100000)
+                    visible_h = max(0.01, 1 - (edges["t"] + edges["b"]) / 100000)
+                rid = blip.get(f"{R_NS}embed", "")
+                width = int(ext.get("cx", 0)) * sx / visible_w
+                height = int(ext.get("cy", 0)) * sy / visible_h
+                w, h = sizes.get(rid, (0.0, 0.0))
+                sizes[rid] = (max(w, width), max(h, height))
+                sized_refs[rid] = sized_refs.get(rid, 0) + 1
+            elif child.tag == f"{P_NS}grpSp":
+                xfrm = child.find(f"{P_NS}grpSpPr/{A_NS}xfrm")
+                gx, gy = sx, sy
+                if xfrm is not None:
+                    ext = xfrm.find(f"{A_NS}ext")
+                    ch_ext = xfrm.find(f"{A_NS}chExt")
+                    if ext is not None and ch_ext is not None:
+                        gx *= int(ext.get("cx", 0)) / max(1, int(ch_ext.get("cx", 1)))
+                        gy *= int(ext.get("cy", 0)) / max(1, int(ch_ext.get("cy", 1)))
+                walk(child, gx, gy)
+            else:
+                walk(child, sx, sy)
+
+    root = ElementTree.fromstring(part_xml)
+    walk(root, 1.0, 1.0)
+
+    all_refs: Dict[str, int] = {}
+    for element in root.iter():
+        for name, value in element.attrib.items():
+            if name.startswith(R_NS):
+                all_refs[value] = all_refs.get(value, 0) + 1
+    unknown = {rid for rid, n in all_refs.items() if n > sized_refs.get(rid, 0)}
+    return sizes, unknown
+
+
+def _strip_media(data: bytes, ids: Set[str]) -> bytes:
+    """Drop references to embedded media, leaving the poster picture."""
+    for rid in ids:
+        ref = re.escape(rid.encode())
+        data = re.sub(
+            rb'<a:(?:videoFile|audioFile|quickTimeFile)\b[^>]*r:(?:link|embed)="'
+            + ref
+            + rb'"[^>]*/>',
+            b"",
+            data,
+        )
+        data = re.sub(
+            rb'<p:ext uri="' + re.escape(P14_MEDIA_EXT.encode()) + rb'">'
+            rb'(?:(?!</p:ext>).)*?r:(?:link|embed)="' + ref + rb'".*?</p:ext>',
+            b"",
+            data,
+            flags=re.DOTALL,
+        )
+    data = re.sub(rb"<p:extLst>\s*</p:extLst>", b"", data)
+    # Playback timing is meaningless in a PDF and would point at dropped media
+    return re.sub(rb"<p:timing>.*?</p:timing>", b"", data, flags=re.DOTALL)
+
+
+def _downscale(data: bytes, width_emu: float, height_emu: float, dpi: int) -> bytes:
+    """Return ``data`` resized to ``dpi`` at the given size, or b"" if not worth it."""
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in ("JPEG", "PNG"):
+            return b""
+        target_w = width_emu / EMU_PER_INCH * dpi
+        target_h = height_emu / EMU_PER_INCH * dpi
+        # The EXIF block is kept as is, so the picture is shown exactly as
+        # before; for a quarter turn the stored pixels are the other way round
+        exif = image.info.get("exif")
+        if image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+            target_w, target_h = target_h, target_w
+        scale = max(target_w / image.width, target_h / image.height)
+        if scale > MIN_SCALE_GAIN:
+            return b""
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        fmt, info = image.format, image.info
+        if fmt == "JPEG":
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale where that still
+            # leaves enough pixels; much faster than a full decode
+            image.draft(image.mode, size)
+        resized = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return b""
+
+    out = io.BytesIO()
+    options = {"icc_profile": info["icc_profile"]} if "icc_profile" in info else {}
+    if exif:
+        options["exif"] = exif
+    if fmt == "JPEG":
+        resized.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, **options)
+    else:
+        resized.save(out, "PNG", optimize=True, **options)
+    return out.getvalue() if out.tell() < len(data) else b""
+
+
+def _drop_slides(
+    zin: zipfile.ZipFile,
+    rels: Dict[str, Rels],
+    edits: Dict[str, bytes],
+    max_slides: int,
+) -> Set[str]:
+    """Remove slides past ``max_slides`` from the presentation; return dropped parts."""
+    presentation = zin.read(PRESENTATION_PART)
+    slide_list = ElementTree.fromstring(presentation).find(f"{P_NS}sldIdLst")
+    if slide_list is None:
+        return set()
+    ids = [s.get(f"{R_NS}id", "") for s in slide_list.iter(f"{P_NS}sldId")]
+    dropped_ids = set(ids[max(0, max_slides) :])
+    if not dropped_ids:
+        return set()
+
+    for rid in dropped_ids:
+        presentation = re.sub(
+            rb'<p:sldId\b[^>]*r:id="' + re.escape(rid.encode()) + rb'"[^>]*/>',
+            b"",
+            presentation,
+        )
+    # Custom shows list slides by relationship id
+    presentation = re.sub(
+        rb"<p:custShowLst>.*?</p:custShowLst>", b"", presentation, flags=re.DOTALL
+    )
+    edits[PRESENTATION_PART] = presentation
+    edits[rels_path(PRESENTATION_PART)] = _remove_relationships(
+        zin.read(rels_path(PRESENTATION_PART)), dropped_ids
+    )
+
+    dropped: Set[str] = set()
+    for rid in dropped_ids:
+        slide = rels[PRESENTATION_PART].pop(rid)[1]
+        owned = [
+            target
+            for kind, target, external in rels.get(slide, {}).values()
+            if kind.endswith(SLIDE_OWNED_SUFFIXES) and not external
+        ]
+        for part in [slide, *owned]:
+            rels.pop(part, None)
+            dropped.update({part, rels_path(part)})
+    return dropped
+
+
+def _remove_overrides(types: bytes, parts: Set[str]) -> bytes:
+    for part in parts:
+        types = re.sub(
+            rb'<Override\b[^>]*PartName="/' + re.escape(part.encode()) + rb'"[^>]*/>',
+            b"",
+            types,
+        )
+    return types
+
+
+def _unused_layouts(names: List[str], rels: Dict[str, Rels]) -> Set[str]:
+    used = {
+        target
+        for part, part_rels in rels.items()
+        if SLIDE_PART.match(part)
+        for kind, target, _ in part_rels.values()
+        if kind.endswith(REL_LAYOUT)
+    }
+    unused = set()
+    for part, part_rels in rels.items():
+        if not MASTER_PART.match(part):
+            continue
+        layouts = [t for kind, t, _ in part_rels.values() if kind.endswith(REL_LAYOUT)]
+        drop = [t for t in layouts if t not in used and t in names]
+        if len(drop) == len(layouts):
+            drop = drop[1:]  # a master needs at least one layout
+        unused.update(drop)
+    return unused
+
+
+def slim_pptx(
+    src: str,
+    dst: str,
+    target_dpi: Optional[int] = None,
+    max_slides: Optional[int] = None,
+) -> dict:
+    """Write a slimmed copy of the deck at ``src`` to ``dst``; return statistics."""
+    start = time.perf_counter()
+    target_dpi = target_dpi or TARGET_DPI
+
+    with zipfile.ZipFile(src) as zin:
+        names = zin.namelist()
+        rels: Dict[str, Rels] = {
+            _source_part(n): _parse_rels(_source_part(n), zin.read(n))
+            for n in names
+            if n.endswith(".rels")
+        }
+        edits: Dict[str, bytes] = {}
+        removed: Set[str] = set()
+
+        # Slides past max_slides; dropping them first lets the steps below
+        # also remove the layouts and media only those slides used
+        slides: Set[str] = set()
+        if max_slides is not None:
+            slides = {
+                part
+                for part in _drop_slides(zin, rels, edits, max_slides)
+                if part in names
+            }
+            removed.update(slides)
+
+        # Unused layouts, and their entries in the masters
+        layouts = _unused_layouts(names, rels)
+        for layout in layouts:
+            removed.update({layout, rels_path(layout)})
+            rels.pop(layout, None)
+        for part, part_rels in rels.items():
+            ids = {rid for rid, (_, t, _) in part_rels.items() if t in layouts}
+            if not ids:
+                continue
+            xml = zin.read(part)
+            for rid in ids:
+                xml = re.sub(
+                    rb'<p:sldLayoutId\b[^>]*r:id="'
+                    + re.escape(rid.encode())
+                    + rb'"[^>]*/>',
+                    b"",
+                    xml,
+                )
+                del part_rels[rid]
+            edits[part] = xml
+            edits[rels_path(part)] = _remove_relationships(
+                zin.read(rels_path(part)), ids
+            )
+
+        # Embedded video/audio on slides, layouts and masters
+        media_removed = 0
+        for part, part_rels in rels.items():
+            if not _is_slide_like(part):
+                continue
+            ids = {
+                rid
+                for rid, (kind, _, _) in part_rels.items()
+                if kind.endswith(MEDIA_REL_SUFFIXES)
+            }
+            if not ids:
+                continue
+            edits[part] = _strip_media(edits.get(part, zin.read(part)), ids)
+            edits[rels_path(part)] = _remove_relationships(
+                edits.get(rels_path(part), zin.read(rels_path(part))), ids
+            )
+            for rid in ids:
+                del part_rels[rid]
+            media_removed += len(ids)
+
+        # Display size of every picture; None where a picture is used
+        # somewhere its size can't be determined
+        display: Dict[str, Optional[Tuple[float, float]]] = {}
+        for part, part_rels in rels.items():
+            images = {
+                rid: target
+                for rid, (kind, target, external) in part_rels.items()
+                if kind.endswith(REL_IMAGE) and not external
+            }
+            if not images:
+                continue
+            sized: Dict[str, Tuple[float, float]] = {}
+            unknown: Set[str] = set()
+            if _is_slide_like(part):
+                sized, unknown = _pictures(edits.get(part, zin.read(part)))
+            for rid, target in images.items():
+                size = None if rid in unknown else sized.get(rid)
+                previous = display.get(target, (0.0, 0.0))
+                if size is None or previous is None:
+                    display[target] = None
+                else:
+                    display[target] = (
+                        max(previous[0], size[0]),
+                        max(previous[1], size[1]),
+                    )
+
+        # Media nothing points at any more
+        referenced = {
+            t for part_rels in rels.values() for _, t, _ in part_rels.values()
+        }
+        for name in names:
+            if name.startswith("ppt/media/") and name not in referenced:
+                removed.add(name)
+
+        if layouts or slides:
+            edits["[Content_Types].xml"] = _remove_overrides(
+                zin.read("[Content_Types].xml"), layouts | slides
+            )
+
+        images_downscaled = 0
+        with zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename in removed:
+                    continue
+                out_info = zipfile.ZipInfo(info.filename, info.date_time)
+                out_info.compress_type = info.compress_type
+                data = edits.get(info.filename)
+                size = display.get(info.filename)
+                if data is None and size and size[0] and size[1]:
+                    resized = _downscale(zin.read(info), size[0], size[1], target_dpi)
+                    if resized:
+                        data = resized
+                        images_downscaled += 1
+                if data is not None:
+                    zout.writestr(out_info, data)
+                    continue
+                with (
+                    zin.open(info) as source,
+                    zout.open(
+                        out_info, "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT
+                    ) as target,
+                ):
+                    shutil.copyfileobj(source, target, COPY_CHUNK)
+
+    return {
+        "bytesBefore": os.path.getsize(src),
+        "bytesAfter": os.path.getsize(dst),
+        "imagesDownscaled": images_downscaled,
+        "mediaRemoved": media_removed,
+        "layoutsRemoved": len(layouts),
+        "slidesRemoved": sum(1 for part in slides if SLIDE_PART.match(part)),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,139 @@
+"""
+Cheap pre-flight validation of uploaded PPTX files.
+
+Only the ZIP central directory and ``[Content_Types].xml`` are read, so the
+check costs milliseconds even for very large decks and never decompresses
+slide content or media. It rejects:
+
+- files that are not ZIP archives (corrupt uploads, renamed binaries and
+  password-protected decks, which are OLE containers)
+- ZIP archives that are not PowerPoint presentations (e.g. renamed .docx)
+- ZIP bombs, by capping entry count, total uncompressed size and the
+  compression ratio of large entries
+- encrypted ZIP entries
+
+and reports slide count and media totals for routing.
+"""
+
+import os
+import zipfile
+import zlib
+from dataclasses import asdict, dataclass
+from typing import IO
+from xml.etree import ElementTree
+
+MAX_UNCOMPRESSED_BYTES = int(os.getenv("PREFLIGHT_MAX_UNCOMPRESSED_MB", 2048)) * (
+    1024 * 1024
+)
+MAX_COMPRESSION_RATIO = float(os.getenv("PREFLIGHT_MAX_COMPRESSION_RATIO", 100))
+MAX_ENTRIES = int(os.getenv("PREFLIGHT_MAX_ENTRIES", 10000))
+# Entries smaller than this are ignored by the ratio check: XML parts
+# legitimately compress far better than 100:1
+RATIO_CHECK_MIN_BYTES = 1024 * 1024
+MAX_CONTENT_TYPES_BYTES = 1024 * 1024
+
+CONTENT_TYPES = "[Content_Types].xml"
+CT_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+PRESENTATION_TYPES = {
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml",
+    "application/vnd.openxmlformats-officedocument.presentationml.slideshow.main+xml",
+    "application/vnd.openxmlformats-officedocument.presentationml.template.main+xml",
+    "application/vnd.ms-powerpoint.presentation.macroEnabled.main+xml",
+    "application/vnd.ms-powerpoint.slideshow.macroEnabled.main+xml",
+}
+SLIDE_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+MEDIA_PREFIX = "ppt/media/"
+
+
+class PreflightError(ValueError):
+    """The upload is not an acceptable PPTX file; the message is user-facing."""
+
+
+@dataclass
+class DeckReport:
+    """Summary of a deck taken from its ZIP directory and content types."""
+
+    slides: int
+    file_bytes: int
+    media_files: int
+    media_bytes: int
+    uncompressed_bytes: int
+    compressed_bytes: int
+    entries: int
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _read_content_types(archive: zipfile.ZipFile) -> ElementTree.Element:
+    try:
+        info = archive.getinfo(CONTENT_TYPES)
+    except KeyError:
+        raise PreflightError("Not a PowerPoint file: missing content types") from None
+    if info.file_size > MAX_CONTENT_TYPES_BYTES:
+        raise PreflightError("Not a PowerPoint file: content types too large")
+
+    try:
+        data = archive.read(info)
+    except (zipfile.BadZipFile, zlib.error, NotImplementedError, EOFError, OSError):
+        raise PreflightError("File is not a valid .pptx archive") from None
+    # Content types never declare a DTD; refusing one rules out entity expansion
+    if b"<!DOCTYPE" in data or b"<!ENTITY" in data:
+        raise PreflightError("Not a PowerPoint file: invalid content types")
+    try:
+        return ElementTree.fromstring(data)
+    except ElementTree.ParseError:
+        raise PreflightError("Not a PowerPoint file: invalid content types") from None
+
+
+def inspect_pptx(fileobj: IO[bytes]) -> DeckReport:
+    """
+    Validate a PPTX upload and summarise it.
+
+    ``fileobj`` must be seekable. Raises ``PreflightError`` if the file should
+    not be converted.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except (zipfile.BadZipFile, OSError, EOFError):
+        raise PreflightError("File is not a valid .pptx archive") from None
+
+    with archive:
+        infos = archive.infolist()
+        if len(infos) > MAX_ENTRIES:
+            raise PreflightError("Archive contains too many files")
+
+        uncompressed = compressed = media_files = media_bytes = 0
+        for info in infos:
+            if info.flag_bits & 0x1:
+                raise PreflightError("Encrypted archives are not supported")
+            if (
+                info.file_size >= RATIO_CHECK_MIN_BYTES
+                and info.file_size > info.compress_size * MAX_COMPRESSION_RATIO
+            ):
+                raise PreflightError("Archive compression ratio is suspiciously high")
+            uncompressed += info.file_size
+            compressed += info.compress_size
+            if info.filename.startswith(MEDIA_PREFIX) and not info.is_dir():
+                media_files += 1
+                media_bytes += info.file_size
+
+        if uncompressed > MAX_UNCOMPRESSED_BYTES:
+            raise PreflightError("Presentation is too large once uncompressed")
+
+        types = _read_content_types(archive)
+
+    overrides = [o.get("ContentType", "") for o in types.iter(f"{CT_NS}Override")]
+    if not PRESENTATION_TYPES.intersection(overrides):
+        raise PreflightError("Not a PowerPoint file: no presentation part")
+
+    fileobj.seek(0, os.SEEK_END)
+    return DeckReport(
+        slides=sum(1 for content_type in overrides if content_type == SLIDE_TYPE),
+        file_bytes=fileobj.tell(),
+        media_files=media_files,
+        media_bytes=media_bytes,
+        uncompressed_bytes=uncompressed,
+        compressed_bytes=compressed,
+        entries=len(infos),
+    )
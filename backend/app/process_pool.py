@@ -0,0 +1,255 @@
+"""
+Per-worker process pool for CPU-bound work (PDF optimisation, PPTX slimming,
+slide rendering).
+
+Work submitted through ``run_in_pool`` runs in separate interpreter
+processes, so image resampling and stream recompression neither hold the
+worker's GIL nor grow the worker's own heap. The pool is created lazily, once
+per worker process (pid-checked like the S3 client in storage.py).
+
+Pool processes are fresh interpreters started with ``subprocess`` rather than
+``multiprocessing``: Celery's prefork children are daemonic, and
+multiprocessing (and billiard) refuse to start children from a daemonic
+process, whereas a plain subprocess is allowed. A fresh interpreter also
+avoids forking a worker that already runs boto3 threads. Each call and its
+result are pickled over the process' stdin and stdout; a pool process exits
+when its worker closes the pipe, including when the worker itself exits, so
+Celery's per-child recycling takes the pool with it. ``CPU_POOL_WORKERS=0``
+runs work inline instead.
+
+``imap_in_pool`` fans many calls out over the pool while keeping only a
+bounded number in flight, so a caller consuming results one by one (e.g.
+uploading rendered slides) holds a fixed amount of work however many calls
+there are.
+"""
+
+import os
+import pickle
+import queue
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, Set, Tuple
+
+POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", 1))
+
+_HEADER = struct.Struct("!Q")
+
+
+class RemoteTraceback(Exception):
+    """Traceback of an exception raised in a pool process."""
+
+    def __str__(self) -> str:
+        return self.args[0]
+
+
+def _send(stream: IO[bytes], data: bytes) -> None:
+    stream.write(_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _receive(stream: IO[bytes]) -> bytes:
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise EOFError("pool process pipe closed")
+    (size,) = _HEADER.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("pool process pipe closed")
+    return data
+
+
+class PoolProcess:
+    """One pool interpreter, running one call at a time."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        # Same import path as the worker, so pickled functions resolve
+        _send(self.proc.stdin, pickle.dumps(sys.path))
+
+    def call(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        # Pickled up front so an unpicklable argument can't leave half a
+        # message in the pipe
+        request = pickle.dumps((fn, args, kwargs), pickle.HIGHEST_PROTOCOL)
+        try:
+            _send(self.proc.stdin, request)
+            ok, value, remote_tb = pickle.loads(_receive(self.proc.stdout))
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            self.stop()
+            raise BrokenProcessPool(
+                f"A pool process exited abruptly (exit code {self.proc.returncode})"
+            ) from e
+        if not ok:
+            value.__cause__ = RemoteTraceback(remote_tb)
+            raise value
+        return value
+
+    def is_alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def stop(self) -> None:
+        # Closing stdin ends the serve loop once the current call is done
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc.stdout.close()
+
+
+class SubprocessPool:
+    """
+    Executor running calls on ``workers`` ``PoolProcess`` instances.
+
+    Each submitted call is handed to a thread that checks a pool process out,
+    so at most ``workers`` calls run at once. Processes are started on first
+    use and replaced when one dies.
+    """
+
+    def __init__(self, workers: int):
+        self._threads = ThreadPoolExecutor(workers, thread_name_prefix="cpu-pool")
+        self._idle: "queue.Queue[Optional[PoolProcess]]" = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(None)
+        self._closed = False
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        return self._threads.submit(self._call, fn, args, kwargs)
+
+    def _call(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        process = self._idle.get()
+        try:
+            if process is None or not process.is_alive():
+                process = PoolProcess()
+            return process.call(fn, args, kwargs)
+        except BrokenProcessPool:
+            process = None
+            raise
+        finally:
+            if self._closed and process is not None:
+                process.stop()
+            else:
+                self._idle.put(process)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        self._closed = True
+        self._threads.shutdown(wait=wait, cancel_futures=cancel_futures)
+        # Calls still running stop their process when they finish
+        while True:
+            try:
+                process = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if process is not None:
+                process.stop()
+
+
+_lock = threading.Lock()
+_executor: Optional[SubprocessPool] = None
+_executor_pid: Optional[int] = None
+
+
+def get_executor() -> SubprocessPool:
+    """Return this process' pool, creating it on first use."""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    with _lock:
+        if _executor is None or _executor_pid != pid:
+            _executor = SubprocessPool(max(1, POOL_WORKERS))
+            _executor_pid = pid
+        return _executor
+
+
+def run_in_pool(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run ``fn(*args, **kwargs)`` in the pool and return its result."""
+    if POOL_WORKERS <= 0:
+        return fn(*args, **kwargs)
+    return get_executor().submit(fn, *args, **kwargs).result()
+
+
+def imap_in_pool(
+    fn: Callable[..., Any],
+    calls: Iterable[Tuple[Any, ...]],
+    max_in_flight: Optional[int] = None,
+) -> Iterator[Any]:
+    """
+    Yield ``fn(*args)`` for each ``args`` in ``calls``, in completion order.
+
+    At most ``max_in_flight`` calls (default: twice the pool size) are
+    submitted at a time; more are only submitted as results are consumed.
+    """
+    if POOL_WORKERS <= 0:
+        for args in calls:
+            yield fn(*args)
+        return
+
+    limit = max(1, max_in_flight or 2 * POOL_WORKERS)
+    executor = get_executor()
+    pending: Set[Future] = set()
+    try:
+        for args in calls:
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(fn, *args))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # The caller stopped early or a call failed; drop queued work
+        for future in pending:
+            future.cancel()
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _serve() -> None:
+    """Pool process loop: run calls read from stdin until it is closed."""
+    # Shares the worker's process group: let the worker decide when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Calls may print; keep stdout for results and send their output to stderr
+    results = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    requests = sys.stdin.buffer
+    try:
+        sys.path[:] = pickle.loads(_receive(requests))
+        while True:
+            request = _receive(requests)
+            try:
+                fn, args, kwargs = pickle.loads(request)
+                reply = (True, fn(*args, **kwargs), None)
+            except Exception as e:
+                reply = (False, e, traceback.format_exc())
+            try:
+                data = pickle.dumps(reply, pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                error = RuntimeError(f"Unpicklable pool result: {e!r}")
+                data = pickle.dumps((False, error, reply[2]))
+            _send(results, data)
+    except (EOFError, BrokenPipeError):
+        pass
+
+
+if __name__ == "__main__":
+    _serve()
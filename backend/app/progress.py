@@ -0,0 +1,105 @@
+"""
+Throttled progress reporting for Celery tasks.
+
+``convert_task`` moves through a fixed set of stages; each stage owns a slice
+of the 0-100 range and reports fractional progress inside it (bytes
+transferred, chunks converted). Writes go to the result backend via
+``update_state`` with state ``PROGRESS``, but at most once every
+``PROGRESS_MIN_INTERVAL`` seconds unless the stage changes, so byte-level
+callbacks don't turn into a stream of Redis writes.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+PROGRESS_STATE = "PROGRESS"
+MIN_INTERVAL = float(os.getenv("PROGRESS_MIN_INTERVAL", 1.0))
+
+# stage -> (start %, end %)
+STAGES: Dict[str, tuple] = {
+    "downloading": (0, 15),
+    "converting": (15, 75),
+    "optimizing": (75, 85),
+    "uploading": (85, 99),
+    # Image output renders and uploads slides in place of optimizing/uploading
+    "rasterizing": (75, 99),
+    "finalizing": (99, 100),
+}
+
+
+class ProgressReporter:
+    """
+    Report a task's stage and percentage to the result backend.
+
+    Safe to call from boto3 transfer callbacks, which run on several threads.
+    A no-op when the task is called directly rather than through a worker.
+    """
+
+    def __init__(self, task: Any, min_interval: float = MIN_INTERVAL):
+        self.task = task
+        self.min_interval = min_interval
+        # Captured here: task.request is thread-local, so transfer callback
+        # threads would see no task id
+        self.task_id = getattr(task.request, "id", None)
+        self.enabled = bool(self.task_id)
+        self.meta: Dict[str, Any] = {}
+        self.writes = 0
+        self._stage = ""
+        self._done = 0
+        self._total: Optional[int] = None
+        self._last_write = 0.0
+        self._last_percent = -1
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, total: Optional[int] = None, **extra: Any) -> None:
+        """Enter a new stage; always written immediately."""
+        with self._lock:
+            self._stage = name
+            self._done = 0
+            self._total = total
+            self.meta = {"stage": name}
+            if total is not None:
+                self.meta.update(bytesDone=0, bytesTotal=total)
+            self.meta.update(extra)
+            self._write(force=True)
+
+    def advance(self, amount: int) -> None:
+        """Add ``amount`` bytes to the current stage (boto3 ``Callback``)."""
+        with self._lock:
+            self._done += amount
+            self.meta["bytesDone"] = self._done
+            self._write()
+
+    def chunk(self, done: int, total: int) -> None:
+        """Report chunk progress within the current stage."""
+        with self._lock:
+            self._done, self._total = done, total
+            self.meta.update(chunk=done, chunks=total)
+            self._write()
+
+    def percent(self) -> int:
+        start, end = STAGES.get(self._stage, (0, 100))
+        fraction = 0.0
+        if self._total:
+            fraction = min(1.0, self._done / self._total)
+        return int(start + (end - start) * fraction)
+
+    def _write(self, force: bool = False) -> None:
+        percent = self.percent()
+        self.meta["progress"] = percent
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        if not force and (
+            percent == self._last_percent or now - self._last_write < self.min_interval
+        ):
+            return
+        self.task.update_state(
+            task_id=self.task_id, state=PROGRESS_STATE, meta=dict(self.meta)
+        )
+        self._last_write = now
+        self._last_percent = percent
+        self.writes += 1
@@ -0,0 +1,82 @@
+"""
+Per-slide PNG/WebP rendering of converted PDFs with pypdfium2.
+
+``rasterize_pdf`` renders every page of a PDF to its own image file. Pages
+are rendered in parallel through ``process_pool.imap_in_pool``: each call
+opens the PDF in a pool process, renders one page at ``dpi`` and writes the
+image to disk, so only the pages in flight are ever held in memory. Results
+come back as soon as each page is done, for the caller to upload and delete.
+"""
+
+import os
+from typing import Any, Dict, Iterator, Optional
+
+from process_pool import imap_in_pool
+
+IMAGE_FORMATS = ("png", "webp")
+RASTER_DPI = int(os.getenv("RASTER_DPI", 110))
+WEBP_QUALITY = int(os.getenv("RASTER_WEBP_QUALITY", 80))
+# Pages rendered or waiting to be collected at once; 0 means twice the pool
+MAX_IN_FLIGHT = int(os.getenv("RASTER_MAX_IN_FLIGHT", 0))
+
+
+def page_count(pdf_path: str) -> int:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def render_page(
+    pdf_path: str, index: int, out_path: str, dpi: int, fmt: str
+) -> Dict[str, Any]:
+    """Render page ``index`` (0-based) of ``pdf_path`` to ``out_path``."""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[index]
+        try:
+            image = page.render(scale=dpi / 72).to_pil()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+    if fmt == "webp":
+        image.save(out_path, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(out_path, "PNG", compress_level=6)
+    return {
+        "slide": index + 1,
+        "path": out_path,
+        "width": image.width,
+        "height": image.height,
+    }
+
+
+def rasterize_pdf(
+    pdf_path: str,
+    out_dir: str,
+    fmt: str,
+    dpi: Optional[int] = None,
+    pages: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Render each page of ``pdf_path`` into ``out_dir`` as ``slide-NNNN.<fmt>``.
+
+    Yields ``render_page`` results in completion order, not page order.
+    """
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {fmt!r}")
+    dpi = dpi or RASTER_DPI
+    if pages is None:
+        pages = page_count(pdf_path)
+    calls = (
+        (pdf_path, i, os.path.join(out_dir, f"slide-{i + 1:04d}.{fmt}"), dpi, fmt)
+        for i in range(pages)
+    )
+    return imap_in_pool(render_page, calls, MAX_IN_FLIGHT or None)
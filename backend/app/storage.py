@@ -0,0 +1,313 @@
+"""
+Storage for uploaded decks and conversion results.
+
+``main.py`` and ``tasks.py`` go through the ``Storage`` interface returned by
+``get_storage()``; ``STORAGE_BACKEND`` selects the implementation:
+
+- ``s3`` (default): objects in ``AWS_S3_BUCKET``, downloaded via presigned URLs
+- ``filesystem``: files under ``STORAGE_ROOT`` on a volume shared by the API
+  and the workers, downloaded through the API's signed ``/download/{token}``
+  endpoint. Meant for on-prem and edge deployments without S3.
+
+The S3 client is created lazily, once per process: boto3 clients are not
+fork-safe, so a Celery prefork child that inherits a parent's client gets its
+own on first use. It is tuned for this workload:
+
+- ``S3_MAX_POOL_CONNECTIONS`` connections (boto3 default is 10), enough for
+  concurrent API requests plus multipart transfer threads
+- adaptive retry mode, which adds client-side rate limiting on throttling
+  errors on top of standard retries
+- a ``TransferConfig`` with larger parts and more threads for
+  ``download_file``/``upload_file`` of large decks and PDFs
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+REGION = os.getenv("AWS_REGION", "us-east-1")
+MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 50))
+MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", 10))
+MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", 16))
+MULTIPART_CHUNKSIZE_MB = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", 16))
+MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", 16))
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "/data/storage")
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "http://localhost:8000")
+# When set (e.g. "/protected/"), /download answers with X-Accel-Redirect so
+# nginx serves the file itself with sendfile and Range support
+STORAGE_ACCEL_REDIRECT_PREFIX = os.getenv("STORAGE_ACCEL_REDIRECT_PREFIX", "")
+
+COPY_CHUNK = 1024 * 1024
+
+ProgressCallback = Optional[Callable[[int], None]]
+
+_lock = threading.Lock()
+_client: Any = None
+_client_pid: Optional[int] = None
+_transfer_config: Any = None
+_storage: Optional["Storage"] = None
+
+
+def get_s3_client() -> Any:
+    """Return this process' S3 client, creating it on first use."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != pid:
+            import boto3
+            from botocore.config import Config
+
+            _client = boto3.client(
+                "s3",
+                region_name=REGION,
+                config=Config(
+                    max_pool_connections=MAX_POOL_CONNECTIONS,
+                    retries={"mode": "adaptive", "max_attempts": MAX_ATTEMPTS},
+                    tcp_keepalive=True,
+                ),
+            )
+            _client_pid = pid
+    return _client
+
+
+def get_transfer_config() -> Any:
+    """``TransferConfig`` for ``download_file``/``upload_file``."""
+    global _transfer_config
+    if _transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
+
+        mb = 1024 * 1024
+        _transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD_MB * mb,
+            multipart_chunksize=MULTIPART_CHUNKSIZE_MB * mb,
+            # Leave pool headroom for non-transfer calls made meanwhile
+            max_concurrency=min(MAX_CONCURRENCY, MAX_POOL_CONNECTIONS - 1),
+            use_threads=True,
+        )
+    return _transfer_config
+
+
+class InvalidToken(ValueError):
+    """A download token is malformed, tampered with or expired."""
+
+
+class Storage(ABC):
+    """Where uploaded decks and conversion results are kept."""
+
+    # True when url_for() links point at the API's /download endpoint
+    serves_downloads = False
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``."""
+
+    @abstractmethod
+    def download(self, key: str, path: str, callback: ProgressCallback = None) -> None:
+        """Copy ``key`` to the local file ``path``."""
+
+    @abstractmethod
+    def upload(self, path: str, key: str, callback: ProgressCallback = None) -> None:
+        """Store the local file ``path`` under ``key``."""
+
+    @abstractmethod
+    def url_for(self, key: str, filename: str, expires: int = 3600) -> str:
+        """Time-limited URL downloading ``key`` as attachment ``filename``."""
+
+    @abstractmethod
+    def delete_older_than(self, cutoff: datetime) -> int:
+        """Delete everything last modified before ``cutoff``; return the count."""
+
+
+class S3Storage(Storage):
+    """Objects in an S3 bucket, served through presigned URLs."""
+
+    def __init__(self, client: Any = None, bucket: Optional[str] = None):
+        self._client = client
+        self.bucket = bucket or os.getenv("AWS_S3_BUCKET")
+
+    @property
+    def client(self) -> Any:
+        return self._client or get_s3_client()
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def download(self, key: str, path: str, callback: ProgressCallback = None) -> None:
+        self.client.download_file(
+            self.bucket, key, path, Callback=callback, Config=get_transfer_config()
+        )
+
+    def upload(self, path: str, key: str, callback: ProgressCallback = None) -> None:
+        self.client.upload_file(
+            path, self.bucket, key, Callback=callback, Config=get_transfer_config()
+        )
+
+    def url_for(self, key: str, filename: str, expires: int = 3600) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=expires,
+        )
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        deleted = 0
+        kwargs = {"Bucket": self.bucket}
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            for obj in response.get("Contents", []):
+                if obj["LastModified"].replace(tzinfo=None) < cutoff:
+                    self.client.delete_object(Bucket=self.bucket, Key=obj["Key"])
+                    print(f"Deleted: {obj['Key']}")
+                    deleted += 1
+            if not response.get("IsTruncated"):
+                return deleted
+            kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class FilesystemStorage(Storage):
+    """
+    Files on a volume shared by the API and the workers.
+
+    Writes go to a temporary file in the same directory tree and are moved
+    into place with ``os.replace``, so readers never see partial files.
+    Download URLs carry an HMAC-signed token naming the key, the attachment
+    filename and an expiry.
+    """
+
+    TMP_DIR = ".tmp"
+    serves_downloads = True
+
+    def __init__(self, root: str, secret: str, public_url: str = STORAGE_PUBLIC_URL):
+        if not secret:
+            raise ValueError("STORAGE_SIGNING_KEY must be set for filesystem storage")
+        self.root = os.path.realpath(root)
+        self.secret = secret.encode()
+        self.public_url = public_url.rstrip("/")
+        os.makedirs(os.path.join(self.root, self.TMP_DIR), exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        """Absolute path of ``key``, refusing anything outside the root."""
+        path = os.path.realpath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep) or key.startswith(self.TMP_DIR):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return path
+
+    def _atomic_write(self, key: str, write: Callable[[Any], None]) -> None:
+        final = self.path_for(key)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        tmp = os.path.join(self.root, self.TMP_DIR, uuid.uuid4().hex)
+        try:
+            with open(tmp, "wb") as out:
+                write(out)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, final)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @staticmethod
+    def _copy(src: Any, dst: Any, callback: ProgressCallback) -> None:
+        while True:
+            chunk = src.read(COPY_CHUNK)
+            if not chunk:
+                return
+            dst.write(chunk)
+            if callback:
+                callback(len(chunk))
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self._atomic_write(key, lambda out: out.write(data))
+
+    def download(self, key: str, path: str, callback: ProgressCallback = None) -> None:
+        with open(self.path_for(key), "rb") as src, open(path, "wb") as dst:
+            self._copy(src, dst, callback)
+
+    def upload(self, path: str, key: str, callback: ProgressCallback = None) -> None:
+        with open(path, "rb") as src:
+            self._atomic_write(key, lambda out: self._copy(src, out, callback))
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self.secret, payload.encode(), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    def make_token(self, key: str, filename: str, expires: int = 3600) -> str:
+        payload = _b64encode(
+            json.dumps(
+                {"k": key, "f": filename, "e": int(time.time()) + expires},
+                separators=(",", ":"),
+            ).encode()
+        )
+        return f"{payload}.{self._sign(payload)}"
+
+    def resolve_token(self, token: str) -> Tuple[str, str]:
+        """Verify ``token`` and return ``(path, filename)``."""
+        payload, _, signature = token.partition(".")
+        if not signature or not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidToken("Invalid download token")
+        try:
+            claims = json.loads(_b64decode(payload))
+            key, filename, expiry = claims["k"], claims["f"], int(claims["e"])
+        except (ValueError, KeyError, TypeError):
+            raise InvalidToken("Invalid download token") from None
+        if expiry < time.time():
+            raise InvalidToken("Download link has expired")
+        return self.path_for(key), filename
+
+    def url_for(self, key: str, filename: str, expires: int = 3600) -> str:
+        return f"{self.public_url}/download/{self.make_token(key, filename, expires)}"
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        deleted = 0
+        cutoff_ts = cutoff.timestamp()
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff_ts:
+                        os.remove(path)
+                        print(f"Deleted: {os.path.relpath(path, self.root)}")
+                        deleted += 1
+                except FileNotFoundError:
+                    continue
+        return deleted
+
+
+def get_storage() -> Storage:
+    """Return this process' storage backend, selected by ``STORAGE_BACKEND``."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "filesystem":
+            _storage = FilesystemStorage(
+                STORAGE_ROOT, os.getenv("STORAGE_SIGNING_KEY", "")
+            )
+        elif STORAGE_BACKEND == "s3":
+            _storage = S3Storage()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND!r}")
+    return _storage
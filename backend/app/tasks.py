@@ -1,30 +1,191 @@
+import logging
 import os
+import shutil
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta
+from typing import List, Optional
 
-import boto3
 import requests
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import (
+    task_failure,
+    task_prerun,
+    task_success,
+    worker_process_init,
+    worker_process_shutdown,
+)
 
-from celery_app import celery
+from celery_app import RETENTION_DAYS, celery
+from jobs import get_job_registry
+from pdf_optimize import linearize_pdf, optimize_pdf
+from pptx_slim import slim_pptx
+from process_pool import run_in_pool, shutdown_executor
+from progress import ProgressReporter
+from rasterize import IMAGE_FORMATS, page_count, rasterize_pdf
+from storage import get_storage
+from warmup import warm_in_background, warm_worker
+
+logger = logging.getLogger(__name__)
 
 # Configuration from environment
-BUCKET = os.getenv("AWS_S3_BUCKET")
-REGION = os.getenv("AWS_REGION", "us-east-1")
 UNOSERVER = os.getenv("UNOSERVER_HOST", "unoserver")
 PORT = os.getenv("UNOSERVER_PORT", "2004")
+# "unoserver" posts to the Unoserver REST API, "embedded" uses a local
+# LibreOffice pool (see embedded_converter.py)
+CONVERTER_BACKEND = os.getenv("CONVERTER_BACKEND", "unoserver")
+# First-slide previews (see preview_task); pictures are downscaled to this before rendering
+PREVIEW_DPI = int(os.getenv("PREVIEW_DPI", 72))
+PREVIEW_SLIDES = 1
+RESPONSE_CHUNK = 1024 * 1024
+
+
+@worker_process_init.connect
+def start_embedded_converter(**kwargs):
+    """Start the LibreOffice pool on a thread; the first task waits for it."""
+    if CONVERTER_BACKEND == "embedded":
+        from embedded_converter import start_pool
+
+        def start():
+            try:
+                start_pool()
+            except Exception:
+                logger.exception("Failed to start LibreOffice; first task retries")
+
+        # soffice can take up to EMBEDDED_STARTUP_TIMEOUT per process, far
+        # longer than billiard waits for a child's WORKER_UP. Unlike the
+        # warm-up this runs whatever STARTUP_WARMUP says: starting inline
+        # would stall the child.
+        threading.Thread(target=start, name="embedded-converter", daemon=True).start()
+
+
+@worker_process_shutdown.connect
+def stop_embedded_converter(**kwargs):
+    if CONVERTER_BACKEND == "embedded":
+        from embedded_converter import shutdown_pool
+
+        shutdown_pool()
+
+
+@worker_process_init.connect
+def start_warmup(**kwargs):
+    """Build storage, registry and pool on a thread, not in the first task."""
+    warm_in_background(warm_worker)
+
+
+@worker_process_shutdown.connect
+def stop_process_pool(**kwargs):
+    shutdown_executor()
+
+
+def convert_with_unoserver(
+    local_pptx: str, local_pdf: str, convert_to: str = "pdf"
+) -> None:
+    """POST the PPTX to Unoserver's /request endpoint and save the PDF."""
+    with open(local_pptx, "rb") as pptx_file:
+        response = requests.post(
+            f"http://{UNOSERVER}:{PORT}/request",
+            files={"file": pptx_file},
+            data={"convert-to": convert_to},
+            timeout=300,
+            stream=True,
+        )
+    try:
+        response.raise_for_status()  # will raise HTTPError on non-2xx
+        # Streamed to disk: holding a large PDF in response.content inflates
+        # the worker child's RSS for the rest of its life
+        with open(local_pdf, "wb") as pdf_out:
+            for chunk in response.iter_content(RESPONSE_CHUNK):
+                pdf_out.write(chunk)
+    finally:
+        response.close()
+
+
+def convert_embedded(local_pptx: str, local_pdf: str, convert_to: str = "pdf") -> None:
+    """Convert on this worker's warm LibreOffice pool."""
+    from embedded_converter import get_pool
+
+    get_pool().convert(local_pptx, local_pdf, convert_to)
 
-# Initialize S3 client
-s3 = boto3.client("s3", region_name=REGION)
+
+def convert(local_pptx: str, output: str, convert_to: str = "pdf") -> None:
+    """Convert with the configured backend."""
+    if CONVERTER_BACKEND == "embedded":
+        convert_embedded(local_pptx, output, convert_to)
+    else:
+        convert_with_unoserver(local_pptx, output, convert_to)
+
+
+def upload_slide_images(
+    storage,
+    progress: ProgressReporter,
+    local_pdf: str,
+    key_prefix: str,
+    base_filename: str,
+    fmt: str,
+    dpi: Optional[int] = None,
+) -> List[dict]:
+    """
+    Render every page of ``local_pdf`` and upload each image as it finishes.
+
+    Images are deleted locally once uploaded, so disk and memory use stay
+    bounded by the pages in flight rather than the deck's length. Returns
+    the manifest: one entry per slide, in slide order.
+    """
+    pages = page_count(local_pdf)
+    progress.stage("rasterizing", chunk=0, chunks=pages)
+    image_dir = f"{os.path.splitext(local_pdf)[0]}-{fmt}"
+    os.makedirs(image_dir, exist_ok=True)
+    manifest = []
+    try:
+        for page in rasterize_pdf(local_pdf, image_dir, fmt, dpi=dpi, pages=pages):
+            number = page["slide"]
+            key = f"{key_prefix}_slide-{number:04d}.{fmt}"
+            storage.upload(page["path"], key)
+            os.remove(page["path"])
+            manifest.append(
+                {
+                    "slide": number,
+                    "url": storage.url_for(key, f"{base_filename}-{number}.{fmt}"),
+                    "width": page["width"],
+                    "height": page["height"],
+                }
+            )
+            progress.chunk(len(manifest), pages)
+    finally:
+        shutil.rmtree(image_dir, ignore_errors=True)
+    return sorted(manifest, key=lambda entry: entry["slide"])
 
 
 @celery.task(bind=True)
-def convert_task(self, pptx_key: str, base_filename: str):
+def convert_task(
+    self,
+    pptx_key: str,
+    base_filename: str,
+    deck: Optional[dict] = None,
+    options: Optional[dict] = None,
+):
     """
-    1) Download PPTX from S3
-    2) Send it to Unoserver via its /request endpoint
-    3) Save returned PDF to /tmp
-    4) Upload PDF back to S3 with original filename
+    1) Download PPTX from storage (S3 or the shared volume)
+    2) Convert it to PDF in /tmp, via Unoserver or the embedded pool,
+       optionally slimming the deck's media first (see pptx_slim.py)
+    3) Optionally optimise and/or linearise the PDF (see pdf_optimize.py)
+    4) Upload PDF back to storage with original filename
+
+    With ``options["convert_to"]`` set to ``png`` or ``webp``, steps 3 and 4
+    are replaced by rendering each slide to an image (see rasterize.py) and
+    the result is a manifest of per-slide URLs instead of a PDF URL.
+
+    ``deck`` is the pre-flight summary from ``preflight.inspect_pptx`` and
+    ``options`` the output options chosen on /convert.
+    Stage and percentage are reported through ``update_state`` (see
+    progress.py) so /status can show them.
     """
+    progress = ProgressReporter(self)
+    storage = get_storage()
+    options = options or {}
+
     # Generate unique filenames / keys using original filename
     uid = uuid.uuid4().hex
     local_pptx = f"/tmp/{uid}.pptx"
@@ -33,70 +194,175 @@ def convert_task(self, pptx_key: str, base_filename: str):
     # Use original filename for the PDF (with unique prefix to avoid conflicts)
     pdf_key = f"{uid}_{base_filename}.pdf"
 
-    # 1) Download PPTX from S3
-    s3.download_file(BUCKET, pptx_key, local_pptx)
+    # 1) Download PPTX from storage
+    progress.stage("downloading", total=(deck or {}).get("file_bytes"))
+    storage.download(pptx_key, local_pptx, callback=progress.advance)
 
-    # 2) POST to Unoserver's /request endpoint
-    with open(local_pptx, "rb") as pptx_file:
-        response = requests.post(
-            f"http://{UNOSERVER}:{PORT}/request",
-            files={"file": pptx_file},
-            data={"convert-to": "pdf"},
-            timeout=300,
+    # 2) Convert to a local PDF; decks are converted whole, as a single chunk
+    progress.stage("converting", chunk=0, chunks=1)
+    slimming = None
+    if options.get("slim"):
+        # Downscale pictures and drop video before LibreOffice has to load them
+        local_slim = f"/tmp/{uid}.slim.pptx"
+        try:
+            slimming = run_in_pool(
+                slim_pptx, local_pptx, local_slim, target_dpi=options.get("target_dpi")
+            )
+        except SoftTimeLimitExceeded:
+            raise
+        except Exception as e:
+            # A pre-pass only: the original deck still converts
+            logger.warning("PPTX slimming failed, converting as is", exc_info=True)
+            slimming = {"skipped": True, "error": str(e)}
+            if os.path.exists(local_slim):
+                os.remove(local_slim)
+        else:
+            os.replace(local_slim, local_pptx)
+
+    started = time.perf_counter()
+    convert(local_pptx, local_pdf)
+    progress.chunk(1, 1)
+    if slimming:
+        slimming["conversionSeconds"] = round(time.perf_counter() - started, 3)
+
+    convert_to = options.get("convert_to", "pdf")
+    if convert_to in IMAGE_FORMATS:
+        # 3) Render slides in the CPU pool, uploading each image as it's ready
+        images = upload_slide_images(
+            storage,
+            progress,
+            local_pdf,
+            f"{uid}_{base_filename}",
+            base_filename,
+            convert_to,
+            dpi=options.get("dpi"),
         )
-    response.raise_for_status()  # will raise HTTPError on non-2xx
+        progress.stage("finalizing")
+        os.remove(local_pptx)
+        os.remove(local_pdf)
+
+        result = {"format": convert_to, "slides": len(images), "images": images}
+        if slimming:
+            result["slimming"] = slimming
+        return result
 
-    # 3) Write the PDF content to a local file
-    with open(local_pdf, "wb") as pdf_out:
-        pdf_out.write(response.content)
+    # 3) Downsample images, deduplicate and recompress in the CPU pool;
+    # linearising is folded into the same save when both are requested
+    optimization = None
+    try:
+        if options.get("optimize"):
+            progress.stage("optimizing")
+            optimization = run_in_pool(
+                optimize_pdf,
+                local_pdf,
+                target_dpi=options.get("target_dpi"),
+                jpeg_quality=options.get("jpeg_quality"),
+                linearize=bool(options.get("linearize")),
+            )
+        elif options.get("linearize"):
+            progress.stage("optimizing")
+            optimization = run_in_pool(linearize_pdf, local_pdf)
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception as e:
+        # The PDF is already there: ship it unoptimised. local_pdf is only
+        # ever replaced by a completely written file, so it is intact
+        logger.warning("PDF optimisation failed, skipping it", exc_info=True)
+        optimization = {"skipped": True, "error": str(e)}
 
-    # 4) Upload the PDF back to S3 with meaningful filename
-    s3.upload_file(local_pdf, BUCKET, pdf_key)
+    # 4) Upload the PDF back to storage with meaningful filename
+    progress.stage("uploading", total=os.path.getsize(local_pdf))
+    storage.upload(local_pdf, pdf_key, callback=progress.advance)
+    progress.stage("finalizing")
 
     # Cleanup local temp files
     os.remove(local_pptx)
     os.remove(local_pdf)
-    # Optionally remove original PPTX from S3:
-    # s3.delete_object(Bucket=BUCKET, Key=pptx_key)
-
-    # Generate a presigned URL with the original filename for download
-    presigned_url = s3.generate_presigned_url(
-        "get_object",
-        Params={
-            "Bucket": BUCKET,
-            "Key": pdf_key,
-            "ResponseContentDisposition": f'attachment; filename="{base_filename}.pdf"',
-        },
-        ExpiresIn=3600,
+
+    # Presigned S3 URL or signed /download link, with the original filename
+    url = storage.url_for(pdf_key, f"{base_filename}.pdf", expires=3600)
+
+    result = {"url": url}
+    if deck:
+        result["slides"] = deck["slides"]
+    if slimming:
+        result["slimming"] = slimming
+    if optimization:
+        result["optimization"] = optimization
+    return result
+
+
+@task_prerun.connect(sender=convert_task)
+def job_started(task_id=None, **kwargs):
+    get_job_registry().update(task_id, "processing")
+
+
+@task_success.connect(sender=convert_task)
+def job_done(sender=None, result=None, **kwargs):
+    result = result if isinstance(result, dict) else {}
+    get_job_registry().update(
+        sender.request.id,
+        "done",
+        slides=result.get("slides"),
+        format=result.get("format", "pdf"),
     )
 
-    return {"url": presigned_url}
+
+@task_failure.connect(sender=convert_task)
+def job_failed(task_id=None, exception=None, **kwargs):
+    get_job_registry().update(task_id, "error", error=str(exception))
+
+
+@celery.task
+def preview_task(pptx_key: str, base_filename: str):
+    """
+    Render a low-resolution PNG of the deck's first slide.
+
+    Enqueued by /convert next to convert_task, with task id
+    ``<jobId>-preview``, and routed to the ``previews`` queue (see
+    celery_app.py) so it is not stuck behind full conversions. The deck is
+    cut down to its first slide with pictures at PREVIEW_DPI before
+    LibreOffice sees it, so rendering takes seconds even for large decks.
+    The PNG is stored next to the upload; /status returns its URL as
+    ``previewUrl`` while the PDF is still being produced.
+    """
+    storage = get_storage()
+    uid = uuid.uuid4().hex
+    local_pptx = f"/tmp/{uid}.pptx"
+    local_small = f"/tmp/{uid}.preview.pptx"
+    local_png = f"/tmp/{uid}.png"
+    preview_key = f"{os.path.splitext(pptx_key)[0]}.preview.png"
+
+    try:
+        storage.download(pptx_key, local_pptx)
+        run_in_pool(
+            slim_pptx,
+            local_pptx,
+            local_small,
+            target_dpi=PREVIEW_DPI,
+            max_slides=PREVIEW_SLIDES,
+        )
+        convert(local_small, local_png, convert_to="png")
+        storage.upload(local_png, preview_key)
+    finally:
+        for path in (local_pptx, local_small, local_png):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return {"url": storage.url_for(preview_key, f"{base_filename}.png")}
 
 
 @celery.task
 def cleanup_old_files():
     """
-    Delete files from S3 that are older than 1 day
+    Delete stored files and job records that are older than RETENTION_DAYS
+    (default 1 day)
     """
     try:
-        # Calculate cutoff time (1 day ago)
-        cutoff_time = datetime.now() - timedelta(days=1)
-
-        # List all objects in the bucket
-        response = s3.list_objects_v2(Bucket=BUCKET)
-
-        if "Contents" not in response:
-            print("No files found in bucket")
-            return
-
-        deleted_count = 0
-        for obj in response["Contents"]:
-            # Check if file is older than 1 day
-            if obj["LastModified"].replace(tzinfo=None) < cutoff_time:
-                # Delete the file
-                s3.delete_object(Bucket=BUCKET, Key=obj["Key"])
-                print(f"Deleted: {obj['Key']}")
-                deleted_count += 1
+        cutoff_time = datetime.now() - timedelta(days=RETENTION_DAYS)
+        deleted_count = get_storage().delete_older_than(cutoff_time)
+        deleted_jobs = get_job_registry().delete_older_than(cutoff_time)
+        print(f"Deleted {deleted_jobs} job records.")
 
         print(f"Cleanup complete. Deleted {deleted_count} files.")
         return f"Deleted {deleted_count} files"
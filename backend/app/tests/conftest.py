@@ -5,7 +5,10 @@ from unittest.mock import Mock, patch
 import pytest
 from fastapi.testclient import TestClient
 
+from app.jobs import RedisJobRegistry
 from app.main import app
+from app.storage import FilesystemStorage, S3Storage
+from app.tests.factories import FileFactory, MockFactory
 
 
 @pytest.fixture
@@ -30,11 +33,48 @@ def mock_env_vars():
         yield
 
 
+@pytest.fixture
+def mock_s3():
+    """Mock the S3 client behind the storage used by the API and the tasks."""
+    client = MockFactory.create_s3_client_mock()
+    storage = S3Storage(client, "test-bucket")
+    with (
+        patch("app.main.get_storage", return_value=storage),
+        patch("app.tasks.get_storage", return_value=storage),
+    ):
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def job_registry():
+    """In-memory Redis job registry, used by the API and the tasks."""
+    import fakeredis
+
+    registry = RedisJobRegistry(fakeredis.FakeRedis(decode_responses=True))
+    with (
+        patch("app.main.get_job_registry", return_value=registry),
+        patch("app.tasks.get_job_registry", return_value=registry),
+    ):
+        yield registry
+
+
+@pytest.fixture
+def fs_storage(tmp_path):
+    """Filesystem storage in a temporary directory, used by API and tasks."""
+    storage = FilesystemStorage(
+        str(tmp_path), "test-secret", public_url="http://testserver"
+    )
+    with (
+        patch("app.main.get_storage", return_value=storage),
+        patch("app.tasks.get_storage", return_value=storage),
+    ):
+        yield storage
+
+
 @pytest.fixture
 def sample_pptx_file():
     """Create a sample PPTX file for testing."""
-    content = b"PK\x03\x04\x14\x00\x06\x00\x08\x00!\x00" + b"A" * 1000
-    return content
+    return FileFactory.create_pptx_file()
 
 
 @pytest.fixture
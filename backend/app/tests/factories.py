@@ -7,8 +7,6 @@ import zipfile
 from datetime import datetime, timedelta
 from typing import Dict, List
 
-import factory
-
 
 class FileFactory:
     """Factory for creating test files."""
@@ -27,7 +25,7 @@ class FileFactory:
 <Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
     <Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
     <Default Extension="xml" ContentType="application/xml"/>
-    <Override PartName="/ppt/presentation.xml" ContentType="application/vnd.openxmlformats-presentationml.presentation.main+xml"/>
+    <Override PartName="/ppt/presentation.xml" ContentType="application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml"/>
 </Types>""",
             )
 
@@ -50,10 +48,13 @@ class FileFactory:
 </p:presentation>""",
             )
 
-            # Add padding to reach desired size
+            # Add padding to reach desired size; stored like real media so
+            # the archive does not look like a zip bomb
             padding_size = max(0, (size_kb * 1024) - buffer.tell())
             if padding_size > 0:
-                zip_file.writestr("padding.txt", "x" * padding_size)
+                zip_file.writestr(
+                    "padding.txt", "x" * padding_size, compress_type=zipfile.ZIP_STORED
+                )
 
         content = buffer.getvalue()
         buffer.close()
@@ -305,10 +306,12 @@ class MockFactory:
         if success:
             mock_response.status_code = 200
             mock_response.content = pdf_content or FileFactory.create_pdf_file()
+            mock_response.iter_content.return_value = [mock_response.content]
             mock_response.raise_for_status.return_value = None
         else:
             mock_response.status_code = 500
             mock_response.content = b"Conversion failed"
+            mock_response.iter_content.return_value = [mock_response.content]
             mock_response.raise_for_status.side_effect = Exception("Conversion failed")
 
         return mock_response
@@ -0,0 +1,163 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import autoscaler
+from app.autoscaler import Autoscaler, Sample
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_scaler(**kwargs):
+    options = dict(
+        converters=0,
+        converter_capacity=1,
+        min_concurrency=1,
+        max_concurrency=8,
+        target_wait_s=60,
+        scale_down_delay_s=300,
+        default_service_s=20,
+        max_converters=8,
+    )
+    options.update(kwargs)
+    return Autoscaler(**options)
+
+
+def sample(at, depth, pool=2, accepted=0, running=0, worker="w1"):
+    return Sample(
+        at=at,
+        depth=depth,
+        pools={worker: pool},
+        accepted={worker: accepted},
+        running={worker: running},
+    )
+
+
+class TestAutoscaler:
+    """Test pool sizing decisions."""
+
+    def test_scales_up_at_once_for_backlog(self):
+        """Test a backlog is sized to drain within the target wait."""
+        scaler = make_scaler()
+        decision = scaler.observe(sample(0, depth=15))
+        # 15 jobs x 20 s / 60 s
+        assert decision.needed_slots == 5
+        assert decision.concurrency == {"w1": 5}
+
+    def test_rates_from_counters(self):
+        """Test arrival and completion rates come from counter deltas."""
+        scaler = make_scaler()
+        scaler.observe(sample(0, depth=0, accepted=100, running=2))
+        # 10 started in 10 s, 2 more waiting, running unchanged
+        decision = scaler.observe(sample(10, depth=2, accepted=110, running=2))
+        assert decision.arrival_rate == 1.2
+        assert decision.completion_rate == 1.0
+
+    def test_restarted_worker_counters(self):
+        """Test counters that went backwards are treated as a restart."""
+        scaler = make_scaler()
+        scaler.observe(sample(0, depth=0, accepted=500))
+        decision = scaler.observe(sample(10, depth=0, accepted=5))
+        assert decision.completion_rate == 0.5
+
+    def test_scale_down_waits_for_window(self):
+        """Test pools only shrink to the peak need of the scale-down window."""
+        scaler = make_scaler(scale_down_delay_s=60)
+        assert scaler.observe(sample(0, depth=15)).concurrency == {"w1": 5}
+        assert scaler.observe(sample(30, depth=0, pool=5)).concurrency == {"w1": 5}
+        # The burst has left the window
+        decision = scaler.observe(sample(90, depth=0, pool=5))
+        assert decision.concurrency == {"w1": 1}
+
+    def test_capped_by_converters(self):
+        """Test slots stop at converter capacity; more converters are advised."""
+        scaler = make_scaler(converters=2, converter_capacity=2)
+        decision = scaler.observe(sample(0, depth=30))
+        assert decision.needed_slots == 10
+        assert decision.concurrency == {"w1": 4}
+        assert decision.converters == 5
+
+    def test_slots_spread_over_workers(self):
+        """Test slots are split evenly within the per-worker bounds."""
+        scaler = make_scaler(max_concurrency=3)
+        pools = {"a": 1, "b": 1, "c": 1}
+        decision = scaler.observe(Sample(at=0, depth=36, pools=pools))
+        assert decision.concurrency == {"a": 3, "b": 3, "c": 3}
+
+        scaler = make_scaler()
+        decision = scaler.observe(Sample(at=0, depth=12, pools=pools))
+        assert decision.concurrency == {"a": 2, "b": 1, "c": 1}
+
+
+class TestControllerIO:
+    """Test sampling, resizing and publishing."""
+
+    def make_celery(self):
+        celery = MagicMock()
+        inspect = celery.control.inspect.return_value
+        inspect.active_queues.return_value = {
+            "celery@a": [{"name": "celery"}, {"name": "large"}],
+            "celery@previews": [{"name": "previews"}],
+        }
+        inspect.stats.return_value = {
+            "celery@a": {
+                "pool": {"processes": [1, 2, 3]},
+                "total": {"tasks.convert_task": 7, "tasks.cleanup_old_files": 1},
+            },
+            "celery@previews": {"pool": {"processes": [1, 2]}, "total": {}},
+        }
+        inspect.active.return_value = {"celery@a": [{}, {}]}
+        inspect.reserved.return_value = {"celery@a": [{}]}
+        return celery
+
+    def test_collect(self):
+        """Test only workers consuming the scaled queues are sampled."""
+        client = fakeredis.FakeRedis()
+        client.rpush("celery", "a", "b")
+        client.rpush("large", "c")
+        client.rpush("previews", "d")
+
+        result = autoscaler.collect(self.make_celery(), client, ["celery", "large"])
+
+        assert result.depth == 4
+        assert result.pools == {"celery@a": 3}
+        assert result.accepted == {"celery@a": 8}
+        assert result.running == {"celery@a": 2}
+
+    def test_apply_grows_and_shrinks(self):
+        """Test pools are resized by the difference to their target."""
+        celery = MagicMock()
+        current = Sample(at=0, depth=0, pools={"a": 2, "b": 4, "c": 3})
+        decision = make_scaler().observe(current)
+        decision.concurrency = {"a": 5, "b": 1, "c": 3}
+
+        assert autoscaler.apply(celery, current, decision) == 2
+        celery.control.pool_grow.assert_called_once_with(3, destination=["a"])
+        celery.control.pool_shrink.assert_called_once_with(3, destination=["b"])
+
+    def test_pending_resize_not_repeated(self):
+        """Test a grow not yet visible in the sample isn't requested again."""
+        celery = MagicMock()
+        pending = {}
+        decision = make_scaler().observe(sample(0, depth=15, pool=1))
+        assert autoscaler.apply(celery, sample(0, 15, pool=1), decision, pending) == 1
+        # The pool hasn't started the new processes yet
+        assert autoscaler.apply(celery, sample(5, 15, pool=1), decision, pending) == 0
+        celery.control.pool_grow.assert_called_once_with(4, destination=["w1"])
+
+        # Never showed up (e.g. the worker restarted): ask again
+        late = sample(autoscaler.RESIZE_SETTLE_S + 1, 15, pool=1)
+        assert autoscaler.apply(celery, late, decision, pending) == 1
+
+    def test_publish_recommendation(self):
+        """Test the converter recommendation is stored for other tools."""
+        client = fakeredis.FakeRedis()
+        decision = make_scaler(converter_capacity=2).observe(sample(0, depth=30))
+
+        autoscaler.publish(client, decision, ttl=60)
+
+        payload = json.loads(client.get(autoscaler.RECOMMENDATION_KEY))
+        assert payload["converters"] == 5
+        assert payload["neededSlots"] == 10
+        assert 0 < client.ttl(autoscaler.RECOMMENDATION_KEY) <= 60
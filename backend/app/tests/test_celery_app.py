@@ -35,6 +35,33 @@ class TestCeleryConfiguration:
         assert cleanup_task["task"] == "tasks.cleanup_old_files"
         assert cleanup_task["schedule"] == 21600.0
 
+    def test_celery_routes_previews(self):
+        """Test first-slide previews go to their own queue."""
+        route = celery.amqp.router.route({}, "tasks.preview_task", (), {})
+        assert route["queue"].name == "previews"
+
+    def test_celery_routes_large_decks(self):
+        """Test large decks go to the queue paused under memory pressure."""
+
+        def queue(deck_bytes):
+            kwargs = {"deck": {"uncompressed_bytes": deck_bytes}}
+            route = celery.amqp.router.route({}, "tasks.convert_task", (), kwargs)
+            return route["queue"].name
+
+        assert queue(500 * 1024 * 1024) == "large"
+        assert queue(1024) == "celery"
+
+    def test_celery_worker_recycling(self):
+        """Test worker children are recycled and reserve one task at a time."""
+        assert celery.conf.worker_max_tasks_per_child == 100
+        assert celery.conf.worker_max_memory_per_child == 1024 * 1024
+        assert celery.conf.worker_prefetch_multiplier == 1
+        assert celery.conf.task_acks_late is True
+
+    def test_celery_result_expiry(self):
+        """Test task results expire with the job records, after RETENTION_DAYS."""
+        assert celery.conf.result_expires == 86400
+
     def test_celery_includes_tasks(self):
         """Test that tasks module is included."""
         assert "tasks" in celery.conf.include
@@ -0,0 +1,138 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app import embedded_converter, tasks
+from app.embedded_converter import ConverterPool, ConverterUnavailable, OfficeProcess
+
+
+@pytest.fixture
+def mock_soffice():
+    """Patch process launch and UNO connection for OfficeProcess."""
+    with (
+        patch("app.embedded_converter.subprocess.Popen") as mock_popen,
+        patch.object(OfficeProcess, "_connect") as mock_connect,
+        patch.object(OfficeProcess, "rss", return_value=0),
+    ):
+        proc = MagicMock()
+        proc.poll.return_value = None
+        mock_popen.return_value = proc
+        yield mock_popen, mock_connect
+
+
+class TestOfficeProcess:
+    """Test a single pooled LibreOffice process."""
+
+    def test_start_waits_for_uno(self, mock_soffice):
+        """Test start retries the UNO connection until soffice is ready."""
+        mock_popen, mock_connect = mock_soffice
+        mock_connect.side_effect = [Exception("NoConnectException"), MagicMock()]
+
+        with patch("app.embedded_converter.time.sleep"):
+            process = OfficeProcess(port=2100)
+            process.start()
+
+        assert mock_connect.call_count == 2
+        assert "port=2100" in mock_popen.call_args[0][0][-1]
+        process.stop()
+
+    def test_start_fails_if_soffice_exits(self, mock_soffice):
+        """Test start raises when soffice dies during boot."""
+        mock_popen, mock_connect = mock_soffice
+        mock_popen.return_value.poll.return_value = 1
+
+        with pytest.raises(ConverterUnavailable):
+            OfficeProcess(port=2101).start()
+
+
+class TestConverterPool:
+    """Test pool checkout and recycling."""
+
+    def test_convert_uses_warm_process(self, mock_soffice):
+        """Test conversions run on the pre-started process."""
+        _, mock_connect = mock_soffice
+        pool = ConverterPool(size=1).start()
+
+        pool.convert("/tmp/in.pptx", "/tmp/out.pdf")
+
+        mock_connect.return_value.convert.assert_called_once_with(
+            inpath="/tmp/in.pptx", outpath="/tmp/out.pdf", convert_to="pdf"
+        )
+        assert mock_connect.call_count == 1
+        pool.close()
+
+    def test_recycles_after_max_conversions(self, mock_soffice):
+        """Test a process is restarted after MAX_CONVERSIONS."""
+        mock_popen, _ = mock_soffice
+        with patch.object(embedded_converter, "MAX_CONVERSIONS", 2):
+            pool = ConverterPool(size=1).start()
+            pool.convert("a.pptx", "a.pdf")
+            assert mock_popen.call_count == 1
+            pool.convert("b.pptx", "b.pdf")
+            assert mock_popen.call_count == 2
+            assert pool.processes[0].conversions == 0
+        pool.close()
+
+    def test_recycles_over_memory_ceiling(self, mock_soffice):
+        """Test a process is restarted when its RSS exceeds the ceiling."""
+        mock_popen, _ = mock_soffice
+        pool = ConverterPool(size=1).start()
+        with patch.object(OfficeProcess, "rss", return_value=10 * 1024**3):
+            pool.convert("a.pptx", "a.pdf")
+        assert mock_popen.call_count == 2
+        pool.close()
+
+    def test_failed_conversion_restarts_process(self, mock_soffice):
+        """Test a failing conversion restarts the process and re-raises."""
+        mock_popen, mock_connect = mock_soffice
+        mock_connect.return_value.convert.side_effect = RuntimeError("wedged")
+        pool = ConverterPool(size=1).start()
+
+        with pytest.raises(RuntimeError, match="wedged"):
+            pool.convert("a.pptx", "a.pdf")
+
+        assert mock_popen.call_count == 2
+        assert pool._idle.qsize() == 1
+        pool.close()
+
+    def test_failed_start_stops_started_processes(self, mock_soffice):
+        """Test processes that did start are stopped when a later one fails."""
+        mock_popen, mock_connect = mock_soffice
+        first, second = MagicMock(), MagicMock()
+        first.poll.return_value = None
+        second.poll.return_value = 1
+        mock_popen.side_effect = [first, second]
+
+        with pytest.raises(ConverterUnavailable):
+            ConverterPool(size=2).start()
+
+        first.terminate.assert_called_once()
+
+
+class TestWorkerStartup:
+    """Test the pool is started without holding up the worker child."""
+
+    @pytest.mark.parametrize("warmup", ["background", "off"])
+    def test_process_init_does_not_wait_for_soffice(self, warmup):
+        """Test the signal handler returns while soffice is still starting."""
+        started, release = threading.Event(), threading.Event()
+        threads = []
+
+        def slow_start():
+            threads.append(threading.current_thread())
+            started.set()
+            release.wait(5)
+
+        with (
+            patch.object(tasks, "CONVERTER_BACKEND", "embedded"),
+            # tasks imports the pool module by its worker-side name
+            patch("embedded_converter.start_pool", slow_start),
+            patch("warmup.STARTUP_WARMUP", warmup),
+        ):
+            try:
+                tasks.start_embedded_converter()
+                assert started.wait(5)
+                assert threads != [threading.current_thread()]
+            finally:
+                release.set()
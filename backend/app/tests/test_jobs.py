@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.jobs import RedisJobRegistry, SqliteJobRegistry
+
+
+@pytest.fixture(params=["redis", "sqlite"])
+def registry(request, tmp_path):
+    """Each registry implementation, empty."""
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        return RedisJobRegistry(fakeredis.FakeRedis(decode_responses=True))
+    return SqliteJobRegistry(str(tmp_path / "jobs.sqlite3"))
+
+
+def add_jobs(registry, count, start=1000.0, step=1.0, prefix="job", **fields):
+    """``count`` jobs created ``step`` seconds apart from ``start``."""
+    for i in range(count):
+        with patch("time.time", return_value=start + i * step):
+            registry.create(f"{prefix}-{i:03d}", **fields)
+
+
+class TestJobRegistry:
+    """Test both job registry implementations."""
+
+    def test_create_and_update(self, registry):
+        """Test a job moves from queued to done and keeps its fields."""
+        registry.create("job-1", tenant="acme", filename="deck.pptx", upload="k")
+        assert registry.get("job-1")["status"] == "queued"
+
+        registry.update("job-1", "done", slides=12, format="pdf")
+
+        job = registry.get("job-1")
+        assert job["status"] == "done"
+        assert job["tenant"] == "acme"
+        assert job["slides"] == 12
+        assert job["createdAt"] <= job["updatedAt"]
+
+    def test_update_unknown_job_ignored(self, registry):
+        """Test status updates for unrecorded jobs don't create them."""
+        registry.update("missing", "processing")
+
+        assert registry.get("missing") is None
+
+    def test_list_by_status_and_since(self, registry):
+        """Test listing reads one status, newest first, from ``since`` on."""
+        add_jobs(registry, 5)
+        registry.update("job-001", "error", error="boom")
+        registry.update("job-003", "error", error="boom")
+        registry.update("job-004", "done")
+
+        jobs, cursor = registry.list(status="error")
+        assert [j["jobId"] for j in jobs] == ["job-003", "job-001"]
+        assert cursor is None
+
+        since = datetime.fromtimestamp(1002.0, timezone.utc)
+        jobs, _ = registry.list(status="error", since=since)
+        assert [j["jobId"] for j in jobs] == ["job-003"]
+
+        jobs, _ = registry.list(status="queued")
+        assert [j["jobId"] for j in jobs] == ["job-002", "job-000"]
+
+    def test_list_by_tenant(self, registry):
+        """Test tenant filtering, alone and combined with a status."""
+        add_jobs(registry, 3, prefix="acme", tenant="acme")
+        add_jobs(registry, 2, start=2000.0, prefix="other", tenant="other")
+        registry.update("acme-001", "done")
+        registry.update("other-001", "done")
+
+        jobs, _ = registry.list(tenant="acme")
+        assert [j["jobId"] for j in jobs] == ["acme-002", "acme-001", "acme-000"]
+        jobs, _ = registry.list(tenant="other", status="done")
+        assert [j["jobId"] for j in jobs] == ["other-001"]
+
+    def test_pagination_with_equal_timestamps(self, registry):
+        """Test cursors walk every job exactly once, even on timestamp ties."""
+        add_jobs(registry, 7, step=0.0)
+        add_jobs(registry, 3, start=5000.0, step=0.0, prefix="late")
+
+        seen, cursor = [], None
+        while True:
+            jobs, cursor = registry.list(cursor=cursor, limit=3)
+            seen.extend(j["jobId"] for j in jobs)
+            if cursor is None:
+                break
+
+        assert seen[:3] == ["late-002", "late-001", "late-000"]
+        assert sorted(seen[3:]) == [f"job-{i:03d}" for i in range(7)]
+        assert len(seen) == len(set(seen)) == 10
+
+    def test_invalid_cursor(self, registry):
+        """Test malformed cursors are refused."""
+        with pytest.raises(ValueError):
+            registry.list(cursor="not-a-cursor")
+
+    def test_delete_older_than(self, registry):
+        """Test old jobs are removed from the records and every index."""
+        add_jobs(registry, 4, tenant="acme")
+        registry.update("job-000", "error", error="boom")
+
+        deleted = registry.delete_older_than(datetime.fromtimestamp(1002.0))
+
+        assert deleted == 2
+        assert registry.get("job-000") is None
+        assert registry.list(status="error") == ([], None)
+        jobs, _ = registry.list(tenant="acme")
+        assert [j["jobId"] for j in jobs] == ["job-003", "job-002"]
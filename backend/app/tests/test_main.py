@@ -10,16 +10,12 @@ from app.main import app
 class TestConvertEndpointSimple:
     """Simplified tests for the /convert endpoint."""
 
-    def test_convert_success(self, test_client, mock_env_vars, sample_pptx_file):
+    def test_convert_success(
+        self, test_client, mock_env_vars, sample_pptx_file, mock_s3
+    ):
         """Test successful file conversion."""
-        mock_task = Mock()
-        mock_task.id = "test-job-123"
+        with patch("app.main.celery") as mock_celery:
 
-        with patch("app.main.convert_task") as mock_convert_task, patch(
-            "app.main.s3"
-        ) as mock_s3:
-
-            mock_convert_task.delay.return_value = mock_task
             mock_s3.put_object.return_value = None
 
             files = {
@@ -35,7 +31,66 @@ class TestConvertEndpointSimple:
             assert response.status_code == 200
             data = response.json()
             assert "jobId" in data
-            assert data["jobId"] == "test-job-123"
+            convert_call, preview_call = mock_celery.send_task.call_args_list
+            assert convert_call.args[0] == "tasks.convert_task"
+            assert convert_call.kwargs["task_id"] == data["jobId"]
+            assert preview_call.args[0] == "tasks.preview_task"
+            assert preview_call.kwargs["task_id"] == f"{data['jobId']}-preview"
+
+    def test_convert_optimize_options(
+        self, test_client, mock_env_vars, sample_pptx_file, mock_s3
+    ):
+        """Test optimisation options are passed on to the task."""
+        with patch("app.main.celery") as mock_celery:
+            response = test_client.post(
+                "/convert",
+                files={"file": ("test.pptx", io.BytesIO(sample_pptx_file))},
+                data={"optimize": "true", "target_dpi": "96"},
+            )
+
+        assert response.status_code == 200
+        options = mock_celery.send_task.call_args_list[0].args[2]["options"]
+        assert options["optimize"] is True
+        assert options["target_dpi"] == 96
+
+    def test_convert_image_options(
+        self, test_client, mock_env_vars, sample_pptx_file, mock_s3
+    ):
+        """Test convert-to selects per-slide images at the requested DPI."""
+        with patch("app.main.celery") as mock_celery:
+            response = test_client.post(
+                "/convert",
+                files={"file": ("test.pptx", io.BytesIO(sample_pptx_file))},
+                data={"convert-to": "png", "dpi": "72"},
+            )
+
+        assert response.status_code == 200
+        options = mock_celery.send_task.call_args_list[0].args[2]["options"]
+        assert options == {"convert_to": "png", "dpi": 72}
+
+    def test_convert_rejects_unknown_format(
+        self, test_client, mock_env_vars, sample_pptx_file, mock_s3
+    ):
+        """Test output formats other than PDF, PNG and WebP are refused."""
+        response = test_client.post(
+            "/convert",
+            files={"file": ("test.pptx", io.BytesIO(sample_pptx_file))},
+            data={"convert-to": "gif"},
+        )
+
+        assert response.status_code == 422
+
+    def test_convert_rejects_out_of_range_dpi(
+        self, test_client, mock_env_vars, sample_pptx_file, mock_s3
+    ):
+        """Test target DPI outside the supported range is refused."""
+        response = test_client.post(
+            "/convert",
+            files={"file": ("test.pptx", io.BytesIO(sample_pptx_file))},
+            data={"optimize": "true", "target_dpi": "5"},
+        )
+
+        assert response.status_code == 422
 
     def test_convert_invalid_file_extension(self, test_client, mock_env_vars):
         """Test conversion with invalid file extension."""
@@ -56,6 +111,18 @@ class TestConvertEndpointSimple:
         # FastAPI returns 422 for validation errors, not 400
         assert response.status_code in [400, 422]
 
+    def test_convert_rejects_corrupt_pptx(self, test_client, mock_env_vars, mock_s3):
+        """Test uploads failing pre-flight are rejected before S3 and Celery."""
+        files = {"file": ("test.pptx", io.BytesIO(b"not a zip"), "application/zip")}
+
+        with patch("app.main.celery") as mock_celery:
+            response = test_client.post("/convert", files=files)
+
+        assert response.status_code == 400
+        assert "not a valid .pptx" in response.json()["detail"]
+        mock_s3.put_object.assert_not_called()
+        mock_celery.send_task.assert_not_called()
+
 
 class TestStatusEndpointSimple:
     """Simplified tests for the /status endpoint."""
@@ -93,3 +160,136 @@ class TestStatusEndpointSimple:
             data = response.json()
             assert data["status"] == "done"
             assert data["url"] == test_url
+
+    def test_status_progress(self, test_client, mock_env_vars):
+        """Test in-flight jobs expose the stage and percentage."""
+        with patch("celery.result.AsyncResult") as mock_async_result:
+            mock_result = Mock()
+            mock_result.state = "PROGRESS"
+            mock_result.info = {
+                "stage": "uploading",
+                "progress": 90,
+                "bytesDone": 512,
+                "bytesTotal": 1024,
+            }
+            mock_async_result.return_value = mock_result
+
+            response = test_client.get("/status/test-job-123")
+
+            assert response.status_code == 200
+            assert response.json() == {
+                "status": "processing",
+                "stage": "uploading",
+                "progress": 90,
+                "bytesDone": 512,
+                "bytesTotal": 1024,
+            }
+
+    def test_status_includes_preview(self, test_client, mock_env_vars):
+        """Test a rendered first-slide preview is returned while processing."""
+        job = Mock(state="PROGRESS", info={"stage": "converting", "progress": 40})
+        preview = Mock(state="SUCCESS", result={"url": "https://example.com/p.png"})
+
+        with patch("celery.result.AsyncResult") as mock_async_result:
+            mock_async_result.side_effect = lambda task_id, app: (
+                preview if task_id == "test-job-123-preview" else job
+            )
+            response = test_client.get("/status/test-job-123")
+
+        assert response.json() == {
+            "status": "processing",
+            "stage": "converting",
+            "progress": 40,
+            "previewUrl": "https://example.com/p.png",
+        }
+
+
+class TestJobsEndpoint:
+    """Tests for listing jobs from the registry."""
+
+    def test_convert_records_job(
+        self, test_client, mock_env_vars, sample_pptx_file, mock_s3, job_registry
+    ):
+        """Test /convert registers the job with its tenant before enqueueing."""
+        with patch("app.main.celery"):
+            response = test_client.post(
+                "/convert",
+                files={"file": ("deck.pptx", io.BytesIO(sample_pptx_file))},
+                headers={"X-Tenant-Id": "acme"},
+            )
+
+        job = job_registry.get(response.json()["jobId"])
+        assert job["status"] == "queued"
+        assert job["tenant"] == "acme"
+        assert job["filename"] == "deck.pptx"
+
+    def test_list_jobs_paginated(self, test_client, job_registry):
+        """Test filters are applied and nextCursor fetches the next page."""
+        for i in range(3):
+            job_registry.create(f"job-{i}", tenant="acme")
+            job_registry.update(f"job-{i}", "error", error="boom")
+        job_registry.create("job-ok", tenant="acme")
+
+        first = test_client.get("/jobs?status=error&tenant=acme&limit=2").json()
+        second = test_client.get(
+            "/jobs", params={"status": "error", "cursor": first["nextCursor"]}
+        ).json()
+
+        ids = [j["jobId"] for j in first["jobs"] + second["jobs"]]
+        assert sorted(ids) == ["job-0", "job-1", "job-2"]
+        assert second["nextCursor"] is None
+
+    def test_list_jobs_rejects_bad_input(self, test_client):
+        """Test unknown statuses and malformed cursors are refused."""
+        assert test_client.get("/jobs?status=lost").status_code == 422
+        assert test_client.get("/jobs?cursor=garbage").status_code == 400
+
+
+class TestDownloadEndpoint:
+    """Tests for /download with filesystem storage."""
+
+    def test_download_full_file(self, test_client, fs_storage):
+        """Test a signed link serves the file as an attachment."""
+        fs_storage.put_bytes("job_deck.pdf", b"%PDF-1.4 test")
+        url = fs_storage.url_for("job_deck.pdf", "deck.pdf")
+
+        response = test_client.get(url)
+
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4 test"
+        assert 'filename="deck.pdf"' in response.headers["content-disposition"]
+
+    def test_download_range(self, test_client, fs_storage):
+        """Test Range requests get a partial response."""
+        fs_storage.put_bytes("job_deck.pdf", b"0123456789")
+        url = fs_storage.url_for("job_deck.pdf", "deck.pdf")
+
+        response = test_client.get(url, headers={"Range": "bytes=2-5"})
+
+        assert response.status_code == 206
+        assert response.content == b"2345"
+
+    def test_download_tampered_token(self, test_client, fs_storage):
+        """Test a token with a bad signature is refused."""
+        fs_storage.put_bytes("job_deck.pdf", b"%PDF")
+        token = fs_storage.make_token("job_deck.pdf", "deck.pdf")
+
+        response = test_client.get(f"/download/{token[:-2]}xx")
+
+        assert response.status_code == 403
+
+    def test_download_expired_token(self, test_client, fs_storage):
+        """Test an expired link is refused."""
+        fs_storage.put_bytes("job_deck.pdf", b"%PDF")
+        token = fs_storage.make_token("job_deck.pdf", "deck.pdf", expires=-1)
+
+        response = test_client.get(f"/download/{token}")
+
+        assert response.status_code == 403
+        assert "expired" in response.json()["detail"]
+
+    def test_download_not_served_with_s3(self, test_client, mock_s3):
+        """Test the endpoint does not exist for S3 storage."""
+        response = test_client.get("/download/anything")
+
+        assert response.status_code == 404
@@ -0,0 +1,112 @@
+import zlib
+
+import pytest
+
+pikepdf = pytest.importorskip("pikepdf")
+Image = pytest.importorskip("PIL.Image")
+
+from app.pdf_optimize import linearize_pdf, optimize_pdf  # noqa: E402
+
+
+def make_pdf(path, pixels=1200, pages=2, draw_pt=100):
+    """PDF with one large photo-like image per page, drawn at ``draw_pt``."""
+    noise = Image.effect_noise((48, 48), 64).convert("RGB")
+    raw = noise.resize((pixels, pixels), Image.BICUBIC).tobytes()
+    pdf = pikepdf.new()
+    for _ in range(pages):
+        pdf.add_blank_page(page_size=(400, 300))
+        image = pikepdf.Stream(pdf, zlib.compress(raw))
+        image.Type = pikepdf.Name.XObject
+        image.Subtype = pikepdf.Name.Image
+        image.Width = image.Height = pixels
+        image.ColorSpace = pikepdf.Name.DeviceRGB
+        image.BitsPerComponent = 8
+        image.Filter = pikepdf.Name.FlateDecode
+        page = pdf.pages[-1]
+        page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=image))
+        page.Contents = pikepdf.Stream(
+            pdf, f"q {draw_pt} 0 0 {draw_pt} 10 10 cm /Im0 Do Q".encode()
+        )
+    pdf.save(path)
+
+
+class TestOptimizePdf:
+    """Test PDF image downsampling and deduplication."""
+
+    def test_downsamples_to_target_dpi(self, tmp_path):
+        """Test images are resampled to the DPI they are displayed at."""
+        path = str(tmp_path / "deck.pdf")
+        make_pdf(path, pages=1)
+
+        stats = optimize_pdf(path, target_dpi=144)
+
+        assert stats["imagesDownsampled"] == 1
+        assert stats["bytesAfter"] < stats["bytesBefore"]
+        with pikepdf.open(path) as pdf:
+            image = pdf.pages[0].Resources.XObject.Im0
+            # 100pt is 1.39in, so 200px at 144 DPI
+            assert int(image.Width) == 200
+            assert image.Filter == pikepdf.Name.DCTDecode
+
+    def test_keeps_images_already_at_target(self, tmp_path):
+        """Test images drawn large enough for their pixels are untouched."""
+        path = str(tmp_path / "deck.pdf")
+        make_pdf(path, pixels=200, pages=1, draw_pt=100)
+
+        stats = optimize_pdf(path, target_dpi=144)
+
+        assert stats["imagesDownsampled"] == 0
+        with pikepdf.open(path) as pdf:
+            assert int(pdf.pages[0].Resources.XObject.Im0.Width) == 200
+
+    def test_deduplicates_identical_images(self, tmp_path):
+        """Test the same picture on several slides is stored once."""
+        path = str(tmp_path / "deck.pdf")
+        make_pdf(path, pages=3)
+
+        stats = optimize_pdf(path)
+
+        assert stats["imagesDeduplicated"] == 2
+        with pikepdf.open(path) as pdf:
+            objgens = {page.Resources.XObject.Im0.objgen for page in pdf.pages}
+        assert len(objgens) == 1
+
+    def test_original_kept_when_not_smaller(self, tmp_path):
+        """Test a PDF that can't be improved is left byte-for-byte intact."""
+        path = tmp_path / "deck.pdf"
+        make_pdf(str(path), pages=1)
+        optimize_pdf(str(path))
+        optimized = path.read_bytes()
+
+        stats = optimize_pdf(str(path))
+
+        assert stats["bytesAfter"] == stats["bytesBefore"]
+        assert path.read_bytes() == optimized
+
+
+class TestLinearizePdf:
+    """Test fast-web-view output."""
+
+    def test_linearize_pdf(self, tmp_path):
+        """Test a plain PDF is rewritten as linearised."""
+        path = str(tmp_path / "deck.pdf")
+        make_pdf(path, pixels=100, pages=3)
+
+        stats = linearize_pdf(path)
+
+        assert stats["linearized"] is True
+        with pikepdf.open(path) as pdf:
+            assert pdf.is_linearized
+            assert len(pdf.pages) == 3
+
+    def test_optimize_and_linearize_in_one_pass(self, tmp_path):
+        """Test linearisation is kept even when it costs a few bytes."""
+        path = tmp_path / "deck.pdf"
+        make_pdf(str(path), pages=1)
+        optimize_pdf(str(path))
+
+        stats = optimize_pdf(str(path), linearize=True)
+
+        assert stats["linearized"] is True
+        with pikepdf.open(str(path)) as pdf:
+            assert pdf.is_linearized
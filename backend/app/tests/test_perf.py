@@ -0,0 +1,167 @@
+import io
+import random
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from perf.autoscale_sim import load_trace, record_trace
+from perf.bench import BenchResult, compare, over_budget
+from perf.decks import DeckSpec, build_deck, parse_mix
+from perf.standins import FakeUnoserver, UnoserverBehaviour, parse_latency
+from perf.stats import percentile, summarize_latencies
+
+
+class TestDecks:
+    """Test synthetic deck generation."""
+
+    def test_parse_mix(self):
+        """Test deck mix parsing."""
+        mix = parse_mix("10x1:60,40x20:40")
+        assert mix[0] == (DeckSpec(10, 1024 * 1024), 60.0)
+        assert mix[1] == (DeckSpec(40, 20 * 1024 * 1024), 40.0)
+
+    def test_build_deck_is_valid_package(self):
+        """Test generated decks are readable ZIPs with one part per slide."""
+        data = build_deck(DeckSpec(3, 2 * 1024 * 1024))
+        with zipfile.ZipFile(io.BytesIO(data)) as deck:
+            names = deck.namelist()
+            assert "[Content_Types].xml" in names
+            assert len([n for n in names if n.startswith("ppt/slides/slide")]) == 3
+            assert deck.testzip() is None
+        assert len(data) >= 2 * 1024 * 1024
+
+
+class TestStandins:
+    """Test local service stand-ins."""
+
+    def test_parse_latency(self):
+        """Test latency spec parsing."""
+        assert parse_latency("const:0.5")() == 0.5
+        sample = parse_latency("uniform:1,2", random.Random(0))()
+        assert 1 <= sample <= 2
+        with pytest.raises(ValueError):
+            parse_latency("gamma:1")
+
+    def test_fake_unoserver_converts_and_fails(self):
+        """Test the fake unoserver returns PDFs and injects failures."""
+        ok = FakeUnoserver(UnoserverBehaviour(parse_latency("const:0"))).start()
+        failing = FakeUnoserver(
+            UnoserverBehaviour(parse_latency("const:0"), fail_rate=1.0)
+        ).start()
+        try:
+            host, port = ok.address
+            response = requests.post(
+                f"http://{host}:{port}/request",
+                files={"file": ("a.pptx", b"x" * 4096)},
+                timeout=5,
+            )
+            assert response.status_code == 200
+            assert response.content.startswith(b"%PDF")
+
+            host, port = failing.address
+            response = requests.post(
+                f"http://{host}:{port}/request", files={"file": b"x"}, timeout=5
+            )
+            assert response.status_code == 500
+            assert failing.counters == {"requests": 1, "failures": 1}
+        finally:
+            ok.stop()
+            failing.stop()
+
+    def test_fake_unoserver_capacity(self):
+        """Test conversions beyond the capacity wait for a free slot."""
+        behaviour = UnoserverBehaviour(parse_latency("const:0.3"), capacity=1)
+        server = FakeUnoserver(behaviour).start()
+        host, port = server.address
+
+        def convert(_):
+            requests.post(
+                f"http://{host}:{port}/request", files={"file": b"x"}, timeout=5
+            )
+
+        try:
+            start = time.monotonic()
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(convert, range(2)))
+            assert time.monotonic() - start >= 0.6
+        finally:
+            server.stop()
+
+
+class TestAutoscaleSim:
+    """Test arrival traces."""
+
+    def test_load_trace(self, tmp_path):
+        """Test traces are parsed, defaulted and sorted by offset."""
+        path = tmp_path / "trace.csv"
+        path.write_text("# offset,deck\n5,40x20\n\n0.5  # default deck\n")
+        trace = load_trace(str(path))
+        assert [offset for offset, _ in trace] == [0.5, 5.0]
+        assert trace[0][1] == parse_mix("10x1")[0][0]
+        assert trace[1][1] == parse_mix("40x20")[0][0]
+
+    def test_record_trace(self):
+        """Test registry jobs become offsets from the first arrival."""
+        jobs = [
+            {"createdAt": "2024-05-01T08:00:02.5+00:00"},
+            {"createdAt": "2024-05-01T08:00:00+00:00"},
+        ]
+        assert record_trace(jobs) == ["0.000", "2.500"]
+        assert record_trace([]) == []
+
+
+class TestStats:
+    """Test measurement helpers."""
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        summary = summarize_latencies(values)
+        assert summary["p95"] == 95
+        assert summary["max"] == 100
+
+
+class TestBenchCompare:
+    """Test benchmark regression detection."""
+
+    def _result(self, wall_s, peak):
+        return BenchResult("convert_upload_10mb", wall_s, peak, peak, {})
+
+    def test_flags_regressions_beyond_threshold(self):
+        """Test slower or hungrier results are reported."""
+        baseline = {
+            "convert_upload_10mb": {
+                "wall_s": 0.1,
+                "tracemalloc_peak": 50 * 1024 * 1024,
+                "rss_peak_delta": 50 * 1024 * 1024,
+            }
+        }
+        regressions = compare([self._result(0.2, 50 * 1024 * 1024)], baseline, 0.25)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("convert_upload_10mb.wall_s")
+
+        assert compare([self._result(0.11, 55 * 1024 * 1024)], baseline, 0.25) == []
+
+    def test_ignores_missing_and_tiny_metrics(self):
+        """Test benchmarks absent from the baseline and noise are skipped."""
+        assert compare([self._result(1.0, 0)], {}, 0.1) == []
+        baseline = {
+            "convert_upload_10mb": {
+                "wall_s": 0.0001,
+                "tracemalloc_peak": 1000,
+                "rss_peak_delta": 1000,
+            }
+        }
+        assert compare([self._result(0.0005, 4000)], baseline, 0.1) == []
+
+    def test_flags_startup_over_budget(self):
+        """Test start-up results slower than their budget are reported."""
+        fast = BenchResult("startup_api_import", 0.4, 0, 0, {"budget_s": 1.0})
+        slow = BenchResult("startup_worker_ready", 6.0, 0, 0, {"budget_s": 5.0})
+        assert over_budget([fast, self._result(9.0, 0)]) == []
+        assert over_budget([fast, slow]) == ["startup_worker_ready: 6.000s > 5.000s"]
@@ -0,0 +1,291 @@
+import io
+import zipfile
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from app.preflight import inspect_pptx  # noqa: E402
+from app.pptx_slim import EMU_PER_INCH, EXIF_ORIENTATION  # noqa: E402
+from app.pptx_slim import _downscale, slim_pptx  # noqa: E402
+
+NS = (
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+)
+REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PML = "application/vnd.openxmlformats-officedocument.presentationml"
+
+
+def jpeg(width, height):
+    out = io.BytesIO()
+    noise = Image.effect_noise((32, 24), 64).convert("RGB")
+    noise.resize((width, height), Image.BICUBIC).save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def pic(rid, cx, cy, nv_pr="<p:nvPr/>"):
+    return (
+        f'<p:pic><p:nvPicPr><p:cNvPr id="3" name="Picture"/><p:cNvPicPr/>{nv_pr}'
+        f'</p:nvPicPr><p:blipFill><a:blip r:embed="{rid}"/></p:blipFill>'
+        f'<p:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/>'
+        "</a:xfrm></p:spPr></p:pic>"
+    )
+
+
+def rels(*entries):
+    body = "".join(
+        f'<Relationship Id="{rid}" Type="{REL}/{kind}" Target="{target}"/>'
+        for rid, kind, target in entries
+    )
+    return (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+        f'relationships">{body}</Relationships>'
+    )
+
+
+def make_deck(path):
+    """One slide with a 3000px photo shown 2in wide and a video, two layouts."""
+    video = pic(
+        "rId5",
+        914400,
+        914400,
+        '<p:nvPr><a:videoFile r:link="rId3"/><p:extLst>'
+        '<p:ext uri="{DAA4B4D4-6D71-4841-9C94-3DA282D05D27}">'
+        '<p14:media xmlns:p14="http://schemas.microsoft.com/office/powerpoint/'
+        '2010/main" r:embed="rId4"/></p:ext></p:extLst></p:nvPr>',
+    )
+    slide = (
+        f"<p:sld {NS}><p:cSld><p:spTree>{pic('rId2', 1828800, 1371600)}{video}"
+        '</p:spTree></p:cSld><p:timing><p:tnLst><p:par><p:cTn id="1">'
+        '<p:childTnLst><p:video><p:cMediaNode><p:cTn id="2"/><p:tgtEl>'
+        '<p:spTgt spid="3"/></p:tgtEl></p:cMediaNode></p:video></p:childTnLst>'
+        "</p:cTn></p:par></p:tnLst></p:timing></p:sld>"
+    )
+    layout = f"<p:sldLayout {NS}><p:cSld><p:spTree/></p:cSld></p:sldLayout>"
+    master = (
+        f"<p:sldMaster {NS}><p:cSld><p:spTree/></p:cSld><p:sldLayoutIdLst>"
+        '<p:sldLayoutId id="2147483649" r:id="rId1"/>'
+        '<p:sldLayoutId id="2147483650" r:id="rId2"/>'
+        "</p:sldLayoutIdLst></p:sldMaster>"
+    )
+    overrides = "".join(
+        f'<Override PartName="/ppt/{name}" ContentType="{PML}.{kind}+xml"/>'
+        for name, kind in [
+            ("presentation.xml", "presentation.main"),
+            ("slides/slide1.xml", "slide"),
+            ("slideLayouts/slideLayout1.xml", "slideLayout"),
+            ("slideLayouts/slideLayout2.xml", "slideLayout"),
+            ("slideMasters/slideMaster1.xml", "slideMaster"),
+        ]
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as deck:
+        deck.writestr(
+            "[Content_Types].xml",
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+            f'content-types">{overrides}</Types>',
+        )
+        deck.writestr("ppt/presentation.xml", f"<p:presentation {NS}/>")
+        deck.writestr("ppt/slides/slide1.xml", slide)
+        deck.writestr(
+            "ppt/slides/_rels/slide1.xml.rels",
+            rels(
+                ("rId1", "slideLayout", "../slideLayouts/slideLayout1.xml"),
+                ("rId2", "image", "../media/image1.jpeg"),
+                ("rId3", "video", "../media/media1.mp4"),
+                ("rId4", "media", "../media/media1.mp4"),
+                ("rId5", "image", "../media/image2.jpeg"),
+            ),
+        )
+        for i in (1, 2):
+            deck.writestr(f"ppt/slideLayouts/slideLayout{i}.xml", layout)
+        deck.writestr(
+            "ppt/slideLayouts/_rels/slideLayout1.xml.rels",
+            rels(("rId1", "slideMaster", "../slideMasters/slideMaster1.xml")),
+        )
+        deck.writestr(
+            "ppt/slideLayouts/_rels/slideLayout2.xml.rels",
+            rels(
+                ("rId1", "slideMaster", "../slideMasters/slideMaster1.xml"),
+                ("rId2", "image", "../media/image3.jpeg"),
+            ),
+        )
+        deck.writestr("ppt/slideMasters/slideMaster1.xml", master)
+        deck.writestr(
+            "ppt/slideMasters/_rels/slideMaster1.xml.rels",
+            rels(
+                ("rId1", "slideLayout", "../slideLayouts/slideLayout1.xml"),
+                ("rId2", "slideLayout", "../slideLayouts/slideLayout2.xml"),
+            ),
+        )
+        deck.writestr("ppt/media/image1.jpeg", jpeg(3000, 2250))
+        deck.writestr("ppt/media/image2.jpeg", jpeg(160, 160))
+        deck.writestr("ppt/media/image3.jpeg", jpeg(100, 100))
+        deck.writestr("ppt/media/media1.mp4", b"\x00" * 100000)
+
+
+class TestSlimPptx:
+    """Test pre-conversion PPTX slimming."""
+
+    @pytest.fixture
+    def slimmed(self, tmp_path):
+        src, dst = str(tmp_path / "in.pptx"), str(tmp_path / "out.pptx")
+        make_deck(src)
+        stats = slim_pptx(src, dst, target_dpi=150)
+        with zipfile.ZipFile(dst) as deck:
+            yield stats, deck
+
+    def test_downscales_to_display_size(self, slimmed):
+        """Test a photo shown 2in wide is resized to 300px at 150 DPI."""
+        stats, deck = slimmed
+        image = Image.open(io.BytesIO(deck.read("ppt/media/image1.jpeg")))
+
+        assert image.size == (300, 225)
+        assert stats["imagesDownscaled"] == 1
+        assert stats["bytesAfter"] < stats["bytesBefore"]
+
+    def test_keeps_exif_orientation(self):
+        """Test a rotated photo keeps its orientation and is sized as shown."""
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = 6
+        out = io.BytesIO()
+        Image.open(io.BytesIO(jpeg(800, 600))).save(out, "JPEG", exif=exif)
+
+        # Stored 800x600 landscape, shown as a 2in x 2.67in portrait
+        data = _downscale(out.getvalue(), 2 * EMU_PER_INCH, 8 / 3 * EMU_PER_INCH, 150)
+
+        image = Image.open(io.BytesIO(data))
+        assert image.size == (400, 300)
+        assert image.getexif()[EXIF_ORIENTATION] == 6
+
+    def test_video_replaced_by_poster(self, slimmed):
+        """Test embedded video is dropped and its poster frame kept."""
+        stats, deck = slimmed
+        slide = deck.read("ppt/slides/slide1.xml")
+        slide_rels = deck.read("ppt/slides/_rels/slide1.xml.rels")
+
+        assert stats["mediaRemoved"] == 2
+        assert "ppt/media/media1.mp4" not in deck.namelist()
+        assert b"videoFile" not in slide and b"p14:media" not in slide
+        assert b"<p:timing>" not in slide
+        assert b'r:embed="rId5"' in slide
+        assert b"media1.mp4" not in slide_rels
+        assert "ppt/media/image2.jpeg" in deck.namelist()
+
+    def test_unused_layouts_removed(self, slimmed):
+        """Test layouts no slide uses are dropped with their media."""
+        stats, deck = slimmed
+        names = deck.namelist()
+        master = deck.read("ppt/slideMasters/slideMaster1.xml")
+
+        assert stats["layoutsRemoved"] == 1
+        assert "ppt/slideLayouts/slideLayout2.xml" not in names
+        assert "ppt/media/image3.jpeg" not in names
+        assert b'r:id="rId2"' not in master and b'r:id="rId1"' in master
+        assert b"slideLayout2" not in deck.read("[Content_Types].xml")
+
+    def test_result_passes_preflight(self, slimmed, tmp_path):
+        """Test the rewritten package is still a valid presentation."""
+        with open(tmp_path / "out.pptx", "rb") as deck:
+            assert inspect_pptx(deck).slides == 1
+
+
+def make_two_slide_deck(path):
+    """Two slides; the second has notes and a picture of its own."""
+    slide = f"<p:sld {NS}><p:cSld><p:spTree>{{}}</p:spTree></p:cSld></p:sld>"
+    overrides = "".join(
+        f'<Override PartName="/ppt/{name}" ContentType="{PML}.{kind}+xml"/>'
+        for name, kind in [
+            ("presentation.xml", "presentation.main"),
+            ("slides/slide1.xml", "slide"),
+            ("slides/slide2.xml", "slide"),
+            ("notesSlides/notesSlide2.xml", "notesSlide"),
+        ]
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as deck:
+        deck.writestr(
+            "[Content_Types].xml",
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+            f'content-types">{overrides}</Types>',
+        )
+        deck.writestr(
+            "ppt/presentation.xml",
+            f'<p:presentation {NS}><p:sldIdLst><p:sldId id="256" r:id="rId2"/>'
+            '<p:sldId id="257" r:id="rId3"/></p:sldIdLst>'
+            '<p:custShowLst><p:custShow name="All" id="0"><p:sldLst>'
+            '<p:sld r:id="rId3"/></p:sldLst></p:custShow></p:custShowLst>'
+            "</p:presentation>",
+        )
+        deck.writestr(
+            "ppt/_rels/presentation.xml.rels",
+            rels(
+                ("rId2", "slide", "slides/slide1.xml"),
+                ("rId3", "slide", "slides/slide2.xml"),
+            ),
+        )
+        deck.writestr(
+            "ppt/slides/slide1.xml", slide.format(pic("rId2", 914400, 914400))
+        )
+        deck.writestr(
+            "ppt/slides/_rels/slide1.xml.rels",
+            rels(("rId2", "image", "../media/image1.jpeg")),
+        )
+        deck.writestr(
+            "ppt/slides/slide2.xml", slide.format(pic("rId2", 914400, 914400))
+        )
+        deck.writestr(
+            "ppt/slides/_rels/slide2.xml.rels",
+            rels(
+                ("rId1", "notesSlide", "../notesSlides/notesSlide2.xml"),
+                ("rId2", "image", "../media/image2.jpeg"),
+            ),
+        )
+        deck.writestr("ppt/notesSlides/notesSlide2.xml", f"<p:notes {NS}/>")
+        deck.writestr(
+            "ppt/notesSlides/_rels/notesSlide2.xml.rels",
+            rels(("rId1", "slide", "../slides/slide2.xml")),
+        )
+        deck.writestr("ppt/media/image1.jpeg", jpeg(100, 100))
+        deck.writestr("ppt/media/image2.jpeg", jpeg(100, 100))
+
+
+class TestSlimPptxMaxSlides:
+    """Test trimming a deck to its first slides for previews."""
+
+    def test_keeps_first_slide_only(self, tmp_path):
+        """Test later slides go with their notes, media and content types."""
+        src, dst = str(tmp_path / "in.pptx"), str(tmp_path / "out.pptx")
+        make_two_slide_deck(src)
+
+        stats = slim_pptx(src, dst, max_slides=1)
+
+        with zipfile.ZipFile(dst) as deck:
+            names = deck.namelist()
+            presentation = deck.read("ppt/presentation.xml")
+            assert stats["slidesRemoved"] == 1
+            assert "ppt/slides/slide1.xml" in names
+            assert "ppt/media/image1.jpeg" in names
+            for part in (
+                "ppt/slides/slide2.xml",
+                "ppt/notesSlides/notesSlide2.xml",
+                "ppt/media/image2.jpeg",
+            ):
+                assert part not in names
+            assert b'r:id="rId3"' not in presentation
+            assert b"custShowLst" not in presentation
+            assert b"slide2" not in deck.read("ppt/_rels/presentation.xml.rels")
+            assert b"slide2" not in deck.read("[Content_Types].xml")
+        with open(dst, "rb") as deck:
+            assert inspect_pptx(deck).slides == 1
+
+    def test_short_deck_unchanged(self, tmp_path):
+        """Test decks within the limit keep all their slides."""
+        src, dst = str(tmp_path / "in.pptx"), str(tmp_path / "out.pptx")
+        make_two_slide_deck(src)
+
+        stats = slim_pptx(src, dst, max_slides=5)
+
+        assert stats["slidesRemoved"] == 0
+        with zipfile.ZipFile(dst) as deck:
+            assert "ppt/slides/slide2.xml" in deck.namelist()
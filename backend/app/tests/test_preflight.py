@@ -0,0 +1,115 @@
+import io
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from app import preflight
+from app.preflight import PreflightError, inspect_pptx
+from app.tests.factories import FileFactory
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+    <Override PartName="/ppt/presentation.xml" ContentType="application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml"/>
+    <Override PartName="/ppt/slides/slide1.xml" ContentType="application/vnd.openxmlformats-officedocument.presentationml.slide+xml"/>
+    <Override PartName="/ppt/slides/slide2.xml" ContentType="application/vnd.openxmlformats-officedocument.presentationml.slide+xml"/>
+</Types>"""
+
+
+def make_zip(entries, compression=zipfile.ZIP_DEFLATED) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+class TestInspectPptx:
+    """Test pre-flight validation of uploads."""
+
+    def test_valid_deck_report(self):
+        """Test slide and media totals are taken from the package."""
+        report = inspect_pptx(
+            make_zip(
+                {
+                    "[Content_Types].xml": CONTENT_TYPES,
+                    "ppt/slides/slide1.xml": "<p:sld/>",
+                    "ppt/slides/slide2.xml": "<p:sld/>",
+                    "ppt/media/image1.png": b"\x89PNG" + b"\x00" * 2000,
+                    "ppt/media/image2.jpeg": b"\xff\xd8" + b"\x00" * 1000,
+                }
+            )
+        )
+        assert report.slides == 2
+        assert report.media_files == 2
+        assert report.media_bytes == 2004 + 1002
+        assert report.entries == 5
+
+    def test_factory_pptx_is_accepted(self):
+        """Test the shared PPTX factory produces a deck that passes."""
+        report = inspect_pptx(io.BytesIO(FileFactory.create_pptx_file()))
+        assert report.slides == 0
+
+    def test_rejects_non_zip(self):
+        """Test corrupt or renamed binary files are rejected."""
+        with pytest.raises(PreflightError, match="not a valid .pptx"):
+            inspect_pptx(io.BytesIO(FileFactory.create_invalid_file("bad.pptx")))
+
+    def test_rejects_missing_content_types(self):
+        """Test ZIPs that are not OOXML packages are rejected."""
+        with pytest.raises(PreflightError, match="missing content types"):
+            inspect_pptx(make_zip({"readme.txt": "hello"}))
+
+    def test_rejects_other_office_documents(self):
+        """Test a renamed .docx is rejected."""
+        docx_types = CONTENT_TYPES.replace(
+            "presentationml.presentation.main", "wordprocessingml.document.main"
+        )
+        with pytest.raises(PreflightError, match="no presentation part"):
+            inspect_pptx(make_zip({"[Content_Types].xml": docx_types}))
+
+    def test_rejects_doctype(self):
+        """Test content types declaring entities are refused."""
+        evil = '<?xml version="1.0"?><!DOCTYPE t [<!ENTITY a "a">]><Types/>'
+        with pytest.raises(PreflightError, match="invalid content types"):
+            inspect_pptx(make_zip({"[Content_Types].xml": evil}))
+
+    @pytest.mark.parametrize("corrupt", ["data", "method"])
+    def test_rejects_unreadable_content_types(self, corrupt):
+        """Test a damaged content types entry is rejected, not raised as is."""
+        buffer = make_zip({"[Content_Types].xml": CONTENT_TYPES})
+        raw = bytearray(buffer.getvalue())
+        if corrupt == "data":
+            # Garble the deflate stream just past the 30-byte local header
+            start = 30 + len("[Content_Types].xml")
+            raw[start : start + 16] = b"\xff" * 16
+        else:
+            # Compression method in the central directory: unsupported
+            central = raw.rindex(b"PK\x01\x02")
+            raw[central + 10 : central + 12] = (99).to_bytes(2, "little")
+
+        with pytest.raises(PreflightError, match="not a valid .pptx"):
+            inspect_pptx(io.BytesIO(bytes(raw)))
+
+    def test_rejects_high_compression_ratio(self):
+        """Test a highly compressible large entry is treated as a zip bomb."""
+        with pytest.raises(PreflightError, match="compression ratio"):
+            inspect_pptx(
+                make_zip(
+                    {
+                        "[Content_Types].xml": CONTENT_TYPES,
+                        "ppt/media/bomb.bin": b"\x00" * (4 * 1024 * 1024),
+                    }
+                )
+            )
+
+    def test_rejects_oversized_uncompressed_total(self):
+        """Test the total uncompressed size cap."""
+        archive = make_zip(
+            {"[Content_Types].xml": CONTENT_TYPES, "ppt/media/a.bin": b"1" * 5000},
+            compression=zipfile.ZIP_STORED,
+        )
+        with patch.object(preflight, "MAX_UNCOMPRESSED_BYTES", 4096):
+            with pytest.raises(PreflightError, match="too large"):
+                inspect_pptx(archive)
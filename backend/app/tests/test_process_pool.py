@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+from app import process_pool
+
+
+def pool_pid_in_daemonic_child(results):
+    """Run in a daemonic billiard process, as in a Celery prefork child."""
+    try:
+        results.put(("ok", os.getpid(), process_pool.run_in_pool(os.getpid)))
+    except Exception as e:
+        results.put(("error", repr(e), None))
+    finally:
+        process_pool.shutdown_executor()
+
+
+class TestRunInPool:
+    """Test the per-worker CPU process pool."""
+
+    def test_runs_in_child_process(self):
+        """Test work is executed outside the calling process."""
+        try:
+            assert process_pool.run_in_pool(os.getpid) != os.getpid()
+        finally:
+            process_pool.shutdown_executor()
+
+    def test_runs_from_daemonic_process(self):
+        """Test a Celery prefork child (a daemonic process) can use the pool."""
+        billiard = pytest.importorskip("billiard")
+        # Reap our own children first: the forked child would inherit them
+        multiprocessing.active_children()
+        results = billiard.Queue()
+        child = billiard.Process(target=pool_pid_in_daemonic_child, args=(results,))
+        child.daemon = True
+        child.start()
+        try:
+            status, child_pid, pool_pid = results.get(timeout=30)
+        finally:
+            child.join(10)
+
+        assert status == "ok", child_pid
+        assert pool_pid not in (child_pid, os.getpid())
+
+    def test_reraises_remote_exception(self):
+        """Test an exception in the pool reaches the caller with its type."""
+        try:
+            with pytest.raises(ValueError, match="invalid literal") as info:
+                process_pool.run_in_pool(int, "x")
+            assert isinstance(info.value.__cause__, process_pool.RemoteTraceback)
+            # The pool process survives a failed call
+            assert process_pool.run_in_pool(int, "3") == 3
+        finally:
+            process_pool.shutdown_executor()
+
+    def test_replaces_dead_process(self):
+        """Test a pool process that dies fails its call and is replaced."""
+        try:
+            with pytest.raises(BrokenProcessPool):
+                process_pool.run_in_pool(os._exit, 1)
+            assert process_pool.run_in_pool(os.getpid) != os.getpid()
+        finally:
+            process_pool.shutdown_executor()
+
+    def test_inline_when_disabled(self):
+        """Test CPU_POOL_WORKERS=0 runs work in the caller."""
+        with patch.object(process_pool, "POOL_WORKERS", 0):
+            assert process_pool.run_in_pool(os.getpid) == os.getpid()
+
+
+class TestImapInPool:
+    """Test bounded fan-out over the pool."""
+
+    def test_yields_every_result(self):
+        """Test every call's result is produced, in any order."""
+        try:
+            results = process_pool.imap_in_pool(pow, [(n, 2) for n in range(10)])
+            assert sorted(results) == [n * n for n in range(10)]
+        finally:
+            process_pool.shutdown_executor()
+
+    def test_bounds_work_in_flight(self):
+        """Test no more than max_in_flight calls are outstanding at once."""
+        outstanding = []
+        executor = ThreadPoolExecutor(max_workers=4)
+        submit = executor.submit
+
+        def counting_submit(fn, *args):
+            outstanding.append(1)
+            return submit(fn, *args)
+
+        executor.submit = counting_submit
+        with (
+            patch.object(process_pool, "POOL_WORKERS", 4),
+            patch.object(process_pool, "get_executor", return_value=executor),
+        ):
+            peak = 0
+            for _ in process_pool.imap_in_pool(pow, [(n, 2) for n in range(50)], 3):
+                peak = max(peak, len(outstanding))
+                outstanding.pop()
+        executor.shutdown()
+
+        assert peak <= 3
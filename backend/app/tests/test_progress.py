@@ -0,0 +1,79 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from app.progress import PROGRESS_STATE, ProgressReporter
+
+
+def make_task(task_id="job-1"):
+    task = MagicMock()
+    task.request.id = task_id
+    return task
+
+
+class TestProgressReporter:
+    """Test throttled progress reporting."""
+
+    def test_stage_changes_are_written_immediately(self):
+        """Test every stage transition reaches the result backend."""
+        task = make_task()
+        progress = ProgressReporter(task, min_interval=60)
+
+        progress.stage("downloading", total=100)
+        progress.stage("converting", chunk=0, chunks=1)
+
+        assert task.update_state.call_count == 2
+        state = task.update_state.call_args.kwargs
+        assert state["state"] == PROGRESS_STATE
+        assert state["meta"] == {
+            "stage": "converting",
+            "chunk": 0,
+            "chunks": 1,
+            "progress": 15,
+        }
+
+    def test_byte_progress_is_throttled(self):
+        """Test byte callbacks are coalesced within the minimum interval."""
+        task = make_task()
+        progress = ProgressReporter(task, min_interval=1.0)
+
+        with patch("app.progress.time.monotonic", return_value=100.0):
+            progress.stage("downloading", total=1000)
+            for _ in range(9):
+                progress.advance(100)
+        assert task.update_state.call_count == 1
+        assert progress.meta["bytesDone"] == 900
+
+        with patch("app.progress.time.monotonic", return_value=101.5):
+            progress.advance(100)
+        assert task.update_state.call_count == 2
+        meta = task.update_state.call_args.kwargs["meta"]
+        assert meta["bytesDone"] == 1000
+        assert meta["progress"] == 15
+
+    def test_percent_within_stage(self):
+        """Test progress maps into the stage's share of 0-100."""
+        progress = ProgressReporter(make_task(), min_interval=0)
+        progress.stage("uploading", total=200)
+        progress.advance(100)
+        assert progress.percent() == 92
+
+    def test_disabled_without_task_id(self):
+        """Test direct calls (no worker request) never touch the backend."""
+        task = make_task(task_id=None)
+        progress = ProgressReporter(task, min_interval=0)
+        progress.stage("downloading", total=10)
+        progress.advance(10)
+        task.update_state.assert_not_called()
+        assert progress.meta["progress"] == 15
+
+    def test_reports_from_transfer_threads(self):
+        """Test callbacks on other threads still name the task."""
+        task = make_task()
+        progress = ProgressReporter(task, min_interval=0)
+        progress.stage("downloading", total=10)
+        # The request context is thread-local: empty on boto3's threads
+        task.request.id = None
+        thread = threading.Thread(target=progress.advance, args=(10,))
+        thread.start()
+        thread.join()
+        assert task.update_state.call_args.kwargs["task_id"] == "job-1"
@@ -0,0 +1,120 @@
+import inspect
+import multiprocessing
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pikepdf = pytest.importorskip("pikepdf")
+pytest.importorskip("pypdfium2")
+Image = pytest.importorskip("PIL.Image")
+
+from app import rasterize, tasks  # noqa: E402
+from app.rasterize import page_count, rasterize_pdf  # noqa: E402
+
+# The process_pool module rasterize.py itself imported
+process_pool = inspect.getmodule(rasterize.imap_in_pool)
+
+
+def make_pdf(path, pages=3):
+    """Blank one-inch pages."""
+    pdf = pikepdf.new()
+    for _ in range(pages):
+        pdf.add_blank_page(page_size=(72, 72))
+    pdf.save(path)
+
+
+def slow_render(*args):
+    """render_page that logs when it ran; runs in the pool processes."""
+    start = time.monotonic()
+    result = rasterize.render_page(*args)
+    time.sleep(0.5)
+    with open(os.environ["RENDER_LOG"], "a") as log:
+        log.write(f"{os.getpid()} {start} {time.monotonic()}\n")
+    return result
+
+
+def upload_in_daemonic_child(pdf, results):
+    """Run upload_slide_images as a Celery prefork child would."""
+    storage = MagicMock()
+    storage.url_for.side_effect = lambda key, name: key
+    try:
+        manifest = tasks.upload_slide_images(
+            storage, MagicMock(), pdf, "job", "deck", "png", dpi=36
+        )
+        results.put(("ok", [entry["slide"] for entry in manifest]))
+    except Exception as e:
+        results.put(("error", repr(e)))
+    finally:
+        process_pool.shutdown_executor()
+
+
+class TestRasterizePdf:
+    """Test per-slide image rendering."""
+
+    @pytest.mark.parametrize("fmt", ["png", "webp"])
+    def test_renders_every_page(self, tmp_path, fmt):
+        """Test each page becomes one image of the requested format and DPI."""
+        pdf = str(tmp_path / "deck.pdf")
+        make_pdf(pdf)
+
+        with patch.object(process_pool, "POOL_WORKERS", 0):
+            pages = list(rasterize_pdf(pdf, str(tmp_path), fmt, dpi=144))
+
+        assert sorted(p["slide"] for p in pages) == [1, 2, 3]
+        for page in pages:
+            assert page["path"].endswith(f"slide-{page['slide']:04d}.{fmt}")
+            with Image.open(page["path"]) as image:
+                assert image.format == fmt.upper()
+                assert image.size == (144, 144) == (page["width"], page["height"])
+
+    def test_renders_in_pool(self, tmp_path):
+        """Test pages are rendered by the process pool."""
+        pdf = str(tmp_path / "deck.pdf")
+        make_pdf(pdf, pages=4)
+        try:
+            pages = list(rasterize_pdf(pdf, str(tmp_path), "png", dpi=36))
+        finally:
+            process_pool.shutdown_executor()
+
+        assert len(pages) == page_count(pdf) == 4
+        assert all(os.path.exists(p["path"]) for p in pages)
+
+    def test_renders_concurrently_in_prefork_child(self, tmp_path, monkeypatch):
+        """Test a daemonic worker child renders pages on several processes."""
+        billiard = pytest.importorskip("billiard")
+        pdf = str(tmp_path / "deck.pdf")
+        make_pdf(pdf, pages=4)
+        log = tmp_path / "render.log"
+        monkeypatch.setenv("RENDER_LOG", str(log))
+        # Reap our own children first: the forked child would inherit them
+        multiprocessing.active_children()
+
+        results = billiard.Queue()
+        with (
+            patch.object(process_pool, "POOL_WORKERS", 2),
+            # tasks imports rasterize by its worker-side name
+            patch("rasterize.render_page", slow_render),
+        ):
+            child = billiard.Process(
+                target=upload_in_daemonic_child, args=(pdf, results)
+            )
+            child.daemon = True
+            child.start()
+            try:
+                status, slides = results.get(timeout=60)
+            finally:
+                child.join(10)
+
+        assert (status, slides) == ("ok", [1, 2, 3, 4])
+        spans = [line.split() for line in log.read_text().splitlines()]
+        assert len({pid for pid, _, _ in spans}) == 2
+        # Some page started before another one had finished
+        spans = sorted((float(start), float(end)) for _, start, end in spans)
+        assert any(later[0] < earlier[1] for earlier, later in zip(spans, spans[1:]))
+
+    def test_rejects_unknown_format(self, tmp_path):
+        """Test formats other than PNG and WebP are refused."""
+        with pytest.raises(ValueError):
+            rasterize_pdf(str(tmp_path / "deck.pdf"), str(tmp_path), "gif")
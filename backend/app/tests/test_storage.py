@@ -0,0 +1,152 @@
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app import storage
+
+
+@pytest.fixture(autouse=True)
+def reset_storage():
+    """Start every test without a cached client."""
+    storage._client = storage._client_pid = storage._transfer_config = None
+    storage._storage = None
+    yield
+    storage._client = storage._client_pid = storage._transfer_config = None
+    storage._storage = None
+
+
+class TestS3Client:
+    """Test the shared S3 client factory."""
+
+    def test_client_created_lazily_once(self):
+        """Test the client is built on first use and then reused."""
+        with patch("boto3.client") as mock_client:
+            assert mock_client.call_count == 0
+            first = storage.get_s3_client()
+            second = storage.get_s3_client()
+
+        assert first is second
+        assert mock_client.call_count == 1
+
+    def test_client_tuned_config(self):
+        """Test pool size and adaptive retries are applied."""
+        with patch("boto3.client") as mock_client:
+            storage.get_s3_client()
+
+        config = mock_client.call_args.kwargs["config"]
+        assert config.max_pool_connections == storage.MAX_POOL_CONNECTIONS
+        assert config.retries == {
+            "mode": "adaptive",
+            "max_attempts": storage.MAX_ATTEMPTS,
+        }
+
+    def test_new_client_after_fork(self):
+        """Test a forked worker child does not reuse the parent's client."""
+        with patch("boto3.client") as mock_client:
+            storage.get_s3_client()
+            with patch("app.storage.os.getpid", return_value=-1):
+                storage.get_s3_client()
+
+        assert mock_client.call_count == 2
+
+
+class TestTransferConfig:
+    """Test multipart transfer configuration."""
+
+    def test_transfer_config(self):
+        """Test part size and thread count for large transfers."""
+        config = storage.get_transfer_config()
+        mb = 1024 * 1024
+        assert config.multipart_chunksize == storage.MULTIPART_CHUNKSIZE_MB * mb
+        assert config.multipart_threshold == storage.MULTIPART_THRESHOLD_MB * mb
+        assert config.max_concurrency < storage.MAX_POOL_CONNECTIONS
+        assert storage.get_transfer_config() is config
+
+
+class TestGetStorage:
+    """Test backend selection."""
+
+    def test_filesystem_backend_selected(self, tmp_path):
+        """Test STORAGE_BACKEND=filesystem returns a cached FilesystemStorage."""
+        with (
+            patch.object(storage, "STORAGE_BACKEND", "filesystem"),
+            patch.object(storage, "STORAGE_ROOT", str(tmp_path)),
+            patch.dict(os.environ, {"STORAGE_SIGNING_KEY": "secret"}),
+        ):
+            backend = storage.get_storage()
+
+            assert isinstance(backend, storage.FilesystemStorage)
+            assert storage.get_storage() is backend
+
+    def test_filesystem_backend_requires_signing_key(self, tmp_path):
+        """Test download links are never signed with an empty key."""
+        with pytest.raises(ValueError, match="STORAGE_SIGNING_KEY"):
+            storage.FilesystemStorage(str(tmp_path), "")
+
+
+class TestFilesystemStorage:
+    """Test the shared-volume storage backend."""
+
+    @pytest.fixture
+    def fs(self, tmp_path):
+        return storage.FilesystemStorage(str(tmp_path / "store"), "secret")
+
+    def test_upload_download_roundtrip(self, fs, tmp_path):
+        """Test files round-trip and the callback sees every byte."""
+        source = tmp_path / "in.pdf"
+        source.write_bytes(b"x" * (storage.COPY_CHUNK + 10))
+        seen = []
+
+        fs.upload(str(source), "job.pdf", callback=seen.append)
+        fs.download("job.pdf", str(tmp_path / "out.pdf"), callback=seen.append)
+
+        assert (tmp_path / "out.pdf").read_bytes() == source.read_bytes()
+        assert sum(seen) == 2 * source.stat().st_size
+
+    def test_failed_write_leaves_nothing(self, fs):
+        """Test an interrupted write is not visible under its key."""
+
+        class Broken:
+            def read(self, size):
+                raise OSError("disk gone")
+
+        with pytest.raises(OSError):
+            fs._atomic_write("job.pdf", lambda out: fs._copy(Broken(), out, None))
+
+        assert not os.path.exists(os.path.join(fs.root, "job.pdf"))
+        assert os.listdir(os.path.join(fs.root, fs.TMP_DIR)) == []
+
+    def test_rejects_path_traversal(self, fs):
+        """Test keys cannot escape the storage root."""
+        with pytest.raises(ValueError):
+            fs.put_bytes("../outside.pdf", b"x")
+
+    def test_token_roundtrip(self, fs):
+        """Test a signed token resolves to the key's path and filename."""
+        token = fs.make_token("job.pdf", "deck.pdf")
+
+        path, filename = fs.resolve_token(token)
+
+        assert path == os.path.join(fs.root, "job.pdf")
+        assert filename == "deck.pdf"
+
+    def test_token_signed_with_other_key_rejected(self, fs, tmp_path):
+        """Test tokens from another secret are refused."""
+        other = storage.FilesystemStorage(str(tmp_path / "store"), "other")
+
+        with pytest.raises(storage.InvalidToken):
+            fs.resolve_token(other.make_token("job.pdf", "deck.pdf"))
+
+    def test_delete_older_than(self, fs):
+        """Test retention removes only files older than the cutoff."""
+        fs.put_bytes("old.pdf", b"x")
+        fs.put_bytes("new.pdf", b"x")
+        old = (datetime.now() - timedelta(days=2)).timestamp()
+        os.utime(fs.path_for("old.pdf"), (old, old))
+
+        deleted = fs.delete_older_than(datetime.now() - timedelta(days=1))
+
+        assert deleted == 1
+        assert sorted(os.listdir(fs.root)) == [fs.TMP_DIR, "new.pdf"]
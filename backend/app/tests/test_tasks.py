@@ -1,12 +1,14 @@
 # backend/app/tests/conftest.py (SIMPLIFIED VERSION)
 import os
 import tempfile
+import zipfile
 from unittest.mock import Mock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.tests.factories import FileFactory
 
 
 @pytest.fixture
@@ -34,8 +36,7 @@ def mock_env_vars():
 @pytest.fixture
 def sample_pptx_file():
     """Create a sample PPTX file for testing."""
-    content = b"PK\x03\x04\x14\x00\x06\x00\x08\x00!\x00" + b"A" * 1000
-    return content
+    return FileFactory.create_pptx_file()
 
 
 @pytest.fixture
@@ -57,16 +58,12 @@ from app.main import app
 class TestConvertEndpointSimple:
     """Simplified tests for the /convert endpoint."""
 
-    def test_convert_success(self, test_client, mock_env_vars, sample_pptx_file):
+    def test_convert_success(
+        self, test_client, mock_env_vars, sample_pptx_file, mock_s3
+    ):
         """Test successful file conversion."""
-        mock_task = Mock()
-        mock_task.id = "test-job-123"
-
-        with patch("app.main.convert_task") as mock_convert_task, patch(
-            "app.main.s3"
-        ) as mock_s3:
+        with patch("app.main.celery") as mock_celery:
 
-            mock_convert_task.delay.return_value = mock_task
             mock_s3.put_object.return_value = None
 
             files = {
@@ -82,7 +79,10 @@ class TestConvertEndpointSimple:
             assert response.status_code == 200
             data = response.json()
             assert "jobId" in data
-            assert data["jobId"] == "test-job-123"
+            assert (
+                data["jobId"]
+                == mock_celery.send_task.call_args_list[0].kwargs["task_id"]
+            )
 
     def test_convert_invalid_file_extension(self, test_client, mock_env_vars):
         """Test conversion with invalid file extension."""
@@ -157,14 +157,15 @@ from app.tasks import cleanup_old_files, convert_task
 class TestConvertTaskSimple:
     """Simplified tests for the convert_task."""
 
-    @patch("app.tasks.s3")
     @patch("app.tasks.requests.post")
     @patch("builtins.open", new_callable=mock_open)
     @patch("os.remove")
+    @patch("os.path.getsize", return_value=len(b"%PDF"))
     @patch("tempfile.gettempdir")  # Mock temp directory for Windows
     def test_convert_task_success(
         self,
         mock_tempdir,
+        mock_getsize,
         mock_remove,
         mock_file_open,
         mock_requests_post,
@@ -182,7 +183,7 @@ class TestConvertTaskSimple:
 
         # Mock unoserver response
         mock_response = MagicMock()
-        mock_response.content = sample_pdf_file
+        mock_response.iter_content.return_value = [sample_pdf_file]
         mock_response.raise_for_status.return_value = None
         mock_requests_post.return_value = mock_response
 
@@ -197,7 +198,6 @@ class TestConvertTaskSimple:
         mock_s3.upload_file.assert_called_once()
         mock_s3.generate_presigned_url.assert_called_once()
 
-    @patch("app.tasks.s3")
     def test_convert_task_s3_download_failure(self, mock_s3):
         """Test convert task when S3 download fails."""
         mock_s3.download_file.side_effect = Exception("S3 download failed")
@@ -205,11 +205,240 @@ class TestConvertTaskSimple:
         with pytest.raises(Exception, match="S3 download failed"):
             convert_task("test-pptx-key", "test-presentation")
 
+    @patch("app.tasks.requests.post")
+    def test_unoserver_response_streamed_to_disk(self, mock_requests_post, tmp_path):
+        """Test the converted file is written in chunks, not buffered whole."""
+        from app.tasks import convert_with_unoserver
+
+        pptx = tmp_path / "deck.pptx"
+        pptx.write_bytes(b"PK")
+        mock_response = MagicMock()
+        mock_response.iter_content.return_value = [b"%PDF-", b"1.4"]
+        mock_requests_post.return_value = mock_response
+
+        convert_with_unoserver(str(pptx), str(tmp_path / "deck.pdf"))
+
+        assert (tmp_path / "deck.pdf").read_bytes() == b"%PDF-1.4"
+        assert mock_requests_post.call_args.kwargs["stream"] is True
+        mock_response.close.assert_called_once()
+
+    @patch("app.tasks.convert_embedded")
+    @patch("app.tasks.requests.post")
+    @patch("os.remove")
+    @patch("os.path.getsize", return_value=1024)
+    def test_convert_task_embedded_backend(
+        self,
+        mock_getsize,
+        mock_remove,
+        mock_requests_post,
+        mock_convert_embedded,
+        mock_s3,
+    ):
+        """Test the embedded LibreOffice pool replaces the HTTP path."""
+        mock_s3.generate_presigned_url.return_value = "https://example.com/file.pdf"
+
+        with patch("app.tasks.CONVERTER_BACKEND", "embedded"):
+            result = convert_task("test-pptx-key", "test-presentation")
+
+        assert result == {"url": "https://example.com/file.pdf"}
+        mock_convert_embedded.assert_called_once()
+        mock_requests_post.assert_not_called()
+
+    @patch("app.tasks.run_in_pool")
+    @patch("app.tasks.convert_with_unoserver")
+    @patch("os.remove")
+    @patch("os.path.getsize", return_value=1024)
+    def test_convert_task_records_optimization(
+        self, mock_getsize, mock_remove, mock_convert, mock_run_in_pool, mock_s3
+    ):
+        """Test optimisation runs in the CPU pool and its sizes are returned."""
+        stats = {"bytesBefore": 4096, "bytesAfter": 1024}
+        mock_run_in_pool.return_value = stats
+
+        result = convert_task(
+            "test-pptx-key",
+            "test-presentation",
+            options={"optimize": True, "target_dpi": 96},
+        )
+
+        assert result["optimization"] == stats
+        assert mock_run_in_pool.call_args.kwargs["target_dpi"] == 96
+
+    @patch("app.tasks.run_in_pool", side_effect=ValueError("bad xref"))
+    @patch("app.tasks.convert_with_unoserver")
+    @patch("os.remove")
+    @patch("os.path.getsize", return_value=1024)
+    def test_convert_task_optimization_failure_keeps_pdf(
+        self, mock_getsize, mock_remove, mock_convert, mock_run_in_pool, mock_s3
+    ):
+        """Test a failed optimisation uploads the PDF as converted."""
+        mock_s3.generate_presigned_url.return_value = "https://example.com/file.pdf"
+
+        result = convert_task(
+            "test-pptx-key", "test-presentation", options={"optimize": True}
+        )
+
+        assert result["url"] == "https://example.com/file.pdf"
+        assert result["optimization"] == {"skipped": True, "error": "bad xref"}
+        mock_s3.upload_file.assert_called_once()
+
+    @patch("app.tasks.run_in_pool")
+    @patch("app.tasks.convert_with_unoserver")
+    @patch("os.remove")
+    @patch("os.path.getsize", return_value=1024)
+    def test_convert_task_linearize_only(
+        self, mock_getsize, mock_remove, mock_convert, mock_run_in_pool, mock_s3
+    ):
+        """Test linearisation without optimisation uses linearize_pdf."""
+        from app.tasks import linearize_pdf
+
+        mock_run_in_pool.return_value = {"linearized": True}
+
+        result = convert_task(
+            "test-pptx-key", "test-presentation", options={"linearize": True}
+        )
+
+        assert mock_run_in_pool.call_args.args[0] is linearize_pdf
+        assert result["optimization"] == {"linearized": True}
+
+    @patch("app.tasks.run_in_pool")
+    @patch("app.tasks.convert_with_unoserver")
+    @patch("os.replace")
+    @patch("os.remove")
+    @patch("os.path.getsize", return_value=1024)
+    def test_convert_task_slims_before_converting(
+        self,
+        mock_getsize,
+        mock_remove,
+        mock_replace,
+        mock_convert,
+        mock_run_in_pool,
+        mock_s3,
+    ):
+        """Test the deck is slimmed first and conversion time is recorded."""
+        from app.tasks import slim_pptx
+
+        mock_run_in_pool.return_value = {"bytesBefore": 4096, "bytesAfter": 1024}
+
+        result = convert_task(
+            "test-pptx-key", "test-presentation", options={"slim": True}
+        )
+
+        assert mock_run_in_pool.call_args.args[0] is slim_pptx
+        mock_convert.assert_called_once()
+        assert result["slimming"]["bytesAfter"] == 1024
+        assert "conversionSeconds" in result["slimming"]
+
+    @patch("app.tasks.run_in_pool", side_effect=zipfile.BadZipFile("bad CRC"))
+    @patch("app.tasks.convert_with_unoserver")
+    @patch("os.replace")
+    @patch("os.remove")
+    @patch("os.path.exists", return_value=True)
+    @patch("os.path.getsize", return_value=1024)
+    def test_convert_task_slim_failure_converts_original(
+        self,
+        mock_getsize,
+        mock_exists,
+        mock_remove,
+        mock_replace,
+        mock_convert,
+        mock_run_in_pool,
+        mock_s3,
+    ):
+        """Test a failed slim drops its partial output and converts the upload."""
+        result = convert_task(
+            "test-pptx-key", "test-presentation", options={"slim": True}
+        )
+
+        local_pptx, local_slim = mock_run_in_pool.call_args.args[1:3]
+        mock_replace.assert_not_called()
+        mock_remove.assert_any_call(local_slim)
+        assert mock_convert.call_args.args[0] == local_pptx
+        assert result["slimming"]["skipped"] is True
+        assert result["slimming"]["error"] == "bad CRC"
+
+    @patch("app.tasks.page_count", return_value=3)
+    @patch("app.tasks.rasterize_pdf")
+    @patch("app.tasks.convert_with_unoserver")
+    def test_convert_task_image_manifest(
+        self, mock_convert, mock_rasterize, mock_page_count, fs_storage
+    ):
+        """Test slides are uploaded as rendered and listed in slide order."""
+        fs_storage.put_bytes("abc_deck.pptx", b"PK")
+        mock_convert.side_effect = lambda src, dst, fmt: open(dst, "wb").write(b"%PDF")
+
+        def render(pdf, out_dir, fmt, dpi=None, pages=None):
+            # Completion order, not page order
+            for number in (2, 1, 3):
+                path = os.path.join(out_dir, f"slide-{number:04d}.{fmt}")
+                with open(path, "wb") as image:
+                    image.write(b"RIFF")
+                yield {"slide": number, "path": path, "width": 8, "height": 6}
+
+        mock_rasterize.side_effect = render
+
+        result = convert_task(
+            "abc_deck.pptx", "deck", options={"convert_to": "webp", "dpi": 96}
+        )
+
+        assert mock_rasterize.call_args.kwargs["dpi"] == 96
+        assert result["format"] == "webp"
+        assert result["slides"] == 3
+        assert [image["slide"] for image in result["images"]] == [1, 2, 3]
+        assert "url" not in result
+        stored = os.listdir(fs_storage.root)
+        assert len([name for name in stored if name.endswith(".webp")]) == 3
+
+
+class TestJobRegistrySignals:
+    """Test convert_task's status reaches the job registry."""
+
+    def test_statuses_follow_task(self, job_registry):
+        """Test start, success and failure signals update the job."""
+        from app.tasks import job_done, job_failed, job_started
+
+        job_registry.create("job-1")
+        job_registry.create("job-2")
+
+        job_started(task_id="job-1")
+        assert job_registry.get("job-1")["status"] == "processing"
+        job_done(sender=Mock(request=Mock(id="job-1")), result={"slides": 4})
+        job_failed(task_id="job-2", exception=RuntimeError("LibreOffice crashed"))
+
+        assert job_registry.get("job-1")["status"] == "done"
+        assert job_registry.get("job-1")["slides"] == 4
+        assert job_registry.get("job-2")["error"] == "LibreOffice crashed"
+
+
+class TestPreviewTask:
+    """Tests for the first-slide preview task."""
+
+    @patch("app.tasks.convert_with_unoserver")
+    @patch("app.tasks.run_in_pool")
+    def test_preview_task_renders_first_slide(
+        self, mock_run_in_pool, mock_convert, fs_storage
+    ):
+        """Test the deck is cut to one slide and stored as a PNG next to it."""
+        from app.tasks import preview_task, slim_pptx
+
+        fs_storage.put_bytes("abc_deck.pptx", b"PK")
+        mock_convert.side_effect = lambda src, dst, convert_to: open(dst, "wb").write(
+            b"\x89PNG"
+        )
+
+        result = preview_task("abc_deck.pptx", "deck")
+
+        assert mock_run_in_pool.call_args.args[0] is slim_pptx
+        assert mock_run_in_pool.call_args.kwargs["max_slides"] == 1
+        assert mock_convert.call_args.args[2] == "png"
+        with open(fs_storage.path_for("abc_deck.preview.png"), "rb") as png:
+            assert png.read() == b"\x89PNG"
+        assert result["url"].startswith("http://testserver/download/")
+
 
 class TestCleanupOldFilesSimple:
     """Simplified tests for cleanup_old_files."""
 
-    @patch("app.tasks.s3")
     def test_cleanup_old_files_success(self, mock_s3):
         """Test successful cleanup of old files."""
         old_time = datetime.now() - timedelta(days=2)
@@ -228,7 +457,6 @@ class TestCleanupOldFilesSimple:
         assert mock_s3.delete_object.call_count == 1
         assert "Deleted 1 files" in result
 
-    @patch("app.tasks.s3")
     def test_cleanup_no_files_in_bucket(self, mock_s3):
         """Test cleanup when bucket is empty."""
         mock_s3.list_objects_v2.return_value = {}
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+from unittest.mock import Mock, patch
+
+from app import main, warmup
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestWarmInBackground:
+    """Test start-up warm-up threads."""
+
+    def test_runs_step_on_daemon_thread(self):
+        """Test the step runs off the calling thread."""
+        step = Mock(__name__="step")
+        thread = warmup.warm_in_background(step)
+        thread.join(timeout=5)
+        assert thread.daemon
+        step.assert_called_once_with()
+
+    def test_failure_is_only_logged(self, caplog):
+        """Test a failing step leaves the process running."""
+        step = Mock(__name__="step", side_effect=ConnectionError("redis down"))
+        warmup.warm_in_background(step).join(timeout=5)
+        assert "Warm-up step failed" in caplog.text
+
+    def test_off(self):
+        """Test STARTUP_WARMUP=off leaves everything to first use."""
+        step = Mock(__name__="step")
+        with patch.object(warmup, "STARTUP_WARMUP", "off"):
+            assert warmup.warm_in_background(step) is None
+        step.assert_not_called()
+
+
+class TestLazyImports:
+    """Test the API starts without the worker's dependencies."""
+
+    def test_api_does_not_import_tasks(self):
+        """Test importing main loads neither tasks.py nor boto3."""
+        code = (
+            "import sys, main; "
+            "print(sorted(m for m in ('tasks', 'boto3', 'requests') "
+            "if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=APP_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert output.strip() == "[]"
+
+    def test_task_names_match_worker(self):
+        """Test the names /convert enqueues are those the worker registers."""
+        # What a worker does on start: import the modules in include=[...]
+        main.celery.loader.import_default_modules()
+        assert main.CONVERT_TASK in main.celery.tasks
+        assert main.PREVIEW_TASK in main.celery.tasks
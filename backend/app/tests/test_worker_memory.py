@@ -0,0 +1,163 @@
+from unittest.mock import MagicMock, patch
+
+from app import worker_memory
+
+
+def write_meminfo(tmp_path, total_kb, available_kb):
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text(
+        f"MemTotal:       {total_kb} kB\n"
+        f"MemFree:        {available_kb // 2} kB\n"
+        f"MemAvailable:   {available_kb} kB\n"
+    )
+    return str(meminfo)
+
+
+def open_redirected(paths):
+    """``open`` with some absolute paths redirected to test files."""
+    real_open = open
+    return lambda path, *args, **kwargs: real_open(
+        paths.get(path, path), *args, **kwargs
+    )
+
+
+class TestRssReadings:
+    """Test reading this process' memory use."""
+
+    def test_rss_and_peak(self):
+        """Test current and peak RSS are read and consistent."""
+        rss = worker_memory.rss_bytes()
+        assert rss > 0
+        assert worker_memory.peak_rss_bytes() >= rss
+
+    def test_available_memory_fraction(self, tmp_path):
+        """Test the host fraction comes from MemAvailable over MemTotal."""
+        paths = {"/proc/meminfo": write_meminfo(tmp_path, 1000, 250)}
+        with (
+            patch("builtins.open", side_effect=open_redirected(paths)),
+            patch.object(worker_memory, "CGROUP_MEMORY_MAX", str(tmp_path / "no")),
+        ):
+            assert worker_memory.available_memory_fraction() == 0.25
+
+    def test_cgroup_limit_takes_precedence_when_lower(self, tmp_path):
+        """Test a container close to its memory limit counts as short."""
+        paths = {"/proc/meminfo": write_meminfo(tmp_path, 1000, 800)}
+        (tmp_path / "memory.max").write_text("1000\n")
+        (tmp_path / "memory.current").write_text("900\n")
+        with (
+            patch("builtins.open", side_effect=open_redirected(paths)),
+            patch.object(
+                worker_memory, "CGROUP_MEMORY_MAX", str(tmp_path / "memory.max")
+            ),
+            patch.object(
+                worker_memory,
+                "CGROUP_MEMORY_CURRENT",
+                str(tmp_path / "memory.current"),
+            ),
+        ):
+            assert round(worker_memory.available_memory_fraction(), 2) == 0.1
+
+
+class TestRouteLargeDecks:
+    """Test routing of large decks to their own queue."""
+
+    def test_large_deck(self):
+        """Test a deck at the threshold goes to the large queue."""
+        deck = {"uncompressed_bytes": worker_memory.LARGE_DECK_MB * worker_memory.MB}
+        route = worker_memory.route_large_decks(
+            "tasks.convert_task", (), {"deck": deck}, {}
+        )
+        assert route == {"queue": "large"}
+
+    def test_small_or_unknown_deck(self):
+        """Test small decks, missing summaries and other tasks are not routed."""
+        small = {"deck": {"uncompressed_bytes": 1024}}
+        assert (
+            worker_memory.route_large_decks("tasks.convert_task", (), small, {}) is None
+        )
+        assert worker_memory.route_large_decks("tasks.convert_task", (), {}, {}) is None
+        assert (
+            worker_memory.route_large_decks("tasks.preview_task", (), None, {}) is None
+        )
+
+
+class TestMemoryPressureGuard:
+    """Test the large queue is paused and resumed with hysteresis."""
+
+    def make_guard(self):
+        return worker_memory.MemoryPressureGuard(MagicMock())
+
+    def test_pauses_then_resumes(self):
+        """Test consumption stops below the minimum and resumes above resume."""
+        guard = self.make_guard()
+        consumer = MagicMock()
+        readings = [0.5, 0.1, 0.2, 0.3]
+        with patch.object(
+            worker_memory, "available_memory_fraction", side_effect=readings
+        ):
+            guard.check(consumer)
+            consumer.cancel_task_queue.assert_not_called()
+
+            guard.check(consumer)
+            consumer.cancel_task_queue.assert_called_once_with("large")
+            assert guard.paused
+
+            # Between the two thresholds: still paused
+            guard.check(consumer)
+            consumer.add_task_queue.assert_not_called()
+
+            guard.check(consumer)
+            consumer.add_task_queue.assert_called_once_with("large")
+            assert not guard.paused
+
+    def test_only_started_for_large_queue_consumers(self):
+        """Test workers not consuming the large queue run no checks."""
+        guard = self.make_guard()
+        consumer = MagicMock()
+        previews = MagicMock()
+        previews.name = "previews"
+        consumer.task_consumer.queues = [previews]
+        guard.start(consumer)
+        consumer.timer.call_repeatedly.assert_not_called()
+
+        large = MagicMock()
+        large.name = "large"
+        consumer.task_consumer.queues = [previews, large]
+        guard.start(consumer)
+        consumer.timer.call_repeatedly.assert_called_once()
+        guard.stop(consumer)
+        consumer.timer.call_repeatedly.return_value.cancel.assert_called_once()
+
+
+class TestTaskTelemetry:
+    """Test per-task RSS telemetry."""
+
+    def test_records_usage_between_prerun_and_postrun(self, caplog):
+        """Test a task's RSS before, after, delta and peak are logged."""
+        task = MagicMock()
+        task.name = "tasks.convert_task"
+        with (
+            patch.object(
+                worker_memory,
+                "rss_bytes",
+                side_effect=[100 * worker_memory.MB, 130 * worker_memory.MB],
+            ),
+            patch.object(
+                worker_memory, "peak_rss_bytes", return_value=180 * worker_memory.MB
+            ),
+            caplog.at_level("INFO", logger=worker_memory.__name__),
+        ):
+            worker_memory.record_rss_before(task_id="job-1", task=task)
+            worker_memory.record_rss_after(task_id="job-1", task=task, state="SUCCESS")
+
+        assert caplog.messages == [
+            "Task tasks.convert_task[job-1] SUCCESS: "
+            "rss 100.0 -> 130.0 MiB (+30.0 MiB), peak 180.0 MiB"
+        ]
+        assert "job-1" not in worker_memory._rss_before
+
+    def test_postrun_without_prerun(self, caplog):
+        """Test an unknown task id is ignored."""
+        with caplog.at_level("INFO", logger=worker_memory.__name__):
+            worker_memory.record_rss_after(task_id="unknown")
+        assert caplog.messages == []
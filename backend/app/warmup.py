@@ -0,0 +1,79 @@
+"""
+Start-up warm-up for the API and worker processes.
+
+Nothing expensive happens at import time: boto3, the job registry's client,
+Celery's result backend and the CPU process pool are all created on first
+use (``storage.get_s3_client``, ``jobs.get_job_registry``, ...), which keeps
+imports fast but makes the first request or task pay for them.
+
+With ``STARTUP_WARMUP=background`` (the default) ``main.py`` and
+``tasks.py`` build them on a daemon thread right after start-up instead, so
+the API binds its port and the worker accepts tasks without waiting for
+them. A request that needs a client before the thread has built it simply
+builds it itself. ``STARTUP_WARMUP=off`` leaves everything to first use.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+
+
+def warm_storage() -> None:
+    from storage import STORAGE_BACKEND, get_s3_client, get_storage
+
+    get_storage()
+    if STORAGE_BACKEND == "s3":
+        get_s3_client()
+
+
+def warm_api() -> None:
+    """Clients used by /convert and /status."""
+    from celery_app import celery
+    from jobs import get_job_registry
+
+    warm_storage()
+    get_job_registry()
+    # Result backend client and the producer pool send_task publishes from
+    celery.backend
+    celery.producer_pool
+
+
+def warm_worker() -> None:
+    """Clients and pools used by convert_task."""
+    from jobs import get_job_registry
+    from process_pool import POOL_WORKERS, run_in_pool
+    from storage import STORAGE_BACKEND, get_transfer_config
+
+    warm_storage()
+    if STORAGE_BACKEND == "s3":
+        get_transfer_config()
+    get_job_registry()
+    if POOL_WORKERS > 0:
+        # Pool processes are only started on first submit
+        run_in_pool(int)
+
+
+def _run(step: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    try:
+        step()
+    except Exception:
+        # First use will try again (and fail loudly if it is still broken)
+        logger.warning("Warm-up %s failed", step.__name__, exc_info=True)
+        return
+    logger.info("Warm-up %s took %.3fs", step.__name__, time.perf_counter() - start)
+
+
+def warm_in_background(step: Callable[[], None]) -> Optional[threading.Thread]:
+    """Run ``step`` on a daemon thread unless ``STARTUP_WARMUP`` is off."""
+    if STARTUP_WARMUP != "background":
+        return None
+    thread = threading.Thread(target=_run, args=(step,), name="warmup", daemon=True)
+    thread.start()
+    return thread
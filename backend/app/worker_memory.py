@@ -0,0 +1,200 @@
+"""
+Worker memory guardrails and per-task RSS telemetry.
+
+Long-running worker children grow in RSS (large transfer buffers, boto3 and
+allocator fragmentation) until the kernel OOM-kills one mid-conversion.
+``celery_app.py`` wires up three defences from this module:
+
+- children are recycled between tasks after ``WORKER_MAX_TASKS_PER_CHILD``
+  tasks or once their RSS passed ``WORKER_MAX_MEMORY_MB`` (Celery's own
+  ``worker_max_*_per_child``, checked after a task finishes)
+- ``route_large_decks`` sends decks of ``LARGE_DECK_MB`` or more
+  (uncompressed) to the ``large`` queue, and ``MemoryPressureGuard`` stops
+  consuming that queue while the host or container has less than
+  ``MEMORY_PRESSURE_MIN_AVAILABLE`` of its memory available, resuming above
+  ``MEMORY_PRESSURE_RESUME_AVAILABLE``; small jobs keep flowing
+- ``task_prerun``/``task_postrun`` handlers log each task's RSS before and
+  after, the difference, and its peak RSS
+
+Peak RSS is per task where the kernel allows resetting the high-water mark
+(``/proc/self/clear_refs``); otherwise it is the child's peak so far.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from celery import bootsteps
+from celery.signals import task_postrun, task_prerun
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+LARGE_QUEUE = "large"
+LARGE_DECK_MB = int(os.getenv("LARGE_DECK_MB", 100))
+MIN_AVAILABLE = float(os.getenv("MEMORY_PRESSURE_MIN_AVAILABLE", 0.15))
+RESUME_AVAILABLE = max(
+    MIN_AVAILABLE, float(os.getenv("MEMORY_PRESSURE_RESUME_AVAILABLE", 0.25))
+)
+CHECK_INTERVAL = float(os.getenv("MEMORY_PRESSURE_CHECK_INTERVAL", 5.0))
+
+# cgroup v2 files, read when the worker runs in a memory-limited container
+CGROUP_MEMORY_MAX = "/sys/fs/cgroup/memory.max"
+CGROUP_MEMORY_CURRENT = "/sys/fs/cgroup/memory.current"
+
+# task id -> RSS in bytes when it started
+_rss_before: Dict[str, int] = {}
+
+
+def _proc_status_kb(field: str, pid: Optional[int] = None) -> int:
+    """A ``Vm*`` field of /proc/<pid>/status in KiB, 0 if unavailable."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def rss_bytes(pid: Optional[int] = None) -> int:
+    """RSS of ``pid`` (default: this process) in bytes."""
+    return _proc_status_kb("VmRSS", pid) * 1024
+
+
+def peak_rss_bytes() -> int:
+    return _proc_status_kb("VmHWM") * 1024
+
+
+def reset_peak_rss() -> bool:
+    """Reset this process' RSS high-water mark; False if not permitted."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):  # missing, or "max" (no limit)
+        return None
+
+
+def available_memory_fraction() -> Optional[float]:
+    """
+    Fraction of memory still available, the lower of the host's
+    (``MemAvailable``) and the container's cgroup limit, if any.
+    """
+    fractions = []
+    meminfo: Dict[str, int] = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                meminfo[name] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    if meminfo.get("MemTotal") and "MemAvailable" in meminfo:
+        fractions.append(meminfo["MemAvailable"] / meminfo["MemTotal"])
+
+    limit = _read_int(CGROUP_MEMORY_MAX)
+    current = _read_int(CGROUP_MEMORY_CURRENT)
+    if limit and current is not None:
+        fractions.append(max(0.0, 1 - current / limit))
+    return min(fractions) if fractions else None
+
+
+def route_large_decks(
+    name: str, args: Any, kwargs: Any, options: Any, task: Any = None, **kw: Any
+) -> Optional[dict]:
+    """Celery router: convert_task for large decks goes to the large queue."""
+    if name != "tasks.convert_task":
+        return None
+    deck = (kwargs or {}).get("deck") or {}
+    if deck.get("uncompressed_bytes", 0) >= LARGE_DECK_MB * MB:
+        return {"queue": LARGE_QUEUE}
+    return None
+
+
+class MemoryPressureGuard(bootsteps.StartStopStep):
+    """Stop consuming the large-deck queue while memory is short."""
+
+    requires = ("celery.worker.consumer.tasks:Tasks",)
+
+    def __init__(self, parent: Any, **kwargs: Any):
+        super().__init__(parent, **kwargs)
+        self.paused = False
+        self.tref: Any = None
+
+    def start(self, consumer: Any) -> None:
+        queues = {queue.name for queue in consumer.task_consumer.queues}
+        # Only workers started with -Q ...,large are guarded; a paused queue
+        # is missing from the list after a consumer restart
+        if LARGE_QUEUE not in queues and not self.paused:
+            return
+        self.tref = consumer.timer.call_repeatedly(
+            CHECK_INTERVAL, self.check, (consumer,), priority=10
+        )
+
+    def stop(self, consumer: Any) -> None:
+        if self.tref is not None:
+            self.tref.cancel()
+            self.tref = None
+
+    def check(self, consumer: Any) -> None:
+        available = available_memory_fraction()
+        if available is None:
+            return
+        if not self.paused and available < MIN_AVAILABLE:
+            logger.warning(
+                "Memory available %.0f%% < %.0f%%, pausing queue %r",
+                available * 100,
+                MIN_AVAILABLE * 100,
+                LARGE_QUEUE,
+            )
+            consumer.cancel_task_queue(LARGE_QUEUE)
+            self.paused = True
+        elif self.paused and available >= RESUME_AVAILABLE:
+            logger.info(
+                "Memory available %.0f%%, resuming queue %r",
+                available * 100,
+                LARGE_QUEUE,
+            )
+            consumer.add_task_queue(LARGE_QUEUE)
+            self.paused = False
+
+
+@task_prerun.connect
+def record_rss_before(task_id: Optional[str] = None, **kwargs: Any) -> None:
+    if task_id is None:
+        return
+    reset_peak_rss()
+    _rss_before[task_id] = rss_bytes()
+
+
+@task_postrun.connect
+def record_rss_after(
+    task_id: Optional[str] = None,
+    task: Any = None,
+    state: Optional[str] = None,
+    **kwargs: Any,
+) -> None:
+    before = _rss_before.pop(task_id, None) if task_id else None
+    if before is None:
+        return
+    after = rss_bytes()
+    logger.info(
+        "Task %s[%s] %s: rss %.1f -> %.1f MiB (%+.1f MiB), peak %.1f MiB",
+        getattr(task, "name", "?"),
+        task_id,
+        state,
+        before / MB,
+        after / MB,
+        (after - before) / MB,
+        max(peak_rss_bytes(), after) / MB,
+    )
@@ -0,0 +1,5 @@
+"""
+Performance tooling for the backend: local stand-ins, load tests and benchmarks.
+
+Nothing in this package is imported by the application itself.
+"""
@@ -0,0 +1,315 @@
+"""
+Replay recorded arrival traces against local stand-ins, with the autoscaler
+(``app/autoscaler.py``) in the loop.
+
+Starts the same local stack as ``perf.loadtest`` (Redis, S3 emulator, fake
+unoserver, API and one Celery worker), submits each job of the trace at its
+recorded offset, and runs the controller every ``--interval`` seconds. It
+reports end-to-end latency together with what the pool size cost in
+slot-seconds and how often it changed, so controller settings can be
+compared with each other and with a fixed pool (``--fixed N``) on the same
+trace.
+
+A trace is a text file with one job per line, ``<offset seconds>[,<deck>]``,
+where the deck uses the ``perf.loadtest --mix`` shape (``<slides>x<media
+MB>``, default ``10x1``); ``#`` starts a comment. Record one from a
+deployment's job registry with ``--record``::
+
+    python -m perf.autoscale_sim --record trace.csv --since 2024-05-01T08:00
+    python -m perf.autoscale_sim perf/traces/burst.csv --capacity 4 \\
+        --latency lognormal:0.5,0.3 --speed 2
+    python -m perf.autoscale_sim perf/traces/burst.csv --capacity 4 --fixed 4
+
+``--speed`` compresses the arrival times only; scale ``--latency`` to
+match when replaying a long trace quickly.
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from perf.decks import DeckSpec, parse_mix, write_deck
+from perf.loadtest import APP_DIR, LocalStack, run_job
+from perf.stats import summarize_latencies
+
+DEFAULT_DECK = "10x1"
+# Queues the local stack's worker consumes
+QUEUES = ["celery", "large"]
+
+
+@dataclass
+class TimelinePoint:
+    at: float
+    depth: int
+    concurrency: int
+    converters: int
+
+
+@dataclass
+class SimulationReport:
+    jobs: int
+    succeeded: int
+    wall_seconds: float
+    latency: Dict[str, float]
+    slot_seconds: float
+    max_concurrency: int
+    resizes: int
+    max_converters: int
+    timeline: List[TimelinePoint] = field(default_factory=list)
+
+
+def load_trace(path: str) -> List[Tuple[float, DeckSpec]]:
+    """Parse a trace file into ``(offset, deck)`` pairs sorted by offset."""
+    trace = []
+    with open(path) as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            offset, _, deck = line.partition(",")
+            spec = parse_mix(deck.strip() or DEFAULT_DECK)[0][0]
+            trace.append((float(offset), spec))
+    return sorted(trace, key=lambda item: item[0])
+
+
+def record_trace(jobs: List[dict]) -> List[str]:
+    """Trace lines for registry jobs (as listed by ``GET /jobs``)."""
+    created = sorted(datetime.fromisoformat(job["createdAt"]) for job in jobs)
+    if not created:
+        return []
+    return [f"{(at - created[0]).total_seconds():.3f}" for at in created]
+
+
+def _registry_jobs(since: datetime) -> List[dict]:
+    """All jobs created after ``since`` in the configured job registry."""
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    from jobs import get_job_registry
+
+    registry = get_job_registry()
+    jobs: List[dict] = []
+    cursor = None
+    while True:
+        page, cursor = registry.list(since=since, cursor=cursor, limit=200)
+        jobs.extend(page)
+        if not cursor:
+            return jobs
+
+
+class Controller(threading.Thread):
+    """Runs the autoscaler against the stack, recording a timeline."""
+
+    def __init__(self, stack: LocalStack, args: argparse.Namespace):
+        super().__init__(name="autoscaler", daemon=True)
+        if APP_DIR not in sys.path:
+            sys.path.insert(0, APP_DIR)
+        import autoscaler
+        import redis
+        from celery import Celery
+
+        self.autoscaler = autoscaler
+        self.celery = Celery(broker=f"{stack.redis_url}/0")
+        self.client = redis.Redis.from_url(f"{stack.redis_url}/0")
+        self.scaler = autoscaler.Autoscaler(
+            converters=1 if args.capacity else 0,
+            converter_capacity=args.capacity or 1,
+            min_concurrency=args.min_concurrency,
+            max_concurrency=args.max_concurrency,
+            target_wait_s=args.target_wait,
+            scale_down_delay_s=args.scale_down_delay,
+        )
+        self.interval = args.interval
+        self.fixed = args.fixed is not None
+        self.timeline: List[TimelinePoint] = []
+        self.resizes = 0
+        self.pending: Dict[str, Tuple[int, float]] = {}
+        self.stopped = threading.Event()
+        self.start_time = time.monotonic()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                sample = self.autoscaler.collect(
+                    self.celery, self.client, QUEUES, timeout=1.0
+                )
+            except Exception as e:
+                print(f"⚠️  Sampling failed: {e}")
+                continue
+            decision = self.scaler.observe(sample)
+            if not self.fixed:
+                self.resizes += self.autoscaler.apply(
+                    self.celery, sample, decision, self.pending
+                )
+            self.timeline.append(
+                TimelinePoint(
+                    at=round(sample.at - self.start_time, 3),
+                    depth=sample.depth,
+                    concurrency=sum(sample.pools.values()),
+                    converters=decision.converters,
+                )
+            )
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+def replay(
+    args: argparse.Namespace, trace: List[Tuple[float, DeckSpec]], api_url: str
+) -> Tuple[List[float], int, float]:
+    """Submit each job at its offset; return latencies, successes and wall time."""
+    deck_dir = tempfile.mkdtemp(prefix="decks-")
+    paths = {
+        deck: write_deck(deck, deck_dir, args.seed) for deck in {d for _, d in trace}
+    }
+    start = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            futures = []
+            for offset, deck in trace:
+                delay = start + offset / args.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(
+                    pool.submit(
+                        run_job,
+                        api_url,
+                        deck,
+                        paths[deck],
+                        args.poll_interval,
+                        args.timeout,
+                    )
+                )
+            outcomes = [future.result() for future in futures]
+    finally:
+        shutil.rmtree(deck_dir, ignore_errors=True)
+    wall = time.monotonic() - start
+    ok = [o.latency for o in outcomes if o.ok]
+    return ok, len(ok), wall
+
+
+def summarize(
+    trace_jobs: int,
+    latencies: List[float],
+    succeeded: int,
+    wall: float,
+    controller: Controller,
+) -> SimulationReport:
+    timeline = controller.timeline
+    slot_seconds = 0.0
+    for before, after in zip(timeline, timeline[1:]):
+        slot_seconds += before.concurrency * (after.at - before.at)
+    return SimulationReport(
+        jobs=trace_jobs,
+        succeeded=succeeded,
+        wall_seconds=wall,
+        latency=summarize_latencies(latencies),
+        slot_seconds=round(slot_seconds, 1),
+        max_concurrency=max((p.concurrency for p in timeline), default=0),
+        resizes=controller.resizes,
+        max_converters=max((p.converters for p in timeline), default=0),
+        timeline=timeline,
+    )
+
+
+def print_report(report: SimulationReport, fixed: Optional[int]) -> None:
+    mode = f"fixed pool of {fixed}" if fixed is not None else "autoscaled"
+    print(f"\n📈 Trace replay ({mode})")
+    print("=" * 40)
+    print(f"   Jobs:         {report.succeeded}/{report.jobs} succeeded")
+    print(f"   Wall time:    {report.wall_seconds:.1f}s")
+    lat = report.latency
+    print(
+        f"   Latency:      p50 {lat['p50']:.2f}s  p95 {lat['p95']:.2f}s  "
+        f"p99 {lat['p99']:.2f}s"
+    )
+    print(f"   Slot-seconds: {report.slot_seconds:.0f}")
+    print(f"   Max pool:     {report.max_concurrency} ({report.resizes} resizes)")
+    print(f"   Converters:   up to {report.max_converters} recommended")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("trace", nargs="?", help="Trace file to replay")
+    parser.add_argument("--record", help="Write a trace from the job registry")
+    parser.add_argument(
+        "--since", help="With --record: ISO start time (default: last 24 hours)"
+    )
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument(
+        "--fixed", type=int, help="Keep this pool size instead of autoscaling"
+    )
+    parser.add_argument("--capacity", type=int, default=4, help="Converter slots")
+    parser.add_argument("--latency", default="lognormal:0.0,0.5")
+    parser.add_argument("--per-mb-latency", type=float, default=0.02)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--min-concurrency", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--target-wait", type=float, default=10.0)
+    parser.add_argument("--scale-down-delay", type=float, default=30.0)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--redis-url", help="Use this Redis instead of starting one")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON")
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.record:
+        since = (
+            datetime.fromisoformat(args.since)
+            if args.since
+            else datetime.now(timezone.utc) - timedelta(days=1)
+        )
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        lines = record_trace(_registry_jobs(since))
+        with open(args.record, "w") as out:
+            out.write("# offset seconds, recorded from the job registry\n")
+            out.writelines(f"{line}\n" for line in lines)
+        print(f"💾 {len(lines)} arrivals written to {args.record}")
+        return 0
+    if not args.trace:
+        parser.error("a trace file is required unless --record is given")
+
+    trace = load_trace(args.trace)
+    # LocalStack starts the worker with this many processes
+    args.workers = args.fixed if args.fixed is not None else args.min_concurrency
+    workdir = tempfile.mkdtemp(prefix="autoscale-sim-")
+    print(f"🚀 Starting local stack (logs in {workdir})")
+    stack = LocalStack(args, workdir)
+    controller = None
+    try:
+        stack.start()
+        controller = Controller(stack, args)
+        controller.start()
+        latencies, succeeded, wall = replay(args, trace, stack.api_url)
+    finally:
+        if controller:
+            controller.stop()
+        stack.stop()
+
+    report = summarize(len(trace), latencies, succeeded, wall, controller)
+    print_report(report, args.fixed)
+    if args.json_path:
+        with open(args.json_path, "w") as out:
+            json.dump(asdict(report), out, indent=2)
+    return 0 if report.succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,725 @@
+"""
+Micro-benchmarks for the API and task hot paths.
+
+Each benchmark runs in-process against local stand-ins (moto's S3 server,
+the fake unoserver and an in-memory Celery result backend) and records wall
+time, tracemalloc peak and RSS growth. ``transfer`` compares S3
+upload/download throughput of boto3's defaults with the tuned client from
+``storage.py``; ``first_page`` compares how many bytes (and how long) a
+Range-capable viewer needs before it can show page one of a plain vs a
+linearised PDF; ``slim`` runs ``convert_task`` on photo-heavy decks with and
+without PPTX slimming against a converter whose latency grows with upload
+size; ``startup`` times fresh API and worker processes (imports, first
+request, worker ready) against the fixed budgets in ``STARTUP_BUDGETS_S``
+as well as the baseline. Results can be saved as a JSON baseline and later compared
+against it::
+
+    python -m perf.bench --save                 # record perf/baselines/default.json
+    python -m perf.bench --compare --threshold 0.25
+    python -m perf.bench --only status --sizes 1,10
+
+``--compare`` exits non-zero when any metric is worse than the baseline by
+more than the threshold, which is what ``run_tests.py --bench`` relies on;
+any run exits non-zero when a start-up budget is exceeded.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from perf.stats import RssSampler, format_bytes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(BACKEND_DIR, "app")
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "default.json")
+DEFAULT_SIZES_MB = [1, 10, 100, 500]
+DEFAULT_TRANSFER_SIZES_MB = [1, 16, 128, 1024]
+DEFAULT_PDF_SIZES_MB = [10, 100]
+DEFAULT_SLIM_SIZES_MB = [10, 50]
+# Modelled converter cost per MB of deck for the slim benchmark; LibreOffice
+# time on photo decks is dominated by decoding and re-encoding pictures
+SLIM_CONVERT_S_PER_MB = 0.25
+PHOTO_PX = 4000
+# What a viewer reads first to look for the linearisation dictionary
+FIRST_FETCH_BYTES = 64 * 1024
+LINEARIZED_END = re.compile(rb"/Linearized\b.*?/E\s+(\d+)", re.DOTALL)
+BUCKET = "bench"
+# Cold-start budgets in seconds for a fresh process; autoscaled API pods
+# and workers are only useful once they are past these
+STARTUP_BUDGETS_S = {
+    "api_import": 1.0,
+    "api_first_request": 3.0,
+    "worker_import": 1.0,
+    "worker_ready": 5.0,
+}
+
+# Metrics compared against the baseline; lower is better for all of them
+METRICS = ("wall_s", "tracemalloc_peak", "rss_peak_delta")
+
+
+@dataclass
+class BenchResult:
+    name: str
+    wall_s: float
+    tracemalloc_peak: int
+    rss_peak_delta: int
+    extra: Dict[str, float]
+
+
+def measure(op: Callable[[], object]) -> Dict[str, float]:
+    """
+    Run ``op`` twice: once for wall time and RSS growth, once under tracemalloc.
+
+    tracemalloc slows allocation-heavy code considerably, so it is kept out of
+    the timed run.
+    """
+    gc.collect()
+    sampler = RssSampler(os.getpid(), interval=0.005, include_children=False)
+    baseline_rss = sampler.sample()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        op()
+    finally:
+        wall = time.perf_counter() - start
+        sampler.stop()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        op()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_s": wall,
+        "tracemalloc_peak": peak,
+        "rss_peak_delta": max(0, sampler.peak - baseline_rss),
+    }
+
+
+def _result(name: str, m: Dict[str, float], extra: Dict[str, float]) -> BenchResult:
+    return BenchResult(
+        name, m["wall_s"], int(m["tracemalloc_peak"]), int(m["rss_peak_delta"]), extra
+    )
+
+
+class Environment:
+    """Local stand-ins and app modules shared by all benchmarks."""
+
+    def __init__(self) -> None:
+        import tempfile
+
+        from perf.standins import (
+            FakeUnoserver,
+            UnoserverBehaviour,
+            parse_latency,
+            start_s3_emulator,
+        )
+        from perf.loadtest import free_port
+
+        # moto's server logs every request through werkzeug
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        s3_port = free_port()
+        self.s3_server = start_s3_emulator(port=s3_port)
+        self.unoserver = FakeUnoserver(
+            UnoserverBehaviour(parse_latency("const:0"))
+        ).start()
+        host, uno_port = self.unoserver.address
+        # /convert records the job; keep that off Redis like the rest
+        self.tmp = tempfile.TemporaryDirectory(prefix="bench-")
+
+        self.env = patch.dict(
+            os.environ,
+            {
+                "AWS_ENDPOINT_URL": f"http://127.0.0.1:{s3_port}",
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_S3_BUCKET": BUCKET,
+                "AWS_REGION": "us-east-1",
+                "UNOSERVER_HOST": host,
+                "UNOSERVER_PORT": str(uno_port),
+                "JOB_REGISTRY": "sqlite",
+                "JOB_REGISTRY_PATH": os.path.join(self.tmp.name, "jobs.sqlite3"),
+            },
+        )
+        self.env.start()
+        if APP_DIR not in sys.path:
+            sys.path.insert(0, APP_DIR)
+
+        import main
+        import storage
+        import tasks
+
+        self.main = main
+        self.storage = storage
+        self.tasks = tasks
+        storage.get_s3_client().create_bucket(Bucket=BUCKET)
+
+    def close(self) -> None:
+        self.unoserver.stop()
+        self.s3_server.stop()
+        self.env.stop()
+        self.tmp.cleanup()
+
+
+def _deck(size_mb: int) -> bytes:
+    from perf.decks import DeckSpec, build_deck
+
+    return build_deck(DeckSpec(max(1, size_mb), size_mb * 1024 * 1024))
+
+
+def bench_convert(env: Environment, size_mb: int) -> BenchResult:
+    """``POST /convert`` for one upload of ``size_mb``, with enqueueing stubbed."""
+    from fastapi.testclient import TestClient
+
+    data = _deck(size_mb)
+    stub = type("Result", (), {"id": "bench-job"})()
+
+    with (
+        TestClient(env.main.app) as client,
+        patch.object(env.main.celery, "send_task", return_value=stub),
+    ):
+        m = measure(
+            lambda: client.post(
+                "/convert", files={"file": ("bench.pptx", data)}
+            ).raise_for_status()
+        )
+    return _result(
+        f"convert_upload_{size_mb}mb", m, {"mb_per_s": size_mb / m["wall_s"]}
+    )
+
+
+def bench_status(env: Environment, requests_count: int = 2000) -> BenchResult:
+    """``GET /status`` throughput against an in-memory result backend."""
+    from celery import Celery
+    from fastapi.testclient import TestClient
+
+    results_app = Celery("bench", backend="cache+memory://")
+    job_ids = [f"job-{i}" for i in range(100)]
+    for job_id in job_ids:
+        results_app.backend.store_result(
+            job_id, {"url": f"https://example.com/{job_id}.pdf"}, "SUCCESS"
+        )
+
+    def lookups() -> None:
+        for i in range(requests_count):
+            client.get(f"/status/{job_ids[i % len(job_ids)]}").raise_for_status()
+
+    with (
+        TestClient(env.main.app) as client,
+        patch.object(env.main, "celery", results_app),
+    ):
+        m = measure(lookups)
+    return _result("status_lookup", m, {"requests_per_s": requests_count / m["wall_s"]})
+
+
+@contextmanager
+def _stage_timer(stages: Dict[str, float], obj: object, attr: str, stage: str):
+    original = getattr(obj, attr)
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+
+    with patch.object(obj, attr, timed):
+        yield
+
+
+def bench_convert_task(env: Environment, size_mb: int) -> BenchResult:
+    """``convert_task`` end to end, with time split per pipeline stage."""
+    tasks = env.tasks
+    storage = env.storage.get_storage()
+    key = f"bench_{size_mb}mb.pptx"
+    storage.put_bytes(key, _deck(size_mb))
+
+    stages: Dict[str, float] = {}
+    with (
+        _stage_timer(stages, storage, "download", "download_s"),
+        _stage_timer(stages, tasks.requests, "post", "convert_s"),
+        _stage_timer(stages, storage, "upload", "upload_s"),
+        _stage_timer(stages, storage, "url_for", "presign_s"),
+    ):
+        m = measure(lambda: tasks.convert_task(key, "bench"))
+    # measure() runs the task twice; report the per-run stage split
+    return _result(
+        f"convert_task_{size_mb}mb", m, {k: v / 2 for k, v in stages.items()}
+    )
+
+
+def _write_file(path: str, size_mb: int) -> None:
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as out:
+        for _ in range(size_mb):
+            out.write(block)
+
+
+def bench_transfer(env: Environment, size_mb: int) -> List[BenchResult]:
+    """
+    S3 upload/download of ``size_mb`` with boto3 defaults vs the tuned
+    client and ``TransferConfig`` from storage.py.
+    """
+    import tempfile
+
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+
+    clients = {
+        "default": (boto3.client("s3", region_name="us-east-1"), TransferConfig()),
+        "tuned": (env.storage.get_s3_client(), env.storage.get_transfer_config()),
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.bin")
+        target = os.path.join(tmp, "target.bin")
+        _write_file(source, size_mb)
+        for label, (client, config) in clients.items():
+            key = f"transfer_{size_mb}mb_{label}.bin"
+            up = measure(lambda: client.upload_file(source, BUCKET, key, Config=config))
+            down = measure(
+                lambda: client.download_file(BUCKET, key, target, Config=config)
+            )
+            client.delete_object(Bucket=BUCKET, Key=key)
+            results.append(
+                _result(
+                    f"transfer_upload_{size_mb}mb_{label}",
+                    up,
+                    {"mb_per_s": size_mb / up["wall_s"]},
+                )
+            )
+            results.append(
+                _result(
+                    f"transfer_download_{size_mb}mb_{label}",
+                    down,
+                    {"mb_per_s": size_mb / down["wall_s"]},
+                )
+            )
+    return results
+
+
+def _pdf(path: str, size_mb: int, pages: int = 50) -> None:
+    """Write a PDF of about ``size_mb`` with one incompressible image per page."""
+    import pikepdf
+
+    per_page = max(1, size_mb * 1024 * 1024 // pages)
+    width = 1024
+    height = max(1, per_page // width)
+    pdf = pikepdf.new()
+    for index in range(pages):
+        pdf.add_blank_page(page_size=(720, 540))
+        image = pikepdf.Stream(pdf, os.urandom(width * height))
+        image.Type = pikepdf.Name.XObject
+        image.Subtype = pikepdf.Name.Image
+        image.Width, image.Height = width, height
+        image.ColorSpace = pikepdf.Name.DeviceGray
+        image.BitsPerComponent = 8
+        page = pdf.pages[index]
+        page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=image))
+        page.Contents = pikepdf.Stream(pdf, b"q 720 0 0 540 0 0 cm /Im0 Do Q")
+    pdf.save(path)
+
+
+def _fetch_first_page(url: str) -> int:
+    """
+    Fetch what a Range-capable viewer needs before rendering page one.
+
+    A linearised file announces the end of its first-page section (``/E``)
+    in its first object; anything else has its cross-reference table at the
+    end and page objects spread through the file, so the viewer ends up
+    reading all of it. Returns the number of bytes fetched.
+    """
+    import requests
+
+    head = requests.get(url, headers={"Range": f"bytes=0-{FIRST_FETCH_BYTES - 1}"})
+    head.raise_for_status()
+    match = LINEARIZED_END.search(head.content[:1024])
+    if match:
+        end = int(match.group(1))
+        if end <= len(head.content):
+            return len(head.content)
+        rest = requests.get(
+            url, headers={"Range": f"bytes={len(head.content)}-{end - 1}"}
+        )
+    else:
+        rest = requests.get(url, headers={"Range": f"bytes={len(head.content)}-"})
+    rest.raise_for_status()
+    return len(head.content) + len(rest.content)
+
+
+def bench_first_page(env: Environment, size_mb: int) -> List[BenchResult]:
+    """Time and bytes to first page for a plain and a linearised PDF."""
+    import tempfile
+
+    import pdf_optimize
+
+    storage = env.storage.get_storage()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "deck.pdf")
+        _pdf(path, size_mb)
+        for label in ("plain", "linearized"):
+            if label == "linearized":
+                pdf_optimize.linearize_pdf(path)
+            key = f"first_page_{size_mb}mb_{label}.pdf"
+            storage.upload(path, key)
+            url = storage.url_for(key, "deck.pdf")
+            fetched: Dict[str, int] = {}
+            m = measure(lambda: fetched.update(bytes=_fetch_first_page(url)))
+            results.append(
+                _result(
+                    f"first_page_{size_mb}mb_{label}",
+                    m,
+                    {
+                        "first_page_bytes": fetched["bytes"],
+                        "file_bytes": os.path.getsize(path),
+                    },
+                )
+            )
+    return results
+
+
+def bench_slim(
+    env: Environment, size_mb: int, s_per_mb: float = SLIM_CONVERT_S_PER_MB
+) -> List[BenchResult]:
+    """``convert_task`` on a photo deck of ``size_mb``, with and without slimming."""
+    import process_pool
+
+    from perf.decks import DeckSpec, build_deck, photo
+
+    tasks = env.tasks
+    # Start the worker's CPU pool up front, as a long-running worker would have
+    process_pool.run_in_pool(int)
+    slides = max(1, size_mb * 1024 * 1024 // len(photo(PHOTO_PX)))
+    key = f"slim_{size_mb}mb.pptx"
+    deck = build_deck(DeckSpec(slides, 0), photo_px=PHOTO_PX)
+    behaviour = env.unoserver.handler.behaviour
+
+    results = []
+    for label, options in (("off", {}), ("on", {"slim": True})):
+        stages: Dict[str, float] = {}
+        output: Dict[str, dict] = {}
+
+        def run() -> None:
+            # convert_task converts in place, so start from a fresh upload
+            env.storage.get_storage().put_bytes(key, deck)
+            output.update(tasks.convert_task(key, "bench", options=options))
+
+        behaviour.per_mb_latency = s_per_mb
+        try:
+            with _stage_timer(stages, tasks.requests, "post", "convert_s"):
+                m = measure(run)
+        finally:
+            behaviour.per_mb_latency = 0.0
+        extra = {k: v / 2 for k, v in stages.items()}
+        extra["deck_bytes"] = len(deck)
+        if "slimming" in output:
+            extra["slim_s"] = output["slimming"]["seconds"]
+            extra["slimmed_bytes"] = output["slimming"]["bytesAfter"]
+        results.append(_result(f"slim_{size_mb}mb_{label}", m, extra))
+    return results
+
+
+def _import_time(module: str) -> float:
+    """Seconds a fresh interpreter takes to import ``module`` from app/."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _api_first_request(env: Dict[str, str]) -> Dict[str, float]:
+    """Start uvicorn and time it until ``GET /jobs`` first succeeds."""
+    import requests
+
+    from perf.loadtest import free_port
+    from perf.stats import RssSampler
+
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("API exited during start-up")
+            try:
+                requests.get(f"http://127.0.0.1:{port}/jobs", timeout=5)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.01)
+        return {
+            "wall_s": time.perf_counter() - start,
+            "rss_bytes": RssSampler(server.pid).sample(),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _worker_ready(env: Dict[str, str]) -> Dict[str, float]:
+    """Start a Celery worker and time it until it logs that it is ready."""
+    from perf.stats import RssSampler
+
+    start = time.perf_counter()
+    worker = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "celery",
+            "-A",
+            "celery_app.celery",
+            "worker",
+            "--concurrency=1",
+            "--without-mingle",
+            "--without-gossip",
+            "--loglevel=info",
+        ],
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    try:
+        assert worker.stdout is not None
+        for line in worker.stdout:
+            if " ready." in line:
+                break
+        else:
+            raise RuntimeError("Worker exited during start-up")
+        return {
+            "wall_s": time.perf_counter() - start,
+            "rss_bytes": RssSampler(worker.pid).sample(),
+        }
+    finally:
+        worker.terminate()
+        worker.wait()
+
+
+def bench_startup(env: Environment) -> List[BenchResult]:
+    """
+    Cold start of fresh API and worker processes.
+
+    The processes use an in-memory broker and a SQLite job registry, so only
+    start-up itself is timed, not connecting to Redis.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process_env = dict(
+            os.environ,
+            REDIS_URL="memory://",
+            REDIS_RESULT_BACKEND="cache+memory://",
+            JOB_REGISTRY="sqlite",
+            JOB_REGISTRY_PATH=os.path.join(tmp, "jobs.sqlite3"),
+        )
+        # Once unmeasured, so every run reads modules from a warm page cache
+        _import_time("main")
+        timings = {
+            "api_import": {"wall_s": _import_time("main")},
+            "api_first_request": _api_first_request(process_env),
+            "worker_import": {"wall_s": _import_time("tasks")},
+            "worker_ready": _worker_ready(process_env),
+        }
+    results = []
+    for name, timing in timings.items():
+        extra = {"budget_s": STARTUP_BUDGETS_S[name]}
+        if "rss_bytes" in timing:
+            extra["rss_bytes"] = timing["rss_bytes"]
+        results.append(BenchResult(f"startup_{name}", timing["wall_s"], 0, 0, extra))
+    return results
+
+
+def over_budget(results: List[BenchResult]) -> List[str]:
+    """Return a description of every result slower than its ``budget_s``."""
+    return [
+        f"{r.name}: {r.wall_s:.3f}s > {r.extra['budget_s']:.3f}s"
+        for r in results
+        if "budget_s" in r.extra and r.wall_s > r.extra["budget_s"]
+    ]
+
+
+BENCHMARKS: Dict[
+    str, Callable[[Environment, argparse.Namespace], List[BenchResult]]
+] = {
+    "convert": lambda env, opts: [bench_convert(env, s) for s in opts.sizes],
+    "status": lambda env, opts: [bench_status(env)],
+    "task": lambda env, opts: [bench_convert_task(env, s) for s in opts.sizes],
+    "transfer": lambda env, opts: [
+        r for s in opts.transfer_sizes for r in bench_transfer(env, s)
+    ],
+    "first_page": lambda env, opts: [
+        r for s in opts.pdf_sizes for r in bench_first_page(env, s)
+    ],
+    "slim": lambda env, opts: [
+        r for s in opts.slim_sizes for r in bench_slim(env, s, opts.slim_s_per_mb)
+    ],
+    "startup": lambda env, opts: bench_startup(env),
+}
+
+
+def run(only: Optional[List[str]], opts: argparse.Namespace) -> List[BenchResult]:
+    """Run the selected benchmarks, keeping the median of ``opts.repeat`` runs."""
+    env = Environment()
+    try:
+        results: List[BenchResult] = []
+        for name, bench in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            runs = [bench(env, opts) for _ in range(opts.repeat)]
+            for samples in zip(*runs):
+                best = sorted(samples, key=lambda r: r.wall_s)[len(samples) // 2]
+                best.wall_s = statistics.median(r.wall_s for r in samples)
+                results.append(best)
+        return results
+    finally:
+        env.close()
+
+
+def compare(
+    results: List[BenchResult], baseline: Dict[str, dict], threshold: float
+) -> List[str]:
+    """Return a description of every metric that regressed past ``threshold``."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if not previous:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric, 0), getattr(result, metric)
+            # Ignore noise on metrics too small to matter (<1 ms / <1 MB)
+            floor = 0.001 if metric == "wall_s" else 1024 * 1024
+            if max(old, new) < floor:
+                continue
+            if new > old * (1 + threshold):
+                change = (new / old - 1) * 100 if old else float("inf")
+                regressions.append(
+                    f"{result.name}.{metric}: {old:.4g} -> {new:.4g} (+{change:.0f}%)"
+                )
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    with open(path) as handle:
+        return json.load(handle)["results"]
+
+
+def save_baseline(path: str, results: List[BenchResult]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {r.name: asdict(r) for r in results},
+    }
+    with open(path, "w") as handle:
+        json.dump(payload, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+def print_results(results: List[BenchResult]) -> None:
+    print(f"\n{'benchmark':<34}{'wall':>10}{'tracemalloc':>14}{'rss':>12}")
+    for r in results:
+        print(
+            f"{r.name:<34}{r.wall_s * 1000:>8.1f}ms"
+            f"{format_bytes(r.tracemalloc_peak):>14}{format_bytes(r.rss_peak_delta):>12}"
+        )
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backend micro-benchmarks")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS))
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES_MB),
+        help="Upload sizes in MB",
+    )
+    parser.add_argument(
+        "--transfer-sizes",
+        default=",".join(str(s) for s in DEFAULT_TRANSFER_SIZES_MB),
+        help="S3 transfer sizes in MB",
+    )
+    parser.add_argument(
+        "--pdf-sizes",
+        default=",".join(str(s) for s in DEFAULT_PDF_SIZES_MB),
+        help="PDF sizes in MB for the first_page benchmark",
+    )
+    parser.add_argument(
+        "--slim-sizes",
+        default=",".join(str(s) for s in DEFAULT_SLIM_SIZES_MB),
+        help="Photo deck sizes in MB for the slim benchmark",
+    )
+    parser.add_argument(
+        "--slim-s-per-mb",
+        type=float,
+        default=SLIM_CONVERT_S_PER_MB,
+        help="Modelled converter seconds per MB of deck for the slim benchmark",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write results as baseline")
+    parser.add_argument("--compare", action="store_true", help="Check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    args.sizes = [int(s) for s in args.sizes.split(",") if s]
+    args.transfer_sizes = [int(s) for s in args.transfer_sizes.split(",") if s]
+    args.pdf_sizes = [int(s) for s in args.pdf_sizes.split(",") if s]
+    args.slim_sizes = [int(s) for s in args.slim_sizes.split(",") if s]
+    results = run(args.only, args)
+    print_results(results)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"\n💾 Baseline written to {args.baseline}")
+    exceeded = over_budget(results)
+    if exceeded:
+        print("\n⚠️  Start-up budgets exceeded:")
+        for line in exceeded:
+            print(f"   {line}")
+        return 1
+    if args.compare:
+        regressions = compare(results, load_baseline(args.baseline), args.threshold)
+        if regressions:
+            print(f"\n⚠️  Regressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
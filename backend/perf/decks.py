@@ -0,0 +1,197 @@
+"""
+Synthetic PPTX decks with a realistic package layout.
+
+The decks are structurally valid Office Open XML packages (content types,
+relationships, one XML part per slide and embedded media) so they exercise
+the same code paths as real uploads, but they are generated on the fly and
+can be sized precisely.
+"""
+
+import io
+import os
+import random
+import zipfile
+from dataclasses import dataclass
+from typing import List, Tuple
+
+CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Default Extension="jpeg" ContentType="image/jpeg"/>'
+    '<Override PartName="/ppt/presentation.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.presentationml.presentation.main+xml"/>'
+)
+SLIDE_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+)
+
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships"><Relationship Id="rId1" Type="http://schemas.openxmlformats'
+    '.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="ppt/presentation.xml"/></Relationships>'
+)
+
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+@dataclass(frozen=True)
+class DeckSpec:
+    """Shape of a generated deck."""
+
+    slides: int
+    media_bytes: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.slides}s/{self.media_bytes // (1024 * 1024)}MB"
+
+
+def parse_mix(spec: str) -> List[Tuple[DeckSpec, float]]:
+    """
+    Parse a deck mix such as ``"10x1:60,40x20:30,150x80:10"``.
+
+    Each entry is ``<slides>x<media MB>:<weight>``; weights are relative.
+    """
+    mix = []
+    for entry in spec.split(","):
+        shape, _, weight = entry.strip().partition(":")
+        slides, _, media_mb = shape.partition("x")
+        deck = DeckSpec(int(slides), int(float(media_mb or 0) * 1024 * 1024))
+        mix.append((deck, float(weight or 1)))
+    if not mix:
+        raise ValueError("Deck mix must contain at least one entry")
+    return mix
+
+
+def _slide_xml(index: int, with_picture: bool) -> str:
+    picture = ""
+    if with_picture:
+        picture = (
+            '<p:pic><p:nvPicPr><p:cNvPr id="2" name="Picture"/><p:cNvPicPr/>'
+            "<p:nvPr/></p:nvPicPr><p:blipFill>"
+            '<a:blip r:embed="rId2"/></p:blipFill><p:spPr><a:xfrm>'
+            '<a:off x="0" y="0"/><a:ext cx="4572000" cy="3429000"/></a:xfrm>'
+            "</p:spPr></p:pic>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+        f'xmlns:r="{REL_NS}" '
+        'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main">'
+        '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/>'
+        "<p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>"
+        f"{picture}<p:sp><p:txBody><a:bodyPr/><a:p><a:r>"
+        f"<a:t>Slide {index}</a:t></a:r></a:p></p:txBody></p:sp>"
+        "</p:spTree></p:cSld></p:sld>"
+    )
+
+
+def _slide_rels(media_name: str = "") -> str:
+    media = ""
+    if media_name:
+        media = (
+            f'<Relationship Id="rId2" Type="{REL_NS}/image" '
+            f'Target="../media/{media_name}"/>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+        f'relationships">{media}</Relationships>'
+    )
+
+
+def photo(width: int, seed: int = 0) -> bytes:
+    """A decodable 4:3 JPEG "photo" (smooth noise) ``width`` pixels wide."""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    small = Image.frombytes("RGB", (32, 24), rng.randbytes(32 * 24 * 3))
+    out = io.BytesIO()
+    small.resize((width, width * 3 // 4), Image.BICUBIC).save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def build_deck(spec: DeckSpec, seed: int = 0, photo_px: int = 0) -> bytes:
+    """
+    Build a PPTX package matching ``spec``.
+
+    Media is random (incompressible) data split across up to one image per
+    slide, so the archive size tracks ``media_bytes`` closely. With
+    ``photo_px``, every slide instead shows a real JPEG of that width in a
+    5-inch frame, which the converter (and ``pptx_slim``) can decode.
+    """
+    rng = random.Random(seed)
+    slides = max(1, spec.slides)
+    media_count = 0
+    if spec.media_bytes:
+        media_count = min(slides, max(1, spec.media_bytes // (512 * 1024)))
+    per_media = spec.media_bytes // media_count if media_count else 0
+    picture = b""
+    if photo_px:
+        media_count, picture = slides, photo(photo_px, seed)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as deck:
+        overrides = "".join(
+            f'<Override PartName="/ppt/slides/slide{i}.xml" '
+            f'ContentType="{SLIDE_CONTENT_TYPE}"/>'
+            for i in range(1, slides + 1)
+        )
+        deck.writestr(
+            "[Content_Types].xml", CONTENT_TYPES_HEAD + overrides + "</Types>"
+        )
+        deck.writestr("_rels/.rels", ROOT_RELS)
+
+        slide_ids = "".join(
+            f'<p:sldId id="{255 + i}" r:id="rId{i}"/>' for i in range(1, slides + 1)
+        )
+        deck.writestr(
+            "ppt/presentation.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<p:presentation xmlns:p="http://schemas.openxmlformats.org/'
+            f'presentationml/2006/main" xmlns:r="{REL_NS}">'
+            f"<p:sldIdLst>{slide_ids}</p:sldIdLst>"
+            '<p:sldSz cx="9144000" cy="6858000"/></p:presentation>',
+        )
+        deck.writestr(
+            "ppt/_rels/presentation.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+            'relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i}" Type="{REL_NS}/slide" '
+                f'Target="slides/slide{i}.xml"/>'
+                for i in range(1, slides + 1)
+            )
+            + "</Relationships>",
+        )
+
+        for i in range(1, slides + 1):
+            media_name = f"image{i}.jpeg" if i <= media_count else ""
+            deck.writestr(f"ppt/slides/slide{i}.xml", _slide_xml(i, bool(media_name)))
+            deck.writestr(
+                f"ppt/slides/_rels/slide{i}.xml.rels", _slide_rels(media_name)
+            )
+            if media_name:
+                # Media is already compressed in real decks, so store it as-is
+                deck.writestr(
+                    f"ppt/media/{media_name}",
+                    picture or rng.randbytes(per_media),
+                    compress_type=zipfile.ZIP_STORED,
+                )
+
+    return buffer.getvalue()
+
+
+def write_deck(spec: DeckSpec, directory: str, seed: int = 0) -> str:
+    """Build a deck and write it to ``directory``, returning the path."""
+    path = os.path.join(directory, f"deck_{spec.slides}s_{spec.media_bytes}b.pptx")
+    if not os.path.exists(path):
+        with open(path, "wb") as out:
+            out.write(build_deck(spec, seed))
+    return path
@@ -0,0 +1,419 @@
+"""
+End-to-end load test for the conversion pipeline.
+
+Starts the real FastAPI app and Celery workers against local stand-ins
+(Redis, moto's S3 server and a fake unoserver with configurable latency and
+failure injection), drives a weighted mix of deck sizes through
+``POST /convert`` + ``GET /status`` at a fixed client concurrency, and
+reports throughput, end-to-end latency percentiles and API memory.
+
+Example::
+
+    python -m perf.loadtest --jobs 200 --concurrency 16 --workers 8 \\
+        --mix "10x1:60,40x20:30,150x80:10" --latency lognormal:0.5,0.4
+
+Use ``--api-url`` to drive an already running stack (e.g. docker compose)
+instead of starting one.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+from perf.decks import DeckSpec, parse_mix, write_deck
+from perf.stats import RssSampler, format_bytes, summarize_latencies
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(BACKEND_DIR, "app")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"Nothing listening on port {port} after {timeout}s")
+
+
+@dataclass
+class JobOutcome:
+    deck: str
+    ok: bool
+    latency: float
+    upload_seconds: float
+    error: str = ""
+
+
+@dataclass
+class LoadReport:
+    jobs: int
+    succeeded: int
+    failed: int
+    wall_seconds: float
+    jobs_per_second: float
+    latency: Dict[str, float]
+    latency_by_deck: Dict[str, Dict[str, float]]
+    api_rss_peak: int = 0
+    api_rss_last: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+
+
+class LocalStack:
+    """Processes making up a throwaway local deployment."""
+
+    def __init__(self, args: argparse.Namespace, workdir: str):
+        self.args = args
+        self.workdir = workdir
+        self.procs: List[subprocess.Popen] = []
+        self.api_port = free_port()
+        self.api_proc: Optional[subprocess.Popen] = None
+        self.redis_url = ""
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.api_port}"
+
+    def _spawn(
+        self, cmd: List[str], cwd: str, env: dict, name: str
+    ) -> subprocess.Popen:
+        log = open(os.path.join(self.workdir, f"{name}.log"), "wb")
+        proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=log)
+        self.procs.append(proc)
+        return proc
+
+    def start(self) -> None:
+        args = self.args
+        env = os.environ.copy()
+
+        redis_url = args.redis_url
+        if not redis_url:
+            if not shutil.which("redis-server"):
+                raise RuntimeError("redis-server not found; pass --redis-url instead")
+            redis_port = free_port()
+            self._spawn(
+                [
+                    "redis-server",
+                    "--port",
+                    str(redis_port),
+                    "--save",
+                    "",
+                    "--appendonly",
+                    "no",
+                ],
+                self.workdir,
+                env,
+                "redis",
+            )
+            wait_for_port(redis_port)
+            redis_url = f"redis://127.0.0.1:{redis_port}"
+        self.redis_url = redis_url.rstrip("/")
+
+        s3_port = free_port()
+        self._spawn(
+            [sys.executable, "-m", "perf.standins", "s3", "--port", str(s3_port)],
+            BACKEND_DIR,
+            env,
+            "s3",
+        )
+        uno_port = free_port()
+        self._spawn(
+            [
+                sys.executable,
+                "-m",
+                "perf.standins",
+                "unoserver",
+                "--port",
+                str(uno_port),
+                "--latency",
+                args.latency,
+                "--per-mb-latency",
+                str(args.per_mb_latency),
+                "--fail-rate",
+                str(args.fail_rate),
+                "--capacity",
+                str(args.capacity),
+                "--seed",
+                str(args.seed),
+            ],
+            BACKEND_DIR,
+            env,
+            "unoserver",
+        )
+        wait_for_port(s3_port)
+        wait_for_port(uno_port)
+
+        env.update(
+            {
+                "AWS_ENDPOINT_URL": f"http://127.0.0.1:{s3_port}",
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_S3_BUCKET": "loadtest",
+                "AWS_REGION": "us-east-1",
+                "REDIS_URL": f"{redis_url.rstrip('/')}/0",
+                "REDIS_RESULT_BACKEND": f"{redis_url.rstrip('/')}/1",
+                "UNOSERVER_HOST": "127.0.0.1",
+                "UNOSERVER_PORT": str(uno_port),
+                # No worker consumes the "previews" queue here
+                "PREVIEW_ENABLED": "false",
+            }
+        )
+        import boto3
+
+        boto3.client(
+            "s3",
+            endpoint_url=env["AWS_ENDPOINT_URL"],
+            region_name="us-east-1",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+        ).create_bucket(Bucket="loadtest")
+
+        self._spawn(
+            [
+                sys.executable,
+                "-m",
+                "celery",
+                "-A",
+                "celery_app.celery",
+                "worker",
+                "-Q",
+                "celery,large",
+                "--concurrency",
+                str(args.workers),
+                "--loglevel",
+                "warning",
+            ],
+            APP_DIR,
+            env,
+            "celery",
+        )
+        self.api_proc = self._spawn(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--port",
+                str(self.api_port),
+                "--log-level",
+                "warning",
+            ],
+            APP_DIR,
+            env,
+            "api",
+        )
+        wait_for_port(self.api_port)
+
+    def stop(self) -> None:
+        for proc in reversed(self.procs):
+            proc.terminate()
+        for proc in reversed(self.procs):
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+_local = threading.local()
+
+
+def thread_session() -> requests.Session:
+    """The calling thread's HTTP session; sessions aren't safe to share."""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def run_job(
+    api_url: str,
+    deck: DeckSpec,
+    path: str,
+    poll_interval: float,
+    timeout: float,
+) -> JobOutcome:
+    """Upload one deck and poll until it finishes; latency is end-to-end."""
+    session = thread_session()
+    start = time.monotonic()
+    try:
+        with open(path, "rb") as upload:
+            response = session.post(
+                f"{api_url}/convert",
+                files={"file": ("loadtest.pptx", upload)},
+                timeout=timeout,
+            )
+        uploaded = time.monotonic() - start
+        response.raise_for_status()
+        job_id = response.json()["jobId"]
+
+        while time.monotonic() - start < timeout:
+            status = session.get(f"{api_url}/status/{job_id}", timeout=timeout).json()
+            if status["status"] == "done":
+                return JobOutcome(deck.label, True, time.monotonic() - start, uploaded)
+            if status["status"] == "error":
+                return JobOutcome(
+                    deck.label,
+                    False,
+                    time.monotonic() - start,
+                    uploaded,
+                    status.get("error", "error"),
+                )
+            time.sleep(poll_interval)
+        return JobOutcome(
+            deck.label, False, time.monotonic() - start, uploaded, "timeout"
+        )
+    except Exception as e:
+        return JobOutcome(
+            deck.label, False, time.monotonic() - start, 0.0, type(e).__name__
+        )
+
+
+def drive(args: argparse.Namespace, api_url: str, api_pid: Optional[int]) -> LoadReport:
+    """Run the configured workload against ``api_url``."""
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    deck_dir = tempfile.mkdtemp(prefix="decks-")
+    paths = {deck: write_deck(deck, deck_dir, args.seed) for deck, _ in mix}
+    plan = rng.choices([d for d, _ in mix], weights=[w for _, w in mix], k=args.jobs)
+
+    sampler = RssSampler(api_pid).start() if api_pid else None
+    outcomes: List[JobOutcome] = []
+    start = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [
+                pool.submit(
+                    run_job,
+                    api_url,
+                    deck,
+                    paths[deck],
+                    args.poll_interval,
+                    args.timeout,
+                )
+                for deck in plan
+            ]
+            for future in as_completed(futures):
+                outcomes.append(future.result())
+    finally:
+        wall = time.monotonic() - start
+        if sampler:
+            sampler.stop()
+        shutil.rmtree(deck_dir, ignore_errors=True)
+
+    ok = [o for o in outcomes if o.ok]
+    by_deck: Dict[str, List[float]] = {}
+    for outcome in ok:
+        by_deck.setdefault(outcome.deck, []).append(outcome.latency)
+    errors: Dict[str, int] = {}
+    for outcome in outcomes:
+        if not outcome.ok:
+            errors[outcome.error] = errors.get(outcome.error, 0) + 1
+
+    return LoadReport(
+        jobs=len(outcomes),
+        succeeded=len(ok),
+        failed=len(outcomes) - len(ok),
+        wall_seconds=wall,
+        jobs_per_second=len(ok) / wall if wall else 0.0,
+        latency=summarize_latencies([o.latency for o in ok]),
+        latency_by_deck={k: summarize_latencies(v) for k, v in by_deck.items()},
+        api_rss_peak=sampler.peak if sampler else 0,
+        api_rss_last=sampler.last if sampler else 0,
+        errors=errors,
+    )
+
+
+def print_report(report: LoadReport) -> None:
+    print("\n📊 Load test results")
+    print("=" * 40)
+    print(f"   Jobs:        {report.succeeded}/{report.jobs} succeeded")
+    print(f"   Wall time:   {report.wall_seconds:.1f}s")
+    print(f"   Throughput:  {report.jobs_per_second:.2f} jobs/s")
+    lat = report.latency
+    print(
+        f"   Latency:     p50 {lat['p50']:.2f}s  p95 {lat['p95']:.2f}s  "
+        f"p99 {lat['p99']:.2f}s"
+    )
+    for deck, stats in sorted(report.latency_by_deck.items()):
+        print(
+            f"     {deck:<14} p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  "
+            f"p99 {stats['p99']:.2f}s"
+        )
+    if report.api_rss_peak:
+        print(
+            f"   API RSS:     peak {format_bytes(report.api_rss_peak)}, "
+            f"end {format_bytes(report.api_rss_last)}"
+        )
+    for error, count in report.errors.items():
+        print(f"   ❌ {error}: {count}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--workers", type=int, default=4, help="Celery concurrency")
+    parser.add_argument("--mix", default="10x1:60,40x20:30,150x80:10")
+    parser.add_argument("--latency", default="lognormal:0.0,0.5")
+    parser.add_argument("--per-mb-latency", type=float, default=0.02)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--capacity", type=int, default=0, help="Converter slots (0: unlimited)"
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--redis-url", help="Use this Redis instead of starting one")
+    parser.add_argument("--api-url", help="Drive an existing deployment")
+    parser.add_argument("--api-pid", type=int, help="PID to sample with --api-url")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON")
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    stack = None
+    try:
+        if args.api_url:
+            api_url, api_pid = args.api_url.rstrip("/"), args.api_pid
+        else:
+            workdir = tempfile.mkdtemp(prefix="loadtest-")
+            print(f"🚀 Starting local stack (logs in {workdir})")
+            stack = LocalStack(args, workdir)
+            stack.start()
+            api_url = stack.api_url
+            api_pid = stack.api_proc.pid if stack.api_proc else None
+        report = drive(args, api_url, api_pid)
+    finally:
+        if stack:
+            stack.stop()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as out:
+            json.dump(asdict(report), out, indent=2)
+    return 0 if report.succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Local stand-ins for the external services the backend talks to.
+
+- ``FakeUnoserver`` speaks the subset of the unoserver REST API used by
+  ``tasks.convert_task`` (``POST /request``) and answers with a PDF after a
+  latency drawn from a configurable distribution, failing a configurable
+  fraction of requests. With a ``capacity``, only that many conversions run
+  at once and the rest wait, like a real converter's process pool.
+- ``start_s3_emulator`` runs moto's S3 server so boto3 can be pointed at it
+  through ``AWS_ENDPOINT_URL``.
+
+Run either one standalone, e.g.::
+
+    python -m perf.standins unoserver --port 2004 --latency lognormal:0.7,0.5
+    python -m perf.standins s3 --port 5000
+"""
+
+import argparse
+import random
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+
+PDF_HEADER = b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+PDF_TRAILER = b"\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n"
+
+
+def parse_latency(
+    spec: str, rng: Optional[random.Random] = None
+) -> Callable[[], float]:
+    """
+    Build a latency sampler (seconds) from a spec string.
+
+    Supported forms: ``const:S``, ``uniform:LO,HI``, ``exp:MEAN`` and
+    ``lognormal:MU,SIGMA`` (parameters of the underlying normal).
+    """
+    rng = rng or random.Random()
+    kind, _, raw = spec.partition(":")
+    params = [float(p) for p in raw.split(",") if p]
+    if kind == "const" and len(params) == 1:
+        return lambda: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda: rng.uniform(params[0], params[1])
+    if kind == "exp" and len(params) == 1:
+        return lambda: rng.expovariate(1.0 / params[0]) if params[0] else 0.0
+    if kind == "lognormal" and len(params) == 2:
+        return lambda: rng.lognormvariate(params[0], params[1])
+    raise ValueError(f"Unsupported latency spec: {spec!r}")
+
+
+@dataclass
+class UnoserverBehaviour:
+    """How the fake converter responds."""
+
+    latency: Callable[[], float]
+    fail_rate: float = 0.0
+    fail_status: int = 500
+    per_mb_latency: float = 0.0
+    output_ratio: float = 0.6
+    # Conversions served at once; 0 means unlimited
+    capacity: int = 0
+
+
+class _UnoserverHandler(BaseHTTPRequestHandler):
+    behaviour: UnoserverBehaviour
+    rng: random.Random
+    counters: dict
+    lock: threading.Lock
+    slots: Optional[threading.Semaphore]
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+    def _drain_body(self) -> int:
+        remaining = int(self.headers.get("Content-Length", 0))
+        total = remaining
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        return total
+
+    def do_POST(self) -> None:
+        if self.path != "/request":
+            self.send_error(404)
+            return
+
+        received = self._drain_body()
+        delay = self.behaviour.latency()
+        delay += self.behaviour.per_mb_latency * received / (1024 * 1024)
+        with self.slots or nullcontext():
+            time.sleep(max(0.0, delay))
+
+        with self.lock:
+            self.counters["requests"] += 1
+            failed = self.rng.random() < self.behaviour.fail_rate
+            if failed:
+                self.counters["failures"] += 1
+
+        if failed:
+            self.send_error(self.behaviour.fail_status, "Injected conversion failure")
+            return
+
+        body_size = max(1024, int(received * self.behaviour.output_ratio))
+        padding = body_size - len(PDF_HEADER) - len(PDF_TRAILER)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(body_size))
+        self.end_headers()
+        self.wfile.write(PDF_HEADER)
+        while padding > 0:
+            chunk = min(padding, 1024 * 1024)
+            self.wfile.write(b"%" + b"x" * (chunk - 1) if chunk > 1 else b"\n")
+            padding -= chunk
+        self.wfile.write(PDF_TRAILER)
+
+
+class FakeUnoserver:
+    """Threaded HTTP server emulating unoserver's REST endpoint."""
+
+    def __init__(
+        self,
+        behaviour: UnoserverBehaviour,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        handler = type(
+            "UnoserverHandler",
+            (_UnoserverHandler,),
+            {
+                "behaviour": behaviour,
+                "rng": random.Random(seed),
+                "counters": {"requests": 0, "failures": 0},
+                "lock": threading.Lock(),
+                "slots": (
+                    threading.Semaphore(behaviour.capacity)
+                    if behaviour.capacity
+                    else None
+                ),
+            },
+        )
+        self.handler = handler
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        host, port = self.server.server_address[:2]
+        return str(host), int(port)
+
+    @property
+    def counters(self) -> dict:
+        return dict(self.handler.counters)
+
+    def start(self) -> "FakeUnoserver":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_s3_emulator(host: str = "127.0.0.1", port: int = 5000):
+    """
+    Start moto's S3 server in a background thread and return it.
+
+    Requires ``moto[server]``; point boto3 at ``http://host:port`` with
+    ``AWS_ENDPOINT_URL`` and any dummy credentials.
+    """
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address=host, port=port)
+    server.start()
+    return server
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a local service stand-in")
+    sub = parser.add_subparsers(dest="service", required=True)
+
+    uno = sub.add_parser("unoserver", help="Fake unoserver REST API")
+    uno.add_argument("--host", default="127.0.0.1")
+    uno.add_argument("--port", type=int, default=2004)
+    uno.add_argument("--latency", default="const:1.0")
+    uno.add_argument("--per-mb-latency", type=float, default=0.0)
+    uno.add_argument("--fail-rate", type=float, default=0.0)
+    uno.add_argument("--fail-status", type=int, default=500)
+    uno.add_argument("--output-ratio", type=float, default=0.6)
+    uno.add_argument("--capacity", type=int, default=0, help="0 means unlimited")
+    uno.add_argument("--seed", type=int, default=None)
+
+    s3 = sub.add_parser("s3", help="moto S3 emulator")
+    s3.add_argument("--host", default="127.0.0.1")
+    s3.add_argument("--port", type=int, default=5000)
+
+    args = parser.parse_args(argv)
+    if args.service == "unoserver":
+        behaviour = UnoserverBehaviour(
+            latency=parse_latency(args.latency, random.Random(args.seed)),
+            fail_rate=args.fail_rate,
+            fail_status=args.fail_status,
+            per_mb_latency=args.per_mb_latency,
+            output_ratio=args.output_ratio,
+            capacity=args.capacity,
+        )
+        server = FakeUnoserver(behaviour, args.host, args.port, args.seed)
+        print(f"Fake unoserver listening on {args.host}:{server.address[1]}")
+        try:
+            server.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    emulator = start_s3_emulator(args.host, args.port)
+    print(f"S3 emulator listening on {args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        emulator.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
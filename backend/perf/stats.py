@@ -0,0 +1,111 @@
+"""
+Small measurement helpers shared by the load tests and benchmarks.
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile; returns ``nan`` for an empty sample."""
+    ordered = sorted(values)
+    if not ordered:
+        return math.nan
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of a latency sample, in seconds."""
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else math.nan,
+    }
+
+
+def read_rss(pid: Optional[int] = None) -> int:
+    """
+    Resident set size of ``pid`` (default: this process) in bytes.
+
+    Reads ``/proc`` so no extra dependency is needed; returns 0 where
+    ``/proc`` is unavailable.
+    """
+    path = f"/proc/{pid or 'self'}/status"
+    try:
+        with open(path) as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct and indirect children of ``pid`` (Linux only)."""
+    children: List[int] = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        path = f"/proc/{current}/task/{current}/children"
+        try:
+            with open(path) as handle:
+                found = [int(c) for c in handle.read().split()]
+        except OSError:
+            found = []
+        children.extend(found)
+        pending.extend(found)
+    return children
+
+
+class RssSampler:
+    """
+    Sample the RSS of a process tree in a background thread.
+
+    Tracks the peak and the last value so reports can show both the
+    high-water mark and the steady state after a run.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.25, include_children: bool = True):
+        self.pid = pid
+        self.interval = interval
+        self.include_children = include_children
+        self.peak = 0
+        self.last = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self) -> int:
+        pids = [self.pid]
+        if self.include_children:
+            pids += child_pids(self.pid)
+        rss = sum(read_rss(pid) for pid in pids)
+        self.last = rss
+        self.peak = max(self.peak, rss)
+        return rss
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval * 4)
+        self.sample()
+
+
+def format_bytes(size: float) -> str:
+    """Human readable byte count."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
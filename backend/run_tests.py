@@ -2,6 +2,7 @@
 Test runner script for the backend application.
 """
 
+import argparse
 import subprocess
 import sys
 from pathlib import Path
@@ -25,8 +26,64 @@ def run_command(cmd: list[str], description: str) -> bool:
         return False
 
 
+def run_benchmarks(args: argparse.Namespace) -> int:
+    """Run the micro-benchmarks and fail on regressions against the baseline."""
+    print("📈 SlideSpeak Backend Benchmarks")
+    print("=" * 40)
+
+    cmd = [
+        "python",
+        "-m",
+        "perf.bench",
+        "--compare",
+        "--threshold",
+        str(args.threshold),
+        "--repeat",
+        str(args.repeat),
+    ]
+    if args.baseline:
+        cmd += ["--baseline", args.baseline]
+    if args.sizes:
+        cmd += ["--sizes", args.sizes]
+    if args.transfer_sizes:
+        cmd += ["--transfer-sizes", args.transfer_sizes]
+    if args.pdf_sizes:
+        cmd += ["--pdf-sizes", args.pdf_sizes]
+    if args.slim_sizes:
+        cmd += ["--slim-sizes", args.slim_sizes]
+
+    # Stream output: benchmarks are long-running and print their own table
+    result = subprocess.run(cmd, cwd=Path(__file__).parent)
+    if result.returncode == 0:
+        print("🎉 No performance regressions")
+    else:
+        print("⚠️  Performance regressions detected")
+    return result.returncode
+
+
 def main():
     """Run the complete test suite."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--bench", action="store_true", help="Run benchmarks instead of tests"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown/memory growth before flagging (0.25 = 25%%)",
+    )
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--sizes", help="Upload sizes in MB, e.g. 1,10,100")
+    parser.add_argument("--transfer-sizes", help="S3 transfer sizes in MB")
+    parser.add_argument("--pdf-sizes", help="PDF sizes in MB for time-to-first-page")
+    parser.add_argument("--slim-sizes", help="Photo deck sizes in MB for slimming")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.bench:
+        return run_benchmarks(args)
+
     print("🚀 SlideSpeak Backend Test Suite")
     print("=" * 40)
     
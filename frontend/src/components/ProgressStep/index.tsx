@@ -2,9 +2,25 @@
 
 "use client";
 
-import React, { useEffect } from "react";
+import React, { useEffect, useState } from "react";
 import { LoadingIndicatorIcon } from "@/icons/LoadingIndicatorIcon";
 
+// Stages reported by the backend's convert_task via /status
+const STAGE_LABELS: Record<string, string> = {
+  downloading: "Preparing your file",
+  converting: "Converting your file",
+  optimizing: "Optimizing your PDF",
+  rasterizing: "Rendering slide images",
+  uploading: "Saving your PDF",
+  finalizing: "Almost done",
+};
+
+interface JobProgress {
+  stage?: string;
+  progress?: number;
+  previewUrl?: string;
+}
+
 export function ProgressStep({
   jobId = undefined,
   file,
@@ -18,6 +34,7 @@ export function ProgressStep({
 }) {
   const interval = Number(process.env.NEXT_PUBLIC_POLL_INTERVAL) || 2000;
   const timeout = Number(process.env.NEXT_PUBLIC_POLL_TIMEOUT) || 300000;
+  const [jobProgress, setJobProgress] = useState<JobProgress>({});
 
   useEffect(() => {
     if (!jobId) return undefined; // Return undefined explicitly
@@ -41,6 +58,14 @@ export function ProgressStep({
         } else if (json.status === "error") {
           clearInterval(tick);
           onError(json.error || "Conversion failed");
+        } else if (typeof json.progress === "number" || json.previewUrl) {
+          // The first-slide preview can arrive before any progress does
+          setJobProgress({
+            stage: json.stage,
+            progress:
+              typeof json.progress === "number" ? json.progress : undefined,
+            previewUrl: json.previewUrl,
+          });
         }
       } catch {
         clearInterval(tick);
@@ -62,6 +87,15 @@ export function ProgressStep({
           <p className="text-sm text-gray-500 mt-2">
             {(file.size / 1024 / 1024).toFixed(2)} MB
           </p>
+          {jobProgress.previewUrl && (
+            // Presigned URLs on arbitrary hosts, so no next/image here
+            // eslint-disable-next-line @next/next/no-img-element
+            <img
+              src={jobProgress.previewUrl}
+              alt={`First slide of ${file.name}`}
+              className="mt-4 mx-auto max-h-48 rounded border border-gray-200"
+            />
+          )}
         </div>
 
         {/* Converting status with circular progress */}
@@ -96,9 +130,31 @@ export function ProgressStep({
                 </svg>
               </div>
               <span className="text-base text-gray-700 select-none">
-                {jobId ? "Converting your file" : "Uploading your file"}
+                {jobId
+                  ? STAGE_LABELS[jobProgress.stage ?? ""] ??
+                    "Converting your file"
+                  : "Uploading your file"}
               </span>
+              {jobId && jobProgress.progress !== undefined && (
+                <span className="ml-auto text-sm text-gray-500 select-none">
+                  {jobProgress.progress}%
+                </span>
+              )}
             </div>
+            {jobId && jobProgress.progress !== undefined && (
+              <div
+                className="mt-4 h-2 w-full rounded-full bg-gray-200"
+                role="progressbar"
+                aria-valuemin={0}
+                aria-valuemax={100}
+                aria-valuenow={jobProgress.progress}
+              >
+                <div
+                  className="h-2 rounded-full bg-blue-500 transition-all"
+                  style={{ width: `${jobProgress.progress}%` }}
+                />
+              </div>
+            )}
           </div>
         </div>
 
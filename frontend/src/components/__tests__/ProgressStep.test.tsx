@@ -117,4 +117,65 @@ describe("ProgressStep", () => {
       { timeout: 1000 }
     );
   });
+
+  it("should show stage and percentage reported by the backend", async () => {
+    (fetch as jest.Mock).mockResolvedValue({
+      json: () =>
+        Promise.resolve({
+          status: "processing",
+          stage: "uploading",
+          progress: 90,
+        }),
+    });
+
+    render(
+      <ProgressStep
+        jobId="test-job"
+        file={mockFile}
+        onDone={mockOnDone}
+        onError={mockOnError}
+      />
+    );
+
+    await waitFor(
+      () => {
+        expect(screen.getByText("Saving your PDF")).toBeInTheDocument();
+        expect(screen.getByText("90%")).toBeInTheDocument();
+      },
+      { timeout: 1000 }
+    );
+    expect(screen.getByRole("progressbar")).toHaveAttribute(
+      "aria-valuenow",
+      "90"
+    );
+  });
+
+  it("should show the first-slide preview while converting", async () => {
+    (fetch as jest.Mock).mockResolvedValue({
+      json: () =>
+        Promise.resolve({
+          status: "processing",
+          previewUrl: "https://example.com/preview.png",
+        }),
+    });
+
+    render(
+      <ProgressStep
+        jobId="test-job"
+        file={mockFile}
+        onDone={mockOnDone}
+        onError={mockOnError}
+      />
+    );
+
+    await waitFor(
+      () => {
+        expect(screen.getByAltText("First slide of test.pptx")).toHaveAttribute(
+          "src",
+          "https://example.com/preview.png"
+        );
+      },
+      { timeout: 1000 }
+    );
+  });
 });